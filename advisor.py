@@ -9,73 +9,303 @@ this is the read-a-term-and-instantly-understand-it layer.
 """
 from __future__ import annotations
 
+import contextvars
+import hashlib
 import json
 import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
+
+from autocomplete import PrefixIndex, build_index
+from cache import PersistentCache
+from clause_store import ClauseStore
+from corpus_watch import diff_records
+from fuzzy import QueryExpander, target_terms
+import scheduler
+import timing
+from retrieval import BM25Index, tokenize
+from singleflight import SingleFlight
 
 DATA = Path(__file__).resolve().parent / "data"
 _PROJECT = os.environ.get("GCP_PROJECT_ID", "bchan-genai-lab")
 _LOCATION = os.environ.get("GCP_LOCATION", "us-central1")
 _MODEL = os.environ.get("ADVISOR_MODEL", "gemini-2.5-flash")
+_BATCH_CONCURRENCY = int(os.environ.get("ADVISOR_BATCH_CONCURRENCY", "4"))
+# ADVISOR_FUZZY=0: search the query as typed (no shorthand expansion / typo correction)
+_FUZZY = os.environ.get("ADVISOR_FUZZY", "1") != "0"
+# queries whose as-typed best BM25 score reaches this are never rewritten
+_FUZZY_MIN_SCORE = float(os.environ.get("ADVISOR_FUZZY_MIN_SCORE", "2.0"))
+
+# ADVISOR_CLAUSE_STORE (default data/clauses.store, built by clause_store.py): a
+# memory-mapped library shared by every worker; rows are decoded on access and
+# the BM25 postings are read from it instead of being built at import.
+# Falls back to the JSON list when the store is missing or older than the JSON.
+_STORE = ClauseStore.open_if_fresh(
+    os.environ.get("ADVISOR_CLAUSE_STORE", str(DATA / "clauses.store")), DATA / "clauses.json"
+)
+
+# "lexical" = BM25 over exact tokens; "semantic" = hashed char n-gram TF-IDF (NumPy),
+# which also matches near-forms like "drag along" / "pref". Built on first use.
+MODES = ("lexical", "semantic")
+
+# reload() compacts (full rebuild) once this share of BM25 slots are removed clauses
+_MAX_HOLES = 0.25
+
+
+class Corpus:
+    """One version of the clause library + episodes and its indexes.
+
+    Never mutated once published: reload() builds the next version and swaps
+    _CORPUS, so a request that read _CORPUS keeps a consistent view.
+    `slots` is the BM25 position -> clause map; an incremental reload leaves
+    None where a clause was removed and appends added clauses.
+    """
+
+    def __init__(self, clauses: Any, episodes: list[dict[str, Any]],
+                 index: BM25Index | None = None, slots: Any = None):
+        self.clauses = clauses
+        self.episodes = episodes
+        self.slots = clauses if slots is None else slots
+        targets = None
+        if slots is None and isinstance(clauses, ClauseStore):
+            index = index or clauses.bm25()  # postings stay in the mapped file
+            targets = clauses.fuzzy_targets()
+        self.index = index if index is not None else BM25Index(self.slots)
+        self.expander = QueryExpander(
+            {t: len(p) for t, p in self.index.postings.items()},
+            targets if targets is not None else target_terms(self.slots),
+            len(self.index),
+        )
+        self._semantic: Any = None
+        self._prefixes: PrefixIndex | None = None
+        self._lazy_lock = threading.Lock()
+
+    def semantic(self) -> Any:
+        if self._semantic is None:
+            with self._lazy_lock:
+                if self._semantic is None:
+                    from semantic import HashedNgramIndex
+
+                    self._semantic = HashedNgramIndex(self.clauses)
+        return self._semantic
+
+    def prefixes(self) -> PrefixIndex:
+        if self._prefixes is None:
+            with self._lazy_lock:
+                if self._prefixes is None:
+                    self._prefixes = build_index(self.clauses, self.episodes)
+        return self._prefixes
+
+    def engine(self, mode: str) -> tuple[Any, Any]:
+        """(index, position -> clause) for a retrieval mode."""
+        if mode not in MODES:
+            raise ValueError(f"unknown retrieval mode {mode!r}; expected one of {MODES}")
+        return (self.semantic(), self.clauses) if mode == "semantic" else (self.index, self.slots)
+
+    def stats(self) -> dict[str, Any]:
+        holes = sum(c is None for c in self.slots) if isinstance(self.slots, list) else 0
+        return {"clauses": len(self.clauses), "episodes": len(self.episodes),
+                "bm25_slots": len(self.slots), "bm25_holes": holes,
+                "semantic_built": self._semantic is not None}
+
+
+_CORPUS = Corpus(
+    _STORE if _STORE is not None else json.loads((DATA / "clauses.json").read_text()),
+    json.loads((DATA / "episodes.json").read_text()),
+)
+_reload_lock = threading.Lock()
+
+# Grounded answers keyed on (normalized query, retrieved clause_ids, episode_id).
+# ADVISOR_CACHE_DB=<path> adds a SQLite file shared by all workers on the host.
+_ANSWERS = PersistentCache(
+    maxsize=int(os.environ.get("ADVISOR_CACHE_SIZE", "1024")),
+    ttl=float(os.environ.get("ADVISOR_CACHE_TTL", "86400")),
+    path=os.environ.get("ADVISOR_CACHE_DB") or None,
+    table="advisor_answers",
+)
+
+
+def semantic_index() -> Any:
+    return _CORPUS.semantic()
+
+
+def suggest_index() -> PrefixIndex:
+    return _CORPUS.prefixes()
+
+
+@timing.timed("retrieve")
+def _weak(top: list[tuple[float, int]]) -> bool:
+    """An as-typed BM25 result worth retrying with the query rewritten."""
+    return not top or top[0][0] < _FUZZY_MIN_SCORE
+
+
+def _retrieve(query: str, k: int = 3, mode: str = "lexical", fuzzy: bool = _FUZZY) -> list[dict[str, Any]]:
+    corpus = _CORPUS
+    engine, docs = corpus.engine(mode)
+    top = corpus.index.search(query, k) if fuzzy or mode == "lexical" else None
+    if fuzzy and _weak(top):
+        query, top = corpus.expander.expand(query), None
+    if top is None or mode != "lexical":
+        top = engine.search(query, k)
+    # no hit at all -> fall back to the first clause, as before
+    return [docs[i] for _, i in top] or [corpus.clauses[0]]
+
+
+@timing.timed("retrieve")
+def _retrieve_many(queries: list[str], k: int = 3, mode: str = "lexical",
+                   fuzzy: bool = _FUZZY) -> list[list[dict[str, Any]]]:
+    corpus = _CORPUS
+    engine, docs = corpus.engine(mode)
+    if fuzzy:
+        typed = corpus.index.search_many(queries, k)
+        queries = [corpus.expander.expand(q) if _weak(t) else q for q, t in zip(queries, typed)]
+    tops = engine.search_many(queries, k)
+    return [[docs[i] for _, i in top] or [corpus.clauses[0]] for top in tops]
+
+
+def reload(changed: dict[str, bytes]) -> dict[str, Any]:
+    """
+    Apply new clauses.json / episodes.json bytes (CorpusWatcher callback).
+
+    Only added, changed and removed clauses are re-indexed (BM25Index.updated);
+    a full rebuild happens once removed slots pass _MAX_HOLES or the field
+    length averages drift. Semantic and suggestion indexes that were in use
+    are rebuilt in the background for the new version.
+    """
+    global _CORPUS
+    with _reload_lock:
+        old = _CORPUS
+        episodes = json.loads(changed["episodes"]) if "episodes" in changed else old.episodes
+        summary: dict[str, Any] = {}
+        if "clauses" not in changed:
+            corpus = Corpus(old.clauses, episodes, old.index, old.slots)
+            corpus._semantic = old._semantic
+        else:
+            clauses = json.loads(changed["clauses"])
+            diff = diff_records(old.clauses, clauses, "clause_id")
+            new_by_id = {c["clause_id"]: c for c in clauses}
+            slots = list(old.slots)
+            pos = {c["clause_id"]: i for i, c in enumerate(slots) if c is not None}
+            removed = {pos[cid]: slots[pos[cid]] for cid in diff.changed + diff.removed}
+            added = {}
+            for cid in diff.removed:
+                slots[pos[cid]] = None
+            for cid in diff.changed:
+                slots[pos[cid]] = added[pos[cid]] = new_by_id[cid]
+            for cid in diff.added:
+                added[len(slots)] = new_by_id[cid]
+                slots.append(new_by_id[cid])
+
+            index = old.index.updated(removed, added)
+            if slots.count(None) > _MAX_HOLES * len(slots) or index.needs_rebuild():
+                corpus = Corpus(clauses, episodes)
+                summary["rebuilt"] = True
+            else:
+                corpus = Corpus(clauses, episodes, index, slots)
+            summary["clauses"] = diff.summary()
+            if old._semantic is not None:
+                threading.Thread(target=corpus.semantic, name="semantic-index", daemon=True).start()
+        if "episodes" in changed:
+            summary["episodes"] = diff_records(old.episodes, episodes, "episode_id").summary()
+        _CORPUS = corpus
+        if old._prefixes is not None:
+            threading.Thread(target=corpus.prefixes, name="suggest-index", daemon=True).start()
+    return summary
+
+
+@timing.timed("suggest")
+def suggest(prefix: str, limit: int = 8) -> list[dict[str, Any]]:
+    """Autocomplete for the search box: clause types, short-text terms, episode titles."""
+    return list(suggest_index().suggest(prefix, limit))
+
+
+def corpus_stats() -> dict[str, Any]:
+    return _CORPUS.stats()
+
+
+# One GenerativeModel per process: vertexai.init + credential discovery + channel
+# setup happen once, every request then reuses the same warm client.
+_gen_lock = threading.Lock()
+_gen: tuple[Any, Any] | None = None  # (GenerativeModel, GenerationConfig)
+
+
+def _generator() -> tuple[Any, Any]:
+    global _gen
+    if _gen is None:
+        with _gen_lock:
+            if _gen is None:
+                import vertexai
+                from vertexai.generative_models import GenerativeModel, GenerationConfig
+
+                vertexai.init(project=_PROJECT, location=_LOCATION)
+                _gen = (
+                    GenerativeModel(_MODEL),
+                    GenerationConfig(temperature=0.2, max_output_tokens=2048),
+                )
+    return _gen
+
+
+def warm() -> bool:
+    """Build the shared client and open its channel (cheap count_tokens call)."""
+    try:
+        model, _ = _generator()
+        model.count_tokens("ping")
+    except Exception:
+        return False
+    return True
 
-_CLAUSES = json.loads((DATA / "clauses.json").read_text())
-_EPISODES = json.loads((DATA / "episodes.json").read_text())
-_TOKEN = re.compile(r"[a-z0-9]+")
 
+def ready() -> bool:
+    return _gen is not None
 
-def _toks(s: str) -> set[str]:
-    return set(_TOKEN.findall((s or "").lower()))
 
+def _answer_key(query: str, hits: list[dict[str, Any]], ep: dict[str, Any] | None) -> str:
+    # word order, case and punctuation don't change the grounded answer
+    norm = " ".join(sorted(set(tokenize(query))))
+    # whole records, not just ids: an edited clause or episode must miss
+    evidence = [dict(c) for c in hits], ep
+    return hashlib.sha1(json.dumps([_MODEL, norm, evidence], sort_keys=True).encode()).hexdigest()
 
-def _retrieve(query: str, k: int = 3) -> list[dict[str, Any]]:
-    q = _toks(query)
-    scored = []
-    for c in _CLAUSES:
-        hay = _toks(" ".join([
-            c.get("short_text", ""), c.get("full_text", ""),
-            c.get("clause_type", ""), c.get("conflict_type", ""),
-            c.get("explanation", ""),
-        ]))
-        scored.append((len(q & hay), c))
-    scored.sort(key=lambda x: x[0], reverse=True)
-    return [c for s, c in scored[:k] if s > 0] or [scored[0][1]]
 
+# identical questions arriving together wait on one Gemini call (keyed like the cache)
+_FLIGHT = SingleFlight()
 
+
+def cache_stats() -> dict[str, Any]:
+    return _ANSWERS.stats()
+
+
+def flight_stats() -> dict[str, int]:
+    return _FLIGHT.stats()
+
+
+@timing.timed("episode")
 def _episode_for(conflict_type: str) -> dict[str, Any] | None:
-    for e in _EPISODES:
+    for e in _CORPUS.episodes:
         if e.get("conflict_type") == conflict_type:
             return e
     return None
 
 
-def advise(query: str) -> dict[str, Any]:
-    hits = _retrieve(query)
-    top = hits[0]
-    ep = _episode_for(top.get("conflict_type", ""))
-
-    ctx_clauses = "\n".join(
-        f"[{c['clause_id']}] {c['clause_type']} ({c['bias']}) — {c['short_text']}. "
-        f"{c['explanation']} (founder_risk={c['risk_score_founder']}, vc_risk={c['risk_score_vc']})"
-        for c in hits
-    )
-    ep_ctx = (
-        f"{ep['episode_id']} '{ep['title']}': {ep['scene']} → {ep['result']} "
-        f"(stakes: {ep['legal_stakes']})" if ep else "no matching episode"
-    )
-
-    sources = [{
-        "clause_id": c["clause_id"], "clause_type": c["clause_type"],
-        "bias": c["bias"], "risk_score_founder": c["risk_score_founder"],
-        "risk_score_vc": c["risk_score_vc"],
-    } for c in hits]
+def _ground(query: str, hits: list[dict[str, Any]] | None = None, mode: str = "lexical"
+            ) -> tuple[list[dict[str, Any]], dict[str, Any] | None, str, str]:
+    """Retrieve evidence and build the grounded prompt: (hits, episode, prompt, cache key)."""
+    hits = hits or _retrieve(query, mode=mode)
+    ep = _episode_for(hits[0].get("conflict_type", ""))
 
-    try:
-        import vertexai
-        from vertexai.generative_models import GenerativeModel, GenerationConfig
-
-        vertexai.init(project=_PROJECT, location=_LOCATION)
+    with timing.span("prompt"):
+        ctx_clauses = "\n".join(
+            f"[{c['clause_id']}] {c['clause_type']} ({c['bias']}) — {c['short_text']}. "
+            f"{c['explanation']} (founder_risk={c['risk_score_founder']}, vc_risk={c['risk_score_vc']})"
+            for c in hits
+        )
+        ep_ctx = (
+            f"{ep['episode_id']} '{ep['title']}': {ep['scene']} → {ep['result']} "
+            f"(stakes: {ep['legal_stakes']})" if ep else "no matching episode"
+        )
         prompt = (
             "You are a VC term-sheet advisor for a new analyst. Answer ONLY from the "
             "clause evidence and the Silicon Valley episode below. Cite [clause_id]. "
@@ -86,15 +316,29 @@ def advise(query: str) -> dict[str, Any]:
             f"Clause evidence:\n{ctx_clauses}\n\nSilicon Valley episode:\n{ep_ctx}\n\n"
             f"Question: {query}\nAnswer:"
         )
-        model = GenerativeModel(_MODEL)
-        resp = model.generate_content(
-            prompt, generation_config=GenerationConfig(temperature=0.2, max_output_tokens=2048)
-        )
-        answer, grounded = (resp.text or "").strip(), True
+        key = _answer_key(query, hits, ep)
+    return hits, ep, prompt, key
+
+
+def _unavailable(exc: BaseException) -> str:
+    return f"Retrieval ran (sources below); grounded generation unavailable: {type(exc).__name__}"
+
+
+def _generate(prompt: str) -> tuple[str, bool]:
+    try:
+        model, gen_config = _generator()
+        # Overloaded -> degraded answer below; "generate" includes the queue wait
+        with timing.span("generate"), scheduler.limiter("vertex").slot():
+            resp = model.generate_content(prompt, generation_config=gen_config)
+        return (resp.text or "").strip(), True
     except Exception as exc:
-        answer = f"Retrieval ran (sources below); grounded generation unavailable: {type(exc).__name__}"
-        grounded = False
+        return _unavailable(exc), False
+
 
+def _response(query: str, hits: list[dict[str, Any]], ep: dict[str, Any] | None,
+              answer: str | None, grounded: bool | None, cached: bool) -> dict[str, Any]:
+    top = hits[0]
+    corpus = _CORPUS
     return {
         "query": query,
         "grounded": grounded,
@@ -105,13 +349,140 @@ def advise(query: str) -> dict[str, Any]:
         "vc_risk": top["risk_score_vc"],
         "bias": top["bias"],
         "episode": (f"{ep['episode_id']} — {ep['title']}" if ep else None),
-        "sources": sources,
-        "corpus": "57 clauses + 19 Silicon Valley episodes",
+        "sources": [{
+            "clause_id": c["clause_id"], "clause_type": c["clause_type"],
+            "bias": c["bias"], "risk_score_founder": c["risk_score_founder"],
+            "risk_score_vc": c["risk_score_vc"],
+        } for c in hits],
+        "corpus": f"{len(corpus.clauses)} clauses + {len(corpus.episodes)} Silicon Valley episodes",
+        "cached": cached,
+    }
+
+
+def _answer(prompt: str, key: str) -> tuple[str, bool, bool]:
+    """(answer, grounded, cached): cache, else one coalesced generation per key."""
+    with timing.span("answer_cache"):
+        answer = _ANSWERS.get(key)
+    if answer is not None:
+        return answer, True, True
+
+    def generate() -> tuple[str, bool]:
+        answer, grounded = _generate(prompt)
+        if grounded:
+            _ANSWERS.set(key, answer)
+        return answer, grounded
+
+    (answer, grounded), _ = _FLIGHT.do(key, generate)
+    return answer, grounded, False
+
+
+def advise(query: str, mode: str = "lexical") -> dict[str, Any]:
+    hits, ep, prompt, key = _ground(query, mode=mode)
+    answer, grounded, cached = _answer(prompt, key)
+    return _response(query, hits, ep, answer, grounded, cached)
+
+
+def advise_stream(query: str, mode: str = "lexical") -> Iterator[tuple[str, dict[str, Any]]]:
+    """
+    Same answer as advise(), as (event, data) pairs for Server-Sent Events:
+    "retrieval" (everything but the answer, emitted before generation starts),
+    "token" ({"text": chunk}, repeated) and "done" ({"grounded", "cached", "answer"}).
+    """
+    hits, ep, prompt, key = _ground(query, mode=mode)
+    with timing.span("answer_cache"):
+        answer = _ANSWERS.get(key)
+    cached = answer is not None
+    head = _response(query, hits, ep, None, None, cached)
+    del head["answer"], head["grounded"]
+    yield "retrieval", head
+
+    if cached:
+        yield "token", {"text": answer}
+        yield "done", {"grounded": True, "cached": True, "answer": answer}
+        return
+
+    parts: list[str] = []
+    try:
+        model, gen_config = _generator()
+        # the slot spans our yields: callers must close() this generator when they
+        # stop reading early (main.ClosingStreamingResponse does on disconnect)
+        with timing.span("generate"), scheduler.limiter("vertex").slot():
+            for chunk in model.generate_content(prompt, generation_config=gen_config, stream=True):
+                text = chunk.text or ""
+                if text:
+                    parts.append(text)
+                    yield "token", {"text": text}
+    except Exception as exc:
+        note = _unavailable(exc)
+        if not parts:
+            yield "token", {"text": note}
+        yield "done", {"grounded": False, "cached": False, "answer": "".join(parts) or note}
+        return
+
+    answer = "".join(parts).strip()
+    _ANSWERS.set(key, answer)
+    yield "done", {"grounded": True, "cached": False, "answer": answer}
+
+
+_BULLET = re.compile(r"^\s*(?:[-*•·]|\(?\d+(?:\.\d+)*[.)]|\(?[a-z][.)]|#+)\s*", re.I)
+_SENTENCE = re.compile(r"(?<=[.;])\s+(?=[A-Z(\"'])")
+
+
+def segment(document: str) -> list[str]:
+    """Split a pasted term sheet into clause-sized segments (lines / bullets,
+    then sentences for any single long paragraph)."""
+    parts = []
+    for line in (document or "").splitlines():
+        line = _BULLET.sub("", line).strip()
+        if len(line) < 2 or (line.isupper() and len(line.split()) <= 4):  # headings
+            continue
+        parts.extend(p.strip() for p in _SENTENCE.split(line) if len(p.strip()) >= 2)
+    return parts
+
+
+def advise_batch(segments: list[str], mode: str = "lexical") -> dict[str, Any]:
+    """
+    advise() for many segments in one call: one batched retrieval pass, one
+    generation per distinct (clause_ids, episode) evidence set, at most
+    ADVISOR_BATCH_CONCURRENCY generations in flight. Results keep input order;
+    segments that reused another segment's answer carry "shared_with".
+    """
+    grounded_inputs = [_ground(q, hits) for q, hits in zip(segments, _retrieve_many(segments, mode=mode))]
+
+    # first segment per evidence set generates; the rest share its answer
+    owner: dict[tuple, int] = {}
+    for i, (hits, ep, _, _) in enumerate(grounded_inputs):
+        owner.setdefault((tuple(c["clause_id"] for c in hits), (ep or {}).get("episode_id")), i)
+    leaders = sorted(set(owner.values()))
+
+    def run(i: int) -> tuple[str, bool, bool]:
+        _, _, prompt, key = grounded_inputs[i]
+        return _answer(prompt, key)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(_BATCH_CONCURRENCY, len(leaders) or 1))) as pool:
+        # one context copy per task so worker spans still land on this request
+        futures = [pool.submit(contextvars.copy_context().run, run, i) for i in leaders]
+        answers = {i: f.result() for i, f in zip(leaders, futures)}
+
+    results = []
+    for i, (q, (hits, ep, _, _)) in enumerate(zip(segments, grounded_inputs)):
+        lead = owner[(tuple(c["clause_id"] for c in hits), (ep or {}).get("episode_id"))]
+        answer, grounded, cached = answers[lead]
+        out = _response(q, hits, ep, answer, grounded, cached)
+        if lead != i:
+            out["shared_with"] = lead
+        results.append(out)
+    return {
+        "count": len(results),
+        "unique_evidence": len(leaders),
+        "generations": sum(1 for i in leaders if not answers[i][2]),
+        "results": results,
     }
 
 
 if __name__ == "__main__":
     import sys
+    mode = os.environ.get("ADVISOR_MODE", "lexical")
     q = " ".join(sys.argv[1:]) or "2x participating liquidation preference"
-    out = advise(q)
+    out = advise(q, mode)
     print(json.dumps(out, indent=2))
@@ -1,10 +1,13 @@
 """Vercel serverless API for Pied Piper Legal Simulator"""
-from fastapi import FastAPI, HTTPException
+import time
+_IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional
 import json
-import os
+import sys
 from pathlib import Path
 
 # FastAPI app
@@ -20,7 +23,17 @@ app.add_middleware(
 )
 
 # Load data from JSON files (no DuckDB on serverless)
-DATA_DIR = Path(__file__).parent.parent / "data"
+ROOT_DIR = Path(__file__).parent.parent
+DATA_DIR = ROOT_DIR / "data"
+
+# Shared stdlib-only helpers (src/corpus) live in the repo root
+sys.path.insert(0, str(ROOT_DIR))
+from clause_store import ClauseStore  # noqa: E402
+from http_cache import REVALIDATE, BodyCache, CachedBody  # noqa: E402
+from src.corpus import (  # noqa: E402
+    EMPTY_SCENARIO, NO_CLAUSES, ClauseIndex, CorpusBundle, Snapshot, StoreClauseIndex,
+    assemble_simulation, render_export_markdown
+)
 
 def load_json(filename):
     """Load JSON data file"""
@@ -31,8 +44,40 @@ def load_json(filename):
         print(f"Error loading {filename}: {e}")
         return []
 
-EPISODES = load_json("episodes.json")
-CLAUSES = load_json("clauses.json")
+# Cold start: one read of the prebuilt bundle (python precompute.py --bundle-only)
+# when it matches the corpus, else parse the JSON files and build the index here.
+# Large libraries: a memory-mapped clause store (python clause_store.py) replaces
+# the clause dicts; rows are decoded only when matched
+_corpus_started = time.perf_counter()
+STORE = ClauseStore.open_if_fresh(DATA_DIR / "clauses.store", DATA_DIR / "clauses.json")
+BUNDLE = CorpusBundle.load(DATA_DIR / "corpus.bundle", DATA_DIR)
+if BUNDLE is not None:
+    EPISODES, CLAUSES = BUNDLE.episodes, BUNDLE.clauses
+    SNAPSHOT = BUNDLE.snapshot()
+else:
+    EPISODES = load_json("episodes.json")
+    CLAUSES = STORE if STORE is not None else load_json("clauses.json")
+    SNAPSHOT = Snapshot.load(DATA_DIR / "snapshot.json", DATA_DIR)
+EPISODES_BY_ID = {e["episode_id"]: e for e in EPISODES}
+
+if STORE is not None:
+    CLAUSES, CLAUSE_INDEX = STORE, StoreClauseIndex(STORE)
+else:
+    CLAUSE_INDEX = BUNDLE.index if BUNDLE is not None else None
+
+# A deployment's corpus never changes, so bodies are serialized once per instance.
+# Vercel purges its edge cache on every deploy: the CDN may keep them for a day.
+RESPONSES = BodyCache()
+DATA_CACHE_CONTROL = "public, max-age=300, s-maxage=86400, stale-while-revalidate=86400"
+
+# /simulate narrative for a scenario without clauses (app.py says NO_CLAUSES)
+EMPTY_NARRATIVE = "No clauses available."
+
+STARTUP = {
+    "corpus_source": "bundle" if BUNDLE is not None else "json",
+    "clauses_source": "store" if STORE is not None else "bundle" if BUNDLE is not None else "json",
+    "corpus_ms": round((time.perf_counter() - _corpus_started) * 1e3, 2),
+}
 
 
 class SimulateRequest(BaseModel):
@@ -41,56 +86,24 @@ class SimulateRequest(BaseModel):
 
 
 class ClauseMatchAgent:
-    """Matches episode conflicts to relevant clauses"""
+    """Matches episode conflicts to relevant clauses (shared ClauseIndex fast path)"""
     
-    def __init__(self, clauses):
+    def __init__(self, clauses, index=None):
         self.clauses = clauses
+        self.index = index or ClauseIndex(clauses)
     
     def match_clauses(self, episode):
         """Return 3 clause sets: VC win, Founder win, Win-Win"""
-        conflict_type = episode.get("conflict_type")
-        
-        # Filter by conflict type
-        relevant = [c for c in self.clauses if c["conflict_type"] == conflict_type]
-        
-        # Separate by bias
-        return {
-            "vc_win": [c for c in relevant if c["bias"] == "VC_bias"],
-            "founder_win": [c for c in relevant if c["bias"] == "Founder_bias"],
-            "winwin": [c for c in relevant if c["bias"] == "Neutral"]
-        }
+        return self.index.match(episode.get("conflict_type"))
     
     def get_alignment_score(self, clauses, perspective):
         """Calculate alignment score (0-100)"""
-        if not clauses:
-            return 50
-        
-        if perspective == "vc":
-            avg_risk = sum(c["risk_score_founder"] for c in clauses) / len(clauses)
-            return int(avg_risk)
-        elif perspective == "founder":
-            avg_risk = sum(c["risk_score_vc"] for c in clauses) / len(clauses)
-            return int(avg_risk)
-        else:
-            avg_f = sum(c["risk_score_founder"] for c in clauses) / len(clauses)
-            avg_v = sum(c["risk_score_vc"] for c in clauses) / len(clauses)
-            return int(100 - abs(avg_f - avg_v))
+        return self.index.alignment_score(clauses, perspective)
 
 
 class NarrativeAgent:
     """Generates trade-off summaries"""
     
-    def __init__(self):
-        self.api_key = os.getenv("ANTHROPIC_API_KEY")
-        self.client = None
-        
-        if self.api_key:
-            try:
-                import anthropic
-                self.client = anthropic.Anthropic(api_key=self.api_key)
-            except:
-                pass
-    
     def summarize_scenario(self, episode, clauses, scenario_type):
         """Generate narrative summary"""
         # Use fallback for now (Claude optional)
@@ -146,33 +159,78 @@ class NarrativeAgent:
 
 
 # Initialize agents
-clause_agent = ClauseMatchAgent(CLAUSES)
+clause_agent = ClauseMatchAgent(CLAUSES, CLAUSE_INDEX)
 narrative_agent = NarrativeAgent()
 
+STARTUP["import_ms"] = round((time.perf_counter() - _IMPORT_STARTED) * 1e3, 2)
+print(f"cold start: corpus from {STARTUP['corpus_source']} in {STARTUP['corpus_ms']} ms, "
+      f"module ready in {STARTUP['import_ms']} ms")
+
+
+class FirstResponseTimer:
+    """Record import-to-first-response once per instance (pure ASGI, no per-request cost after)"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if "first_response_ms" in STARTUP or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        
+        async def timed_send(message):
+            if message["type"] == "http.response.start" and "first_response_ms" not in STARTUP:
+                STARTUP["first_response_ms"] = round((time.perf_counter() - _IMPORT_STARTED) * 1e3, 2)
+                print(f"cold start: first response {STARTUP['first_response_ms']} ms after import")
+            await send(message)
+        
+        await self.app(scope, receive, timed_send)
+
+
+app.add_middleware(FirstResponseTimer)
+
 
 @app.get("/")
-async def root():
+async def root(if_none_match: Optional[str] = Header(None)):
     """Health check"""
-    return {
+    return CachedBody.json({
         "app": "Pied Piper Legal Simulator API",
         "version": "1.0.0",
         "status": "running",
-        "endpoints": ["/episodes", "/simulate", "/export/{episode_id}"]
-    }
+        "endpoints": ["/episodes", "/simulate", "/export/{episode_id}"],
+        "startup": STARTUP
+    }).response(if_none_match, REVALIDATE)
 
 
 @app.get("/episodes")
-async def list_episodes():
+async def list_episodes(if_none_match: Optional[str] = Header(None)):
     """List all available episodes"""
-    return {"episodes": EPISODES}
+    cached = RESPONSES.get("episodes") or RESPONSES.put("episodes", {"episodes": EPISODES}, RESPONSES.version)
+    return cached.response(if_none_match, DATA_CACHE_CONTROL)
 
 
 @app.post("/simulate")
 async def simulate(request: SimulateRequest):
     """Generate 3-scenario analysis"""
     try:
+        # Precomputed by precompute.py: serve without touching the agents
+        # (unless it only holds generic fallbacks; ours are episode-specific)
+        cached = SNAPSHOT.simulation(request.episode_id)
+        if cached is not None and SNAPSHOT.has_llm_narratives:
+            scenarios = cached["scenarios"]
+            if all(s["narrative"] != NO_CLAUSES for s in scenarios.values()):
+                return cached
+            # Snapshot bodies are assembled app.py-style; this endpoint has its
+            # own empty-scenario narrative, so those few are re-assembled here
+            return assemble_simulation(
+                cached["episode"],
+                {t: s["clauses"] for t, s in scenarios.items()},
+                {t: s["narrative"] for t, s in scenarios.items() if s["clauses"]},
+                clause_agent.get_alignment_score,
+                empty_narrative=EMPTY_NARRATIVE
+            )
+        
         # Find episode
-        episode = next((e for e in EPISODES if e["episode_id"] == request.episode_id), None)
+        episode = EPISODES_BY_ID.get(request.episode_id)
         if not episode:
             raise HTTPException(status_code=404, detail="Episode not found")
         
@@ -180,38 +238,16 @@ async def simulate(request: SimulateRequest):
         clause_sets = clause_agent.match_clauses(episode)
         
         # Generate scenarios
-        scenarios = {}
-        alignment_scores = {}
-        
-        for scenario_type, clauses in clause_sets.items():
-            if not clauses:
-                scenarios[scenario_type] = {
-                    "clauses": [],
-                    "narrative": "No clauses available.",
-                    "clause_details": []
-                }
-                alignment_scores[scenario_type] = {"vc": 50, "founder": 50, "balance": 50}
-                continue
-            
-            narrative = narrative_agent.summarize_scenario(episode, clauses, scenario_type)
-            
-            scenarios[scenario_type] = {
-                "clauses": clauses,  # Return full clause objects, not just short_text
-                "narrative": narrative,
-                "clause_details": clauses
-            }
-            
-            alignment_scores[scenario_type] = {
-                "vc": clause_agent.get_alignment_score(clauses, "vc"),
-                "founder": clause_agent.get_alignment_score(clauses, "founder"),
-                "balance": clause_agent.get_alignment_score(clauses, "neutral")
-            }
-        
-        return {
-            "episode": episode,
-            "scenarios": scenarios,
-            "alignment_scores": alignment_scores
+        narratives = {
+            scenario_type: narrative_agent.summarize_scenario(episode, clauses, scenario_type)
+            for scenario_type, clauses in clause_sets.items()
+            if clauses
         }
+        
+        return assemble_simulation(
+            episode, clause_sets, narratives, clause_agent.get_alignment_score,
+            empty_narrative=EMPTY_NARRATIVE
+        )
     
     except HTTPException:
         raise
@@ -220,50 +256,25 @@ async def simulate(request: SimulateRequest):
 
 
 @app.get("/export/{episode_id}")
-async def export_simulation(episode_id: str):
+async def export_simulation(episode_id: str, if_none_match: Optional[str] = Header(None)):
     """Export simulation as markdown"""
-    episode = next((e for e in EPISODES if e["episode_id"] == episode_id), None)
-    if not episode:
-        raise HTTPException(status_code=404, detail="Episode not found")
-    
-    clause_sets = clause_agent.match_clauses(episode)
-    
-    markdown = f"""# Pied Piper Legal Simulator
-
-## Episode: {episode['title']} ({episode['episode_id']})
-
-**Conflict:** {episode['conflict_type']}  
-**Scene:** {episode['scene']}  
-**Legal Stakes:** {episode['legal_stakes']}
-
----
-
-"""
-    
-    scenario_names = {
-        "vc_win": "💰 VC WIN",
-        "founder_win": "💡 FOUNDER WIN",
-        "winwin": "🤝 WIN-WIN"
-    }
-    
-    for scenario_type, clauses in clause_sets.items():
-        markdown += f"### {scenario_names.get(scenario_type)}\n\n"
-        
-        if clauses:
-            for clause in clauses:
-                markdown += f"- **{clause['clause_type']}:** {clause['short_text']}\n"
-                markdown += f"  - {clause['explanation']}\n"
-                markdown += f"  - Risk (Founder): {clause['risk_score_founder']}% | Risk (VC): {clause['risk_score_vc']}%\n\n"
+    cached = RESPONSES.get(("export", episode_id))
+    if cached is None:
+        # Snapshot exports are rendered app.py-style; this endpoint never wrote
+        # the empty-scenario line, so those few episodes are rendered here
+        markdown = SNAPSHOT.export(episode_id)
+        if markdown is None or EMPTY_SCENARIO in markdown:
+            episode = EPISODES_BY_ID.get(episode_id)
+            if not episode:
+                raise HTTPException(status_code=404, detail="Episode not found")
             
-            vc_score = clause_agent.get_alignment_score(clauses, "vc")
-            founder_score = clause_agent.get_alignment_score(clauses, "founder")
-            balance_score = clause_agent.get_alignment_score(clauses, "neutral")
-            
-            markdown += f"**Alignment:** VC: {vc_score}% | Founder: {founder_score}% | Balance: {balance_score}%\n\n"
-        
-        markdown += "---\n\n"
+            clause_sets = clause_agent.match_clauses(episode)
+            markdown = render_export_markdown(
+                episode, clause_sets, clause_agent.get_alignment_score, empty_scenario=""
+            )
+        cached = RESPONSES.put(("export", episode_id), {"markdown": markdown}, RESPONSES.version)
     
-    return {"markdown": markdown}
+    return cached.response(if_none_match, DATA_CACHE_CONTROL)
 
 
 # Export app for Vercel
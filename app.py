@@ -1,13 +1,23 @@
 """FastAPI backend for Pied Piper Legal Simulator"""
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
 from typing import Optional
+import asyncio
+import contextvars
+import functools
+import hashlib
 import json
 
 import config
-from src.agents import ClauseMatchAgent, NarrativeAgent
-from src.database import DBManager
+import scheduler
+import timing
+from corpus_watch import CorpusWatcher, diff_records
+from http_cache import REVALIDATE, BodyCache, CachedBody
+from src.agents import ClauseMatchAgent, NarrativeAgent, NarrativeCache, NegotiationSimulator
+from src.corpus import Snapshot, assemble_simulation, corpus_version, render_export_markdown
+from src.database import DBManager, SimulationWriter
 
 app = FastAPI(title=config.APP_NAME, version=config.APP_VERSION)
 
@@ -18,12 +28,123 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Per-stage spans -> Server-Timing header + /metrics (SERVER_TIMING=0 disables)
+if timing.ENABLED:
+    app.add_middleware(timing.ServerTimingMiddleware)
+
 # Initialize components
 db = DBManager()
+simulation_writer = SimulationWriter(db)
 clause_agent = ClauseMatchAgent()
-narrative_agent = NarrativeAgent()
+narrative_agent = NarrativeAgent(cache=NarrativeCache(db, "data/clauses.json"))
+snapshot = Snapshot.load(config.SNAPSHOT_PATH, "data")
+negotiation_simulator = NegotiationSimulator()
+last_reload: dict = {}
+
+# /episodes and /export bodies, serialized once per corpus version (see http_cache)
+responses = BodyCache(corpus_version("data"))
+DATA_CACHE_CONTROL = f"public, max-age={config.HTTP_CACHE_MAX_AGE}"
+
+
+def parse_corpus_rows(data: bytes, key: str, required: tuple = ()) -> list:
+    """Decode a changed corpus file, rejecting anything that isn't a list of rows with `key`"""
+    rows = json.loads(data)
+    if not isinstance(rows, list):
+        raise ValueError(f"expected a JSON list of rows, got {type(rows).__name__}")
+    for row in rows:
+        if not isinstance(row, dict) or any(col not in row for col in (key, *required)):
+            raise ValueError(f"row without {', '.join((key, *required))}: {str(row)[:80]}")
+    return rows
+
+
+def apply_corpus_change(changed: dict):
+    """
+    Hot reload (CorpusWatcher callback): apply edited clauses.json / episodes.json
+    
+    Only added, changed and removed rows are touched: their DuckDB rows are
+    upserted, the clause buckets of their conflict types rebuilt, and the
+    snapshot entries and stored narratives of the affected episodes dropped.
+    New versions are swapped in by reference, so in-flight requests finish on
+    the version they started with.
+    
+    Both files are parsed and diffed before anything is changed, so a malformed
+    file raises (and is retried on its next edit) without a half-applied reload.
+    """
+    global snapshot, last_reload
+    touched_episodes, touched_clauses, conflict_types = set(), set(), set()
+    summary = {}
+    
+    if "episodes" in changed:
+        columns = DBManager.EPISODE_COLUMNS
+        episodes = [
+            {col: e.get(col) for col in columns}
+            for e in parse_corpus_rows(changed["episodes"], "episode_id")
+        ]
+        episode_diff = diff_records(db.get_all_episodes(), episodes, "episode_id")
+        episodes_by_id = {e["episode_id"]: e for e in episodes}
+    
+    if "clauses" in changed:
+        clauses = parse_corpus_rows(changed["clauses"], "clause_id", ("conflict_type",))
+        old_by_id = {c["clause_id"]: c for c in clause_agent.clauses}
+        new_by_id = {c["clause_id"]: c for c in clauses}
+        clause_diff = diff_records(old_by_id.values(), clauses, "clause_id")
+        conflict_types = (
+            {old_by_id[i]["conflict_type"] for i in clause_diff.changed + clause_diff.removed}
+            | {new_by_id[i]["conflict_type"] for i in clause_diff.added + clause_diff.changed}
+        )
+    
+    if "episodes" in changed:
+        db.upsert_episodes(
+            [episodes_by_id[i] for i in episode_diff.added + episode_diff.changed],
+            episode_diff.removed,
+            hashlib.sha1(changed["episodes"]).hexdigest()
+        )
+        touched_episodes |= episode_diff.touched
+        summary["episodes"] = episode_diff.summary()
+    
+    if "clauses" in changed:
+        clause_agent.reload(clauses, conflict_types)
+        db.upsert_clauses(
+            [new_by_id[i] for i in clause_diff.added + clause_diff.changed], clause_diff.removed,
+            hashlib.sha1(changed["clauses"]).hexdigest()
+        )
+        touched_clauses = clause_diff.touched
+        summary["clauses"] = clause_diff.summary()
+    
+    affected = touched_episodes | {
+        e["episode_id"] for e in db.get_all_episodes() if e["conflict_type"] in conflict_types
+    }
+    snapshot = snapshot.without(affected)
+    if narrative_agent.cache is not None:
+        version = (
+            NarrativeCache.content_version(changed["clauses"]) if "clauses" in changed
+            else narrative_agent.cache.clauses_version
+        )
+        summary["narratives_dropped"] = narrative_agent.cache.on_corpus_change(
+            version, affected, touched_clauses
+        )
+    summary["episodes_affected"] = sorted(affected)
+    responses.set_version(corpus_version("data"))
+    last_reload = summary
+    print(f"✅ Corpus reloaded: {summary}")
+
+
+# CORPUS_RELOAD_INTERVAL=0 disables polling
+corpus_watcher = CorpusWatcher(
+    {"clauses": "data/clauses.json", "episodes": "data/episodes.json"},
+    apply_corpus_change,
+    config.CORPUS_RELOAD_INTERVAL
+)
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run CPU-bound work on the default thread pool, keeping the request's timing spans"""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(None, ctx.run, functools.partial(fn, *args, **kwargs))
 
 
 class SimulateRequest(BaseModel):
@@ -31,6 +152,16 @@ class SimulateRequest(BaseModel):
     mode: str = "all"  # "all", "vc_win", "founder_win", "winwin"
 
 
+class MonteCarloRequest(BaseModel):
+    episode_id: str
+    samples: int = Field(100_000, ge=1, le=config.MONTE_CARLO_MAX_SAMPLES)
+    seed: int = 0
+    vc_leverage: float = Field(0.5, gt=0, lt=1)  # mean VC bargaining power
+    exit_median_musd: float = Field(50.0, gt=0)
+    exit_sigma: float = Field(1.0, ge=0, le=3)
+    invested_musd: float = Field(10.0, ge=0)
+
+
 class SimulateResponse(BaseModel):
     episode: dict
     scenarios: dict
@@ -41,30 +172,62 @@ class SimulateResponse(BaseModel):
 async def startup_event():
     """Load data on startup"""
     try:
-        db.load_episodes("data/episodes.json")
-        db.load_clauses("data/clauses.json")
+        for table, path in (("episodes", "data/episodes.json"), ("clauses", "data/clauses.json")):
+            stats = (db.load_episodes if table == "episodes" else db.load_clauses)(path)
+            if stats["skipped"]:
+                print(f"   {table}: unchanged, skipped reload")
+            else:
+                print(f"   {table}: {stats['rows']} rows in {stats['seconds']}s ({stats['rows_per_sec']} rows/s)")
         print("✅ Data loaded successfully")
     except Exception as e:
         print(f"⚠️  Warning: Could not load data - {e}")
         import traceback
         traceback.print_exc()
+    corpus_watcher.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush queued simulation history before exit"""
+    corpus_watcher.stop()
+    flushed = simulation_writer.close()
+    negotiation_simulator.close()
+    if flushed:
+        db.close()  # else the writer still uses it; process exit releases it
 
 
 @app.get("/")
-async def root():
+async def root(if_none_match: Optional[str] = Header(None)):
     """Health check"""
-    return {
+    return CachedBody.json({
         "app": config.APP_NAME,
         "version": config.APP_VERSION,
-        "status": "running"
-    }
+        "status": "running",
+        "narrative_cache": narrative_agent.cache.stats(),
+        "narrative_single_flight": narrative_agent.flight_stats(),
+        "llm_limits": scheduler.stats(),
+        "snapshot_episodes": len(snapshot),
+        "simulation_writer": simulation_writer.stats(),
+        "corpus_reload": {**corpus_watcher.stats(), "last": last_reload},
+        "http_cache": responses.stats()
+    }).response(if_none_match, REVALIDATE)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus histograms for request stages and routes (this process only)"""
+    return PlainTextResponse(timing.render_prometheus(), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/episodes")
-async def list_episodes():
+async def list_episodes(if_none_match: Optional[str] = Header(None)):
     """List all available episodes"""
-    episodes = db.get_all_episodes()
-    return {"episodes": episodes}
+    version = responses.version
+    cached = responses.get("episodes")
+    if cached is None:
+        episodes = await db.aget_all_episodes()
+        cached = responses.put("episodes", {"episodes": episodes}, version)
+    return cached.response(if_none_match, DATA_CACHE_CONTROL)
 
 
 @app.post("/simulate", response_model=SimulateResponse)
@@ -78,128 +241,123 @@ async def simulate(request: SimulateRequest):
     - Alignment scores
     """
     try:
-        # Fetch episode
-        episode = db.get_episode(request.episode_id)
-        if not episode:
-            raise HTTPException(status_code=404, detail="Episode not found")
-        
-        # Match clauses for all 3 scenarios
-        clause_sets = clause_agent.match_clauses(episode)
-        
-        # Generate narratives for each scenario
-        scenarios = {}
-        alignment_scores = {}
+        # Precomputed by precompute.py: a pure lookup, no LLM call (skipped when
+        # it only holds generic fallbacks and we could generate real narratives)
+        result = snapshot.simulation(request.episode_id)
+        if result is not None and config.ANTHROPIC_API_KEY and not snapshot.has_llm_narratives:
+            result = None
         
-        for scenario_type, clauses in clause_sets.items():
-            if not clauses:
-                scenarios[scenario_type] = {
-                    "clauses": [],
-                    "narrative": "No clauses available for this scenario.",
-                    "clause_details": []
-                }
-                alignment_scores[scenario_type] = {
-                    "vc": 50,
-                    "founder": 50,
-                    "balance": 50
-                }
-                continue
+        if result is None:
+            # Fetch episode
+            episode = await db.aget_episode(request.episode_id)
+            if not episode:
+                raise HTTPException(status_code=404, detail="Episode not found")
             
-            # Generate narrative
-            narrative = narrative_agent.summarize_scenario(
-                episode, clauses, scenario_type
-            )
-            
-            # Calculate alignment scores
-            vc_score = clause_agent.get_alignment_score(clauses, "vc")
-            founder_score = clause_agent.get_alignment_score(clauses, "founder")
-            balance_score = clause_agent.get_alignment_score(clauses, "neutral")
+            # Match clauses for all 3 scenarios
+            clause_sets = clause_agent.match_clauses(episode)
             
-            scenarios[scenario_type] = {
-                "clauses": clauses,  # Return full clause objects, not just short_text
-                "narrative": narrative,
-                "clause_details": clauses
-            }
+            # Generate narratives for all scenarios concurrently (one LLM latency)
+            narratives = await narrative_agent.summarize_scenarios(episode, clause_sets)
             
-            alignment_scores[scenario_type] = {
-                "vc": vc_score,
-                "founder": founder_score,
-                "balance": balance_score
-            }
-            
-            # Save to database for portfolio
-            db.save_simulation(
-                request.episode_id,
-                scenario_type,
-                clauses,
-                narrative,
-                alignment_scores[scenario_type]
+            result = assemble_simulation(
+                episode, clause_sets, narratives, clause_agent.get_alignment_score
             )
         
-        return SimulateResponse(
-            episode=episode,
-            scenarios=scenarios,
-            alignment_scores=alignment_scores
-        )
+        # Save to database for portfolio (write-behind, not on the request path)
+        for scenario_type, scenario in result["scenarios"].items():
+            if scenario["clauses"]:
+                simulation_writer.submit(
+                    request.episode_id,
+                    scenario_type,
+                    scenario["clauses"],
+                    scenario["narrative"],
+                    result["alignment_scores"][scenario_type]
+                )
+        
+        return SimulateResponse(**result)
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/export/{episode_id}")
-async def export_simulation(episode_id: str):
+@app.post("/simulate/monte-carlo")
+async def simulate_monte_carlo(request: MonteCarloRequest):
     """
-    Export simulation as markdown for portfolio/resume use
+    Stochastic negotiation mode: sample outcomes over every clause matched for
+    the episode's conflict type and return distribution summaries (win
+    probabilities, expected alignment, payoff percentiles, clause acceptance)
     """
-    episode = db.get_episode(episode_id)
+    episode = await db.aget_episode(request.episode_id)
     if not episode:
         raise HTTPException(status_code=404, detail="Episode not found")
     
-    # Generate fresh simulation
     clause_sets = clause_agent.match_clauses(episode)
+    clauses = [c for scenario in clause_sets.values() for c in scenario]
+    if not clauses:
+        raise HTTPException(status_code=404, detail="No clauses for this conflict type")
     
-    markdown = f"""# Pied Piper Legal Simulator
-
-## Episode: {episode['title']} ({episode['episode_id']})
-
-**Conflict:** {episode['conflict_type']}  
-**Scene:** {episode['scene']}  
-**Legal Stakes:** {episode['legal_stakes']}
+    # CPU-bound NumPy work (or a wait on the process pool) stays off the event loop
+    params = request.model_dump(exclude={"episode_id"})
+    result = await run_blocking(negotiation_simulator.simulate, clauses, **params)
+    return {
+        "episode_id": request.episode_id,
+        "conflict_type": episode.get("conflict_type"),
+        **result
+    }
 
----
 
-"""
+@app.get("/packages/{episode_id}")
+async def clause_packages(episode_id: str, top: int = Query(5, ge=1, le=50)):
+    """
+    Mixed clause packages for an episode's conflict type
     
-    scenario_names = {
-        "vc_win": "💰 VC WIN",
-        "founder_win": "💡 FOUNDER WIN",
-        "winwin": "🤝 WIN-WIN"
+    Returns the Pareto frontier of VC vs founder alignment over packages of
+    one clause per clause_type, plus the `top` most balanced packages
+    """
+    episode = await db.aget_episode(episode_id)
+    if not episode:
+        raise HTTPException(status_code=404, detail="Episode not found")
+    
+    # the package search is CPU-bound (seconds on large clause spaces)
+    packages = await run_blocking(clause_agent.optimize_packages, episode, top)
+    return {
+        "episode_id": episode_id,
+        "conflict_type": episode.get("conflict_type"),
+        **packages
     }
+
+
+@app.get("/export/{episode_id}")
+async def export_simulation(episode_id: str, if_none_match: Optional[str] = Header(None)):
+    """
+    Export simulation as markdown for portfolio/resume use
+    """
+    version = responses.version
+    cached = responses.get(("export", episode_id))
+    if cached is not None:
+        return cached.response(if_none_match, DATA_CACHE_CONTROL)
     
-    for scenario_type, clauses in clause_sets.items():
-        markdown += f"### {scenario_names.get(scenario_type)}\n\n"
-        
-        if clauses:
-            for clause in clauses:
-                markdown += f"- **{clause['clause_type']}:** {clause['short_text']}\n"
-                markdown += f"  - {clause['explanation']}\n"
-                markdown += f"  - Risk (Founder): {clause['risk_score_founder']}% | Risk (VC): {clause['risk_score_vc']}%\n\n"
-            
-            # Add alignment scores
-            vc_score = clause_agent.get_alignment_score(clauses, "vc")
-            founder_score = clause_agent.get_alignment_score(clauses, "founder")
-            balance_score = clause_agent.get_alignment_score(clauses, "neutral")
-            
-            markdown += f"**Alignment:** VC: {vc_score}% | Founder: {founder_score}% | Balance: {balance_score}%\n\n"
-        else:
-            markdown += "*No clauses available*\n\n"
+    markdown = snapshot.export(episode_id)
+    if markdown is None:
+        episode = await db.aget_episode(episode_id)
+        if not episode:
+            raise HTTPException(status_code=404, detail="Episode not found")
         
-        markdown += "---\n\n"
+        # Generate fresh simulation
+        clause_sets = clause_agent.match_clauses(episode)
+        markdown = render_export_markdown(episode, clause_sets, clause_agent.get_alignment_score)
     
-    return {"markdown": markdown}
+    cached = responses.put(("export", episode_id), {"markdown": markdown}, version)
+    return cached.response(if_none_match, DATA_CACHE_CONTROL)
 
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
+    # Monte Carlo workers are spawned and only run simulate_batches from
+    # src.agents.negotiation_simulator; with no __main__ file to re-run they
+    # don't repeat the setup above (and DuckDB's file lock) as __mp_main__
+    del sys.modules["__main__"].__file__
     uvicorn.run(app, host="0.0.0.0", port=8000)
 
@@ -0,0 +1,83 @@
+"""
+Prefix suggestions for the advisor search box (GET /api/suggest).
+
+Suggestions are clause types ("Liquidation Preference"), the terms used in
+clause short texts ("participating") and Silicon Valley episode titles. Each
+phrase is filed under every word it contains, in one sorted key array, so
+"pref" finds "Liquidation Preference" and a lookup is two bisects plus a
+top-k over the matching slice. Ranked by how many clauses use the phrase.
+
+Picking a suggestion sends a canonical query, which tends to hit the answer
+cache instead of starting a new generation.
+"""
+from __future__ import annotations
+
+import functools
+import heapq
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Iterable, Mapping
+
+from retrieval import tokenize
+
+# short_text words too common to be worth suggesting
+STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have if in into is it its may must no "
+    "not of on or over per than that the their this to up upon was when with without".split()
+)
+
+
+class PrefixIndex:
+    """Sorted (word-start key, entry) array over weighted phrases."""
+
+    def __init__(self, entries: Iterable[tuple[str, str, int]], cache_size: int = 4096):
+        self.entries: list[tuple[str, str, int]] = []  # (text, kind, weight)
+        keyed: list[tuple[str, int]] = []
+        for text, kind, weight in entries:
+            words = tokenize(text)
+            if not words:
+                continue
+            eid = len(self.entries)
+            self.entries.append((text, kind, weight))
+            keyed.extend((" ".join(words[i:]), eid) for i in range(len(words)))
+        keyed.sort()
+        self.keys = [k for k, _ in keyed]
+        self.ids = [eid for _, eid in keyed]
+        self.suggest = functools.lru_cache(maxsize=cache_size)(self._suggest)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _suggest(self, prefix: str, limit: int = 8) -> tuple[dict[str, Any], ...]:
+        """Top `limit` entries with a word starting with `prefix` (most used first)."""
+        p = " ".join(tokenize(prefix))
+        if prefix[-1:].isspace() and p:
+            p += " "  # "board " wants the next word, not "boards"
+        if not p:
+            return ()
+        lo = bisect_left(self.keys, p)
+        hi = bisect_left(self.keys, p + "\uffff", lo)
+        matched = set(self.ids[lo:hi])
+        top = heapq.nsmallest(limit, matched, key=lambda e: (
+            -self.entries[e][2], len(self.entries[e][0]), self.entries[e][0]))
+        return tuple({"text": self.entries[e][0], "kind": self.entries[e][1], "count": self.entries[e][2]}
+                     for e in top)
+
+
+def build_index(clauses: Iterable[Mapping[str, Any]], episodes: Iterable[Mapping[str, Any]]) -> PrefixIndex:
+    """Clause types (per clause), short-text terms (per clause) and episode titles."""
+    types: Counter[str] = Counter()
+    terms: Counter[str] = Counter()
+    for c in clauses:
+        # compound types ("IP Assignment + Indemnification") count for each part
+        for part in str(c.get("clause_type") or "").split("+"):
+            if part.strip():
+                types[part.strip()] += 1
+        terms.update({t for t in tokenize(str(c.get("short_text") or ""))
+                      if len(t) > 2 and t.isalpha() and t not in STOPWORDS})
+    titles = Counter(str(e["title"]) for e in episodes if e.get("title"))
+    return PrefixIndex(
+        [(t, "clause_type", n) for t, n in types.items()]
+        + [(t, "term", n) for t, n in terms.items()]
+        + [(t, "episode", n) for t, n in titles.items()]
+    )
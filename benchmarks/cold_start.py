@@ -0,0 +1,101 @@
+"""
+Import-to-first-response time of api/index.py in fresh interpreters (Vercel cold starts).
+
+    python benchmarks/cold_start.py [--runs 7] [--out file.json]
+
+Each run is a new process that imports api/index.py and serves one /simulate
+through the ASGI transport. Variants: corpus from JSON vs from data/corpus.bundle
+(built into a temporary copy of data/ here), with and without ANTHROPIC_API_KEY.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any
+
+import harness
+
+CHILD = r"""
+import asyncio, importlib.util, json, sys, time
+import httpx  # the driver's own import is not part of the cold start
+t0 = time.perf_counter()
+spec = importlib.util.spec_from_file_location("vercel_index", sys.argv[1])
+m = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(m)
+t1 = time.perf_counter()
+async def first():
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=m.app), base_url="http://x") as c:
+        r = await c.post("/simulate", json={"episode_id": "S02E04"})
+        assert r.status_code == 200, r.text
+asyncio.run(first())
+t2 = time.perf_counter()
+print(json.dumps({"import_s": t1 - t0, "first_response_s": t2 - t0, "corpus": getattr(m, "STARTUP", {}).get("corpus_source", "json")}))
+"""
+
+
+def stage_tree(tmp: Path, bundle: bool) -> Path | None:
+    """Copy api/, src/ and data/ (minus stray bundles) so variants don't touch the checkout.
+
+    None for the bundle variant on commits that predate CorpusBundle.
+    """
+    root = tmp / ("bundle" if bundle else "json")
+    for d in ("api", "src", "data"):
+        shutil.copytree(harness.ROOT / d, root / d,
+                        ignore=shutil.ignore_patterns("__pycache__", "corpus.bundle*", "*.duckdb*"))
+    if bundle:
+        sys.path.insert(0, str(root))
+        try:
+            from src.corpus import CorpusBundle, Snapshot
+        except ImportError:
+            return None
+        finally:
+            sys.path.remove(str(root))
+        data = root / "data"
+        CorpusBundle.build(data, Snapshot.load(data / "snapshot.json", data)).write(data / "corpus.bundle")
+    return root / "api" / "index.py"
+
+
+def run_variant(index_py: Path, api_key: bool, runs: int) -> dict[str, Any]:
+    env = {k: v for k, v in os.environ.items() if k != "ANTHROPIC_API_KEY"}
+    if api_key:
+        env["ANTHROPIC_API_KEY"] = "sk-ant-cold-start-bench"
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", CHILD, str(index_py)], env=env,
+                             capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+    return {
+        "corpus": samples[0]["corpus"],
+        "import": harness.percentiles([s["import_s"] for s in samples]),
+        "first_response": harness.percentiles([s["first_response_s"] for s in samples]),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="api/index.py cold-start benchmark")
+    ap.add_argument("--runs", type=int, default=7)
+    ap.add_argument("--out", help="results file (default benchmarks/results/cold_start-<commit>.json)")
+    args = ap.parse_args()
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="cold-") as tmp:
+        for bundle in (False, True):
+            index_py = stage_tree(Path(tmp), bundle)
+            if index_py is None:
+                continue
+            for api_key in (False, True):
+                name = f"{'bundle' if bundle else 'json'}{'+api_key' if api_key else ''}"
+                r = results[name] = run_variant(index_py, api_key, args.runs)
+                print(f"{name:<16} import p50 {r['import']['p50_ms']:>8.1f} ms   "
+                      f"first response p50 {r['first_response']['p50_ms']:>8.1f} ms  "
+                      f"p99 {r['first_response']['p99_ms']:>8.1f} ms", flush=True)
+    print(f"saved {harness.save('cold_start', results, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
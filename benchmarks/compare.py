@@ -0,0 +1,87 @@
+"""
+Diff two benchmark result files (micro.py / load.py) metric by metric.
+
+    python benchmarks/compare.py results/load-abc1234.json results/load-def5678.json
+                                 [--threshold 10] [--all] [--fail]
+
+Latencies (*_ms, *_s, seconds) are better lower, throughputs (rps, rows_per_sec)
+better higher; counts and config values are skipped. A change past --threshold
+percent in the worse direction is a regression; --fail exits 1 if there is any.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Iterator
+
+HIGHER_IS_BETTER = ("rps", "rows_per_sec")
+LOWER_IS_BETTER = ("_ms", "_s", "seconds")
+
+
+def direction(key: str) -> int:
+    """+1 if higher is better, -1 if lower is better, 0 if not a performance metric."""
+    if key.endswith(HIGHER_IS_BETTER):
+        return 1
+    if key.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def leaves(node: Any, path: tuple[str, ...] = ()) -> Iterator[tuple[tuple[str, ...], float]]:
+    if isinstance(node, dict):
+        for k, v in node.items():
+            yield from leaves(v, path + (str(k),))
+    elif isinstance(node, list):
+        for i, v in enumerate(node):
+            # load.py runs are lists, one per concurrency level
+            label = f"c={v['concurrency']}" if isinstance(v, dict) and "concurrency" in v else str(i)
+            yield from leaves(v, path + (label,))
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        yield path, float(node)
+
+
+def compare(old: dict[str, Any], new: dict[str, Any], threshold: float
+            ) -> list[tuple[str, float, float, float, str]]:
+    before = dict(leaves(old.get("results", old)))
+    rows = []
+    for path, value in leaves(new.get("results", new)):
+        sign = direction(path[-1])
+        if not sign or path not in before or "config" in path:
+            continue
+        base = before[path]
+        if base == 0:
+            continue
+        change = (value - base) / base * 100
+        worse = -change * sign
+        verdict = "REGRESSION" if worse > threshold else "improved" if worse < -threshold else ""
+        rows.append(("/".join(path), base, value, change, verdict))
+    return rows
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="compare two benchmark result files")
+    ap.add_argument("old")
+    ap.add_argument("new")
+    ap.add_argument("--threshold", type=float, default=10.0, help="percent change to flag")
+    ap.add_argument("--all", action="store_true", help="also list unflagged metrics")
+    ap.add_argument("--fail", action="store_true", help="exit 1 on any regression")
+    args = ap.parse_args()
+    old, new = (json.loads(Path(p).read_text()) for p in (args.old, args.new))
+    print(f"{old.get('env', {}).get('commit', '?')} -> {new.get('env', {}).get('commit', '?')}")
+
+    rows = compare(old, new, args.threshold)
+    width = max((len(r[0]) for r in rows), default=10)
+    for name, base, value, change, verdict in rows:
+        if verdict or args.all:
+            print(f"{name:<{width}}  {base:>12.4f} -> {value:>12.4f}  {change:>+8.1f}%  {verdict}")
+    regressions = sum(r[4] == "REGRESSION" for r in rows)
+    print(f"{len(rows)} metrics compared, {regressions} regressions "
+          f"(threshold {args.threshold:g}%)")
+    if args.fail and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
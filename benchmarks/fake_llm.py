@@ -0,0 +1,160 @@
+"""
+Local fake LLM backend for load tests: real HTTP, tunable latency, no tokens spent.
+
+    python benchmarks/fake_llm.py --port 8765 --latency-ms 400 --jitter-ms 100
+
+  POST /v1/messages      Anthropic Messages API shape (point ANTHROPIC_BASE_URL here)
+  POST /gemini/generate  {"prompt", "stream"} -> {"text"} or newline-delimited chunks
+  GET  /stats            calls per backend
+
+Vertex AI has no base-URL override for GenerativeModel, so FakeGeminiModel stands
+in for advisor's GenerativeModel and makes the same blocking call over HTTP to
+this server.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+from typing import Any, Iterator
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+TEXT = ("Under [{cid}] the VC gets downside protection while founder control narrows; "
+        "fund returns tilt favorable to the VC. Think of Raviga at the board table.")
+
+
+class FakeBackend:
+    def __init__(self, latency_ms: float = 300, jitter_ms: float = 50, stream_chunks: int = 8,
+                 seed: int = 1):
+        self.latency = latency_ms / 1e3
+        self.jitter = jitter_ms / 1e3
+        self.stream_chunks = max(1, stream_chunks)
+        self.calls = {"anthropic": 0, "gemini": 0}
+        self._rng = random.Random(seed)
+        self.app = self._build()
+
+    def delay(self) -> float:
+        return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+    def _build(self) -> FastAPI:
+        app = FastAPI(title="fake-llm")
+
+        @app.post("/v1/messages")
+        async def messages(req: Request):
+            body = await req.json()
+            self.calls["anthropic"] += 1
+            await asyncio.sleep(self.delay())
+            return {
+                "id": f"msg_fake_{self.calls['anthropic']}", "type": "message", "role": "assistant",
+                "model": body.get("model", "fake"), "stop_reason": "end_turn", "stop_sequence": None,
+                "content": [{"type": "text", "text": TEXT.format(cid="fake")}],
+                "usage": {"input_tokens": len(json.dumps(body)) // 4, "output_tokens": 40},
+            }
+
+        @app.post("/gemini/generate")
+        async def generate(req: Request):
+            body = await req.json()
+            self.calls["gemini"] += 1
+            text = TEXT.format(cid="LP01")
+            if not body.get("stream"):
+                await asyncio.sleep(self.delay())
+                return {"text": text}
+
+            async def chunks():
+                step = self.delay() / self.stream_chunks
+                size = max(1, len(text) // self.stream_chunks)
+                for i in range(0, len(text), size):
+                    await asyncio.sleep(step)
+                    yield json.dumps({"text": text[i:i + size]}) + "\n"
+            return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+        @app.get("/stats")
+        async def stats():
+            return self.calls
+
+        return app
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class FakeServer:
+    """Runs a FakeBackend with uvicorn on a background thread."""
+
+    def __init__(self, backend: FakeBackend, port: int | None = None):
+        self.backend = backend
+        self.port = port or _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._server = uvicorn.Server(uvicorn.Config(
+            backend.app, host="127.0.0.1", port=self.port, log_level="warning", access_log=False))
+        self._thread = threading.Thread(target=self._server.run, name="fake-llm", daemon=True)
+
+    def __enter__(self) -> "FakeServer":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("fake LLM server did not start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+class _Chunk:
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """The slice of vertexai GenerativeModel that advisor uses, backed by FakeServer."""
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        self._client = httpx.Client(base_url=url, timeout=timeout)
+
+    def count_tokens(self, _text: str) -> dict[str, int]:
+        return {"total_tokens": 1}
+
+    def generate_content(self, prompt: str, generation_config: Any = None,
+                         stream: bool = False) -> Any:
+        if not stream:
+            r = self._client.post("/gemini/generate", json={"prompt": prompt})
+            r.raise_for_status()
+            return _Chunk(r.json()["text"])
+        return self._stream(prompt)
+
+    def _stream(self, prompt: str) -> Iterator[_Chunk]:
+        with self._client.stream("POST", "/gemini/generate", json={"prompt": prompt, "stream": True}) as r:
+            r.raise_for_status()
+            for line in r.iter_lines():
+                if line:
+                    yield _Chunk(json.loads(line)["text"])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="fake Gemini/Anthropic backend")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency-ms", type=float, default=300)
+    ap.add_argument("--jitter-ms", type=float, default=50)
+    args = ap.parse_args()
+    backend = FakeBackend(args.latency_ms, args.jitter_ms)
+    uvicorn.run(backend.app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Shared helpers for the benchmark scripts: synthetic corpora, latency percentiles
+and JSON results stamped with the commit they were measured on.
+
+Results land in benchmarks/results/<suite>-<commit>.json by default; diff two of
+them with `python benchmarks/compare.py old.json new.json`.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS = Path(__file__).resolve().parent / "results"
+DATA = ROOT / "data"
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+def real_clauses() -> list[dict[str, Any]]:
+    return json.loads((DATA / "clauses.json").read_text())
+
+
+def real_episodes() -> list[dict[str, Any]]:
+    return json.loads((DATA / "episodes.json").read_text())
+
+
+def synthetic_clauses(n: int, seed: int = 7) -> list[dict[str, Any]]:
+    """
+    n clauses cloned from the real library: ids suffixed, two vocabulary words
+    appended to the short text, risk scores jittered. Conflict types fan out as
+    "<type>~<k>" so bucket sizes (clauses per conflict/bias) stay close to the
+    real corpus while the number of buckets grows with n.
+    """
+    base = real_clauses()
+    rng = random.Random(seed)
+    vocab = sorted({w for c in base for w in c["short_text"].lower().split() if w.isalpha()})
+    out = []
+    for i in range(n):
+        c = dict(base[i % len(base)])
+        k = i // len(base)
+        c["clause_id"] = f"{c['clause_id']}-{i}"
+        if k:
+            c["conflict_type"] = f"{c['conflict_type']}~{k}"
+        c["short_text"] = f"{c['short_text']} {rng.choice(vocab)} {rng.choice(vocab)}"
+        c["risk_score_founder"] = min(100, max(0, c["risk_score_founder"] + rng.randint(-5, 5)))
+        c["risk_score_vc"] = min(100, max(0, c["risk_score_vc"] + rng.randint(-5, 5)))
+        out.append(c)
+    return out
+
+
+def percentiles(samples_s: list[float]) -> dict[str, float]:
+    """mean/p50/p95/p99/max in milliseconds (nearest rank)."""
+    if not samples_s:
+        return {"n": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    s = sorted(samples_s)
+
+    def rank(p: float) -> float:
+        return s[max(0, math.ceil(p / 100 * len(s)) - 1)]
+
+    return {
+        "n": len(s),
+        "mean_ms": round(sum(s) / len(s) * 1e3, 4),
+        "p50_ms": round(rank(50) * 1e3, 4),
+        "p95_ms": round(rank(95) * 1e3, 4),
+        "p99_ms": round(rank(99) * 1e3, 4),
+        "max_ms": round(s[-1] * 1e3, 4),
+    }
+
+
+def measure(fn: Callable[[], Any], repeat: int, warmup: int = 3) -> dict[str, float]:
+    """Time fn() call by call; percentiles() of the samples."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return percentiles(samples)
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True,
+                              timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def environment() -> dict[str, Any]:
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD") or "unknown",
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "measured_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def save(suite: str, results: dict[str, Any], out: str | None = None) -> Path:
+    """Write {"suite", "env", "results"} to out (default results/<suite>-<commit>.json)."""
+    env = environment()
+    path = Path(out) if out else RESULTS / f"{suite}-{env['commit']}{'-dirty' if env['dirty'] else ''}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"suite": suite, "env": env, "results": results}, indent=2))
+    return path
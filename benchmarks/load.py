@@ -0,0 +1,186 @@
+"""
+In-process load driver for the three apps, with the LLMs replaced by a local fake server.
+
+    python benchmarks/load.py [--targets main,app,index] [--requests 400]
+                              [--concurrency 1,8,32] [--llm-latency-ms 300] [--unique]
+
+  main   main:app (advisor)      /api/advise, /api/advise/stream, /api/advise/batch
+  app    app:app (simulator)     /simulate, /episodes, /export/{id}
+  index  api/index.py:app        /simulate, /episodes, /export/{id}
+
+Requests go through httpx's ASGI transport (no sockets between driver and app);
+LLM calls go over real HTTP to benchmarks/fake_llm.py with the chosen latency.
+The simulator runs on a throwaway DuckDB file and ignores data/snapshot.json
+unless --snapshot is given. By default repeated questions hit the answer /
+narrative caches like production traffic would; --unique makes every advisor
+question distinct and turns the narrative cache off, so every request pays for
+generation (single-flight still coalesces identical in-flight ones).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib.util
+import itertools
+import os
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Callable
+
+import httpx
+
+import harness
+from fake_llm import FakeBackend, FakeGeminiModel, FakeServer
+from retrieval_modes import QUERIES
+
+Builder = Callable[[int], tuple[str, str, str, dict[str, Any]]]  # i -> (name, method, path, kwargs)
+
+
+def _episode_ids() -> list[str]:
+    return [e["episode_id"] for e in harness.real_episodes()]
+
+
+def simulator_workload() -> list[Builder]:
+    ids = _episode_ids()
+    simulate: Builder = lambda i: ("simulate", "POST", "/simulate", {"json": {"episode_id": ids[i % len(ids)]}})
+    export: Builder = lambda i: ("export", "GET", f"/export/{ids[i % len(ids)]}", {})
+    episodes: Builder = lambda i: ("episodes", "GET", "/episodes", {})
+    return [simulate] * 7 + [export] * 2 + [episodes]
+
+
+def advisor_workload(unique: bool) -> list[Builder]:
+    qs = [q for q, _ in QUERIES]
+
+    def q(i: int) -> str:
+        return f"{qs[i % len(qs)]} n{i}" if unique else qs[i % len(qs)]
+
+    advise: Builder = lambda i: ("advise", "GET", "/api/advise", {"params": {"q": q(i)}})
+    stream: Builder = lambda i: ("stream", "GET", "/api/advise/stream", {"params": {"q": q(i)}})
+    batch: Builder = lambda i: ("batch", "POST", "/api/advise/batch",
+                                {"json": {"clauses": [q(i + k) for k in range(5)]}})
+    return [advise] * 8 + [stream, batch]
+
+
+def load_main(llm_url: str, args: argparse.Namespace) -> tuple[Any, list[Builder], Callable[[], dict]]:
+    import advisor
+    import main
+    import scheduler
+
+    advisor._gen = (FakeGeminiModel(llm_url), None)  # what _generator() would have built
+    return main.app, advisor_workload(args.unique), scheduler.stats
+
+
+def load_app(llm_url: str, args: argparse.Namespace, tmp: Path) -> tuple[Any, list[Builder], Callable[[], dict]]:
+    os.chdir(harness.ROOT)  # app.py opens data/*.json relative to the working directory
+    os.environ["ANTHROPIC_API_KEY"] = "fake-key"
+    os.environ["ANTHROPIC_BASE_URL"] = llm_url
+    import config
+
+    config.ANTHROPIC_API_KEY = "fake-key"
+    config.DUCKDB_PATH = str(tmp / "load.duckdb")
+    if not args.snapshot:
+        config.SNAPSHOT_PATH = str(tmp / "no-snapshot.json")
+    import app as simulator
+    import scheduler
+
+    if args.unique:
+        simulator.narrative_agent.cache = None
+    return simulator.app, simulator_workload(), scheduler.stats
+
+
+def load_index() -> tuple[Any, list[Builder], Callable[[], dict]]:
+    spec = importlib.util.spec_from_file_location("vercel_index", harness.ROOT / "api" / "index.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app, simulator_workload(), dict
+
+
+async def drive(client: httpx.AsyncClient, builders: list[Builder], total: int,
+                concurrency: int) -> dict[str, Any]:
+    counter = itertools.count()
+    latencies: dict[str, list[float]] = defaultdict(list)
+    statuses: Counter = Counter()
+
+    async def worker() -> None:
+        while (i := next(counter)) < total:
+            name, method, path, kwargs = builders[i % len(builders)](i)
+            t0 = time.perf_counter()
+            try:
+                r = await client.request(method, path, **kwargs)
+                status = str(r.status_code)
+            except Exception as exc:  # a crashed request is a data point, not a crash
+                status = type(exc).__name__
+            latencies[name].append(time.perf_counter() - t0)
+            statuses[status] += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - t0
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "wall_s": round(wall, 3),
+        "rps": round(total / wall, 1) if wall else 0.0,
+        "latency": harness.percentiles([s for v in latencies.values() for s in v]),
+        "by_endpoint": {k: harness.percentiles(v) for k, v in sorted(latencies.items())},
+        "statuses": dict(statuses),
+    }
+
+
+async def run_target(name: str, asgi_app: Any, builders: list[Builder], limits: Callable[[], dict],
+                     backend: FakeBackend, args: argparse.Namespace) -> list[dict[str, Any]]:
+    runs = []
+    transport = httpx.ASGITransport(app=asgi_app)
+    async with asgi_app.router.lifespan_context(asgi_app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                     timeout=args.timeout) as client:
+            for concurrency in args.concurrency:
+                calls = dict(backend.calls)
+                res = await drive(client, builders, args.requests, concurrency)
+                res["llm_calls"] = {k: v - calls[k] for k, v in backend.calls.items()}
+                res["llm_limits"] = limits()
+                runs.append(res)
+                lat = res["latency"]
+                print(f"{name:<6} c={concurrency:<4} {res['rps']:>8} req/s  p50 {lat['p50_ms']:>9.2f} ms  "
+                      f"p95 {lat['p95_ms']:>9.2f} ms  p99 {lat['p99_ms']:>9.2f} ms  "
+                      f"llm {sum(res['llm_calls'].values()):>4}  {res['statuses']}", flush=True)
+    return runs
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="in-process load test with a fake LLM backend")
+    ap.add_argument("--targets", default="main,app,index")
+    ap.add_argument("--requests", type=int, default=400, help="requests per concurrency level")
+    ap.add_argument("--concurrency", default="1,8,32",
+                    type=lambda s: [int(c) for c in s.split(",")])
+    ap.add_argument("--llm-latency-ms", type=float, default=300)
+    ap.add_argument("--llm-jitter-ms", type=float, default=50)
+    ap.add_argument("--unique", action="store_true", help="defeat answer/narrative caches")
+    ap.add_argument("--snapshot", action="store_true", help="let app:app serve data/snapshot.json")
+    ap.add_argument("--timeout", type=float, default=60)
+    ap.add_argument("--out", help="results file (default benchmarks/results/load-<commit>.json)")
+    args = ap.parse_args()
+
+    backend = FakeBackend(args.llm_latency_ms, args.llm_jitter_ms)
+    results: dict[str, Any] = {
+        "config": {k: v for k, v in vars(args).items() if k != "out"},
+        "targets": {},
+    }
+    with FakeServer(backend) as server, tempfile.TemporaryDirectory(prefix="load-") as tmp:
+        for name in args.targets.split(","):
+            if name == "main":
+                target = load_main(server.url, args)
+            elif name == "app":
+                target = load_app(server.url, args, Path(tmp))
+            elif name == "index":
+                target = load_index()
+            else:
+                raise SystemExit(f"unknown target {name!r} (main, app, index)")
+            results["targets"][name] = asyncio.run(run_target(name, *target, backend, args))
+    print(f"saved {harness.save('load', results, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
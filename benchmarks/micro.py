@@ -0,0 +1,254 @@
+"""
+Micro-benchmarks of the hot paths against the real corpus and synthetic 1k/10k/100k libraries.
+
+    python benchmarks/micro.py [--sizes real,1000,10000,100000] [--repeat 200] [--out file.json]
+
+Per corpus size:
+  retrieve   advisor._retrieve (BM25, plus semantic up to --semantic-max clauses),
+             misspelled queries with and without fuzzy expansion, hot reload of 10 edits,
+             /api/suggest prefix lookups (uncached)
+  match      ClauseMatchAgent.match_clauses, get_alignment_score (bucket hit / fresh list),
+             optimize_packages, NegotiationSimulator (100k samples, fresh seed each run)
+  export     render_export_markdown for one episode
+  duckdb     DBManager bulk load, get_episode, get_all_episodes, save_simulations,
+             narrative cache read/write (temporary database file)
+  store      clause_store.py: build, Python heap vs the JSON list, open, stored BM25
+             load, matching through StoreClauseIndex, row materialization, clause_id lookup
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+import harness
+from retrieval_modes import QUERIES, TYPO_QUERIES
+
+import advisor  # noqa: E402  (harness puts the repo root on sys.path)
+from clause_store import ClauseStore, build_from_json  # noqa: E402
+from src.agents import ClauseMatchAgent, NegotiationSimulator  # noqa: E402
+from src.corpus import StoreClauseIndex, render_export_markdown  # noqa: E402
+from src.database import DBManager  # noqa: E402
+
+
+@contextmanager
+def advisor_corpus(clauses: list[dict[str, Any]]) -> Iterator[float]:
+    """Point advisor's retrieval at another clause list; yields the BM25 build time (ms)."""
+    saved = advisor._CORPUS
+    t0 = time.perf_counter()
+    advisor._CORPUS = advisor.Corpus(clauses, saved.episodes)
+    try:
+        yield round((time.perf_counter() - t0) * 1e3, 2)
+    finally:
+        advisor._CORPUS = saved
+
+
+def bench_retrieve(clauses: list[dict[str, Any]], repeat: int, semantic_max: int) -> dict[str, Any]:
+    queries = [q for q, _ in QUERIES]
+    out: dict[str, Any] = {}
+    with advisor_corpus(clauses) as build_ms:
+        out["lexical_build_ms"] = build_ms
+        it = iter(range(1 << 62))
+        out["lexical"] = harness.measure(lambda: advisor._retrieve(queries[next(it) % len(queries)]), repeat)
+        out["lexical_batch22"] = harness.measure(lambda: advisor._retrieve_many(queries), max(10, repeat // 10))
+        typos = [q for q, _ in TYPO_QUERIES]
+        expander = advisor._CORPUS.expander
+        t0 = time.perf_counter()
+        for q in typos:
+            expander.expand(q)  # first sight of each typo: trigram candidates + edit distance
+        out["fuzzy_expand_cold_us"] = round((time.perf_counter() - t0) / len(typos) * 1e6, 2)
+        out["lexical_typos"] = harness.measure(lambda: advisor._retrieve(typos[next(it) % len(typos)]), repeat)
+        out["lexical_typos_raw"] = harness.measure(
+            lambda: advisor._retrieve(typos[next(it) % len(typos)], fuzzy=False), repeat)
+        t0 = time.perf_counter()
+        prefixes = advisor._CORPUS.prefixes()
+        out["suggest_build_ms"] = round((time.perf_counter() - t0) * 1e3, 2)
+        typed = ["b", "bo", "pref", "liq", "vest", "anti", "particip", "board "]
+        out["suggest"] = harness.measure(lambda: prefixes._suggest(typed[next(it) % len(typed)]), repeat)
+        if len(clauses) <= semantic_max:
+            t0 = time.perf_counter()
+            advisor.semantic_index()
+            out["semantic_build_ms"] = round((time.perf_counter() - t0) * 1e3, 2)
+            out["semantic"] = harness.measure(
+                lambda: advisor._retrieve(queries[next(it) % len(queries)], mode="semantic"), repeat)
+
+        # hot reload of 10 edited clauses: index update alone, then advisor.reload
+        # end to end (JSON parse + diff + update), vs lexical_build_ms for a rebuild
+        edited = list(clauses)
+        edited[:10] = [dict(c, short_text=c["short_text"] + " (amended)") for c in clauses[:10]]
+        t0 = time.perf_counter()
+        advisor._CORPUS.index.updated(dict(enumerate(clauses[:10])), dict(enumerate(edited[:10])))
+        out["bm25_update_10_ms"] = round((time.perf_counter() - t0) * 1e3, 2)
+        payload = json.dumps(edited).encode()
+        t0 = time.perf_counter()
+        advisor.reload({"clauses": payload})
+        out["reload_10_ms"] = round((time.perf_counter() - t0) * 1e3, 2)
+    return out
+
+
+def bench_match(path: Path, clauses: list[dict[str, Any]], episodes: list[dict[str, Any]],
+                repeat: int) -> dict[str, Any]:
+    t0 = time.perf_counter()
+    agent = ClauseMatchAgent(str(path))
+    build_ms = round((time.perf_counter() - t0) * 1e3, 2)
+    # real episodes hit the first block of conflict types; synthetic ones reach the rest
+    types = sorted({c["conflict_type"] for c in clauses})
+    eps = [{**episodes[i % len(episodes)], "conflict_type": types[i * 7919 % len(types)]}
+           for i in range(64)]
+    it = iter(range(1 << 62))
+    sets = agent.match_clauses(eps[0])
+    bucket = next((s for s in sets.values() if s), [])
+    fresh = list(bucket)
+    simulator = NegotiationSimulator(workers=0)
+    candidates = [c for s in sets.values() for c in s]
+    return {
+        "agent_build_ms": build_ms,
+        "match_clauses": harness.measure(lambda: agent.match_clauses(eps[next(it) % len(eps)]), repeat),
+        "alignment_bucket": harness.measure(lambda: agent.get_alignment_score(bucket, "vc"), repeat),
+        "alignment_fresh_list": harness.measure(lambda: agent.get_alignment_score(fresh, "vc"), repeat),
+        "optimize_packages": harness.measure(lambda: agent.optimize_packages(eps[next(it) % len(eps)]), repeat),
+        "monte_carlo_100k": harness.measure(
+            lambda: simulator.simulate(candidates, 100_000, seed=next(it)), max(5, repeat // 20), 1),
+        "export_markdown": harness.measure(
+            lambda: render_export_markdown(eps[0], agent.match_clauses(eps[0]), agent.get_alignment_score),
+            repeat),
+    }
+
+
+def bench_duckdb(tmp: Path, clauses_path: Path, n_clauses: int, repeat: int) -> dict[str, Any]:
+    db = DBManager(str(tmp / "bench.duckdb"), pool_size=2)
+    try:
+        episodes_path = str(harness.DATA / "episodes.json")
+        db.load_episodes(episodes_path)
+        load = db.load_clauses(str(clauses_path))
+        episode_ids = [e["episode_id"] for e in harness.real_episodes()]
+        it = iter(range(1 << 62))
+        records = [("S01E01", "vc_win", [{"clause_id": "X"}], "narrative " * 20,
+                    {"vc": 50, "founder": 50, "balance": 100})] * 1000
+        t0 = time.perf_counter()
+        db.save_simulations(records)
+        batch_s = time.perf_counter() - t0
+        db.save_cached_narrative("bench-key", "narrative", "v1")
+        return {
+            "load_clauses": {"rows": load["rows"], "seconds": load["seconds"],
+                             "rows_per_sec": load["rows_per_sec"]},
+            "reload_unchanged_ms": harness.measure(lambda: db.load_clauses(str(clauses_path)), 5, 0)["mean_ms"],
+            "get_episode": harness.measure(lambda: db.get_episode(episode_ids[next(it) % len(episode_ids)]), repeat),
+            "get_all_episodes": harness.measure(db.get_all_episodes, repeat),
+            "save_simulations_1000": {"seconds": round(batch_s, 4),
+                                      "rows_per_sec": int(len(records) / batch_s) if batch_s else 0},
+            "save_simulation": harness.measure(lambda: db.save_simulation(*records[0]), max(10, repeat // 4)),
+            "get_cached_narrative": harness.measure(lambda: db.get_cached_narrative("bench-key"), repeat),
+            "save_cached_narrative": harness.measure(
+                lambda: db.save_cached_narrative(f"k{next(it)}", "narrative", "v1"), max(10, repeat // 4)),
+            "clauses": n_clauses,
+        }
+    finally:
+        db.close()
+
+
+def heap_mb(load: Any) -> tuple[Any, float]:
+    """(load(), Python heap it retains in MiB)."""
+    tracemalloc.start()
+    obj = load()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, round(size / 2**20, 2)
+
+
+def bench_store(tmp: Path, clauses_path: Path, clauses: list[dict[str, Any]], repeat: int) -> dict[str, Any]:
+    t0 = time.perf_counter()
+    path = build_from_json(clauses_path, tmp / "clauses.store")
+    build_ms = round((time.perf_counter() - t0) * 1e3, 2)
+    _, json_mb = heap_mb(lambda: json.loads(clauses_path.read_text()))
+    t0 = time.perf_counter()
+    store, store_mb = heap_mb(lambda: ClauseStore.open_if_fresh(path, clauses_path))
+    open_ms = round((time.perf_counter() - t0) * 1e3, 2)
+    t0 = time.perf_counter()
+    _, bm25_mb = heap_mb(store.bm25)
+    bm25_ms = round((time.perf_counter() - t0) * 1e3, 2)
+    index = StoreClauseIndex(store)
+    types = sorted({c["conflict_type"] for c in clauses})
+    ids = [c["clause_id"] for c in clauses[:: max(1, len(clauses) // 64)]]
+    it = iter(range(1 << 62))
+    try:
+        return {
+            "build_ms": build_ms,
+            "file_mb": round(path.stat().st_size / 2**20, 2),
+            "json_list_heap_mb": json_mb,
+            "store_heap_mb": store_mb,
+            "open_ms": open_ms,
+            "bm25_load_ms": bm25_ms,
+            "bm25_heap_mb": bm25_mb,
+            "match_cold": harness.measure(
+                lambda: StoreClauseIndex(store, max_cached=0).match(types[next(it) % len(types)]), repeat),
+            "match_warm": harness.measure(lambda: index.match(types[0]), repeat),
+            "row": harness.measure(lambda: store[next(it) % len(store)], repeat),
+            "find": harness.measure(lambda: store.find(ids[next(it) % len(ids)]), repeat),
+        }
+    finally:
+        del index
+        store.close()
+
+
+def run(sizes: list[str], repeat: int, semantic_max: int, skip_db: bool) -> dict[str, Any]:
+    episodes = harness.real_episodes()
+    out: dict[str, Any] = {}
+    for size in sizes:
+        clauses = harness.real_clauses() if size == "real" else harness.synthetic_clauses(int(size))
+        with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+            path = Path(tmp) / "clauses.json"
+            path.write_text(json.dumps(clauses))
+            res = {
+                "clauses": len(clauses),
+                "retrieve": bench_retrieve(clauses, repeat, semantic_max),
+                "match": bench_match(path, clauses, episodes, repeat),
+            }
+            if not skip_db:
+                res["duckdb"] = bench_duckdb(Path(tmp), path, len(clauses), repeat)
+            res["store"] = bench_store(Path(tmp), path, clauses, repeat)
+        out[size] = res
+        print(summary_line(size, res), flush=True)
+    return out
+
+
+def summary_line(size: str, r: dict[str, Any]) -> str:
+    ret, m = r["retrieve"], r["match"]
+    parts = [
+        f"{size:>7} ({r['clauses']} clauses)",
+        f"retrieve p50 {ret['lexical']['p50_ms']:.4f} ms",
+        f"match p50 {m['match_clauses']['p50_ms']:.4f} ms",
+        f"export p50 {m['export_markdown']['p50_ms']:.4f} ms",
+    ]
+    if "semantic" in ret:
+        parts.insert(2, f"semantic p50 {ret['semantic']['p50_ms']:.4f} ms")
+    st = r["store"]
+    parts.append(f"heap {st['json_list_heap_mb']} MiB json vs {st['store_heap_mb']} MiB store")
+    if "duckdb" in r:
+        d = r["duckdb"]
+        parts += [f"load {d['load_clauses']['rows_per_sec']} rows/s",
+                  f"get_episode p50 {d['get_episode']['p50_ms']:.4f} ms"]
+    return " · ".join(parts)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="micro-benchmarks over real and synthetic corpora")
+    ap.add_argument("--sizes", default="real,1000,10000,100000",
+                    help="comma-separated: 'real' and/or clause counts")
+    ap.add_argument("--repeat", type=int, default=200)
+    ap.add_argument("--semantic-max", type=int, default=10000,
+                    help="skip the dense semantic index above this many clauses (n × 16 KiB)")
+    ap.add_argument("--skip-db", action="store_true", help="skip the DuckDB benchmarks")
+    ap.add_argument("--out", help="results file (default benchmarks/results/micro-<commit>.json)")
+    args = ap.parse_args()
+    res = run(args.sizes.split(","), args.repeat, args.semantic_max, args.skip_db)
+    print(f"saved {harness.save('micro', res, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
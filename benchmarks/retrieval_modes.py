@@ -0,0 +1,131 @@
+"""
+Recall / latency of the advisor's lexical (BM25) vs semantic (char n-gram) retrieval,
+each with and without fuzzy query expansion (fuzzy.py: shorthand + typo correction).
+
+    python benchmarks/retrieval_modes.py [--repeat 200] [--json out.json]
+
+QUERIES mimic analyst input: abbreviations, hyphenation and inflection variants
+that exact-token matching misses; TYPO_QUERIES are the same questions misspelled.
+A query counts as a hit@k when any of its expected clause_ids is in the top k.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import advisor  # noqa: E402
+
+QUERIES: list[tuple[str, set[str]]] = [
+    ("liquidation pref 2x", {"LP01"}),
+    ("2x pref", {"LP01"}),
+    ("participating liq pref capped", {"LP02"}),
+    ("antidilution full-ratchet", {"FT01"}),
+    ("weighted avg anti dilution", {"FT03"}),
+    ("vc majority board seats", {"BC01", "GC01"}),
+    ("dual class founder voting", {"BC02"}),
+    ("double trigger accel", {"FV03"}),
+    ("single-trigger acceleration vested", {"FV02", "CF03"}),
+    ("vesting cliff reset downround", {"FV01"}),
+    ("ip assignment indemnify", {"IP01", "TD01"}),
+    ("patent cooperation", {"IP03"}),
+    ("safe conversion seed", {"SF03"}),
+    ("earnout acquisition", {"AT01", "AT03"}),
+    ("clawback milestones", {"MF01"}),
+    ("exec comp performance bonus", {"EC01"}),
+    ("crisis insurance", {"CM03"}),
+    ("content moderation liability", {"PL01"}),
+    ("deadlock resolution board", {"GC03"}),
+    ("repurchase rights founder", {"CF01"}),
+    ("professional mgmt transition", {"SI03"}),
+    ("investor protections comprehensive", {"IR01"}),
+]
+
+TYPO_QUERIES: list[tuple[str, set[str]]] = [
+    ("liquidaton preferance 2x", {"LP01"}),
+    ("2x prefrence", {"LP01"}),
+    ("particpating liq pref capped", {"LP02"}),
+    ("anti dilutoin full-rachet", {"FT01"}),
+    ("wieghted avg anti dilution", {"FT03"}),
+    ("vc majorty board seats", {"BC01", "GC01"}),
+    ("dual clas founder votng", {"BC02"}),
+    ("doubel trigger accel", {"FV03"}),
+    ("singel-trigger accleration vested", {"FV02", "CF03"}),
+    ("vestng clif reset downround", {"FV01"}),
+    ("ip assignement indemnfy", {"IP01", "TD01"}),
+    ("patnet cooperaton", {"IP03"}),
+    ("safe convertion seed", {"SF03"}),
+    ("earnout aquisition", {"AT01", "AT03"}),
+    ("clawbak milestones", {"MF01"}),
+    ("exec comp perfomance bonus", {"EC01"}),
+    ("crisis insurence", {"CM03"}),
+    ("content moderaton liabilty", {"PL01"}),
+    ("deadlok resolution board", {"GC03"}),
+    ("repurchse rights founder", {"CF01"}),
+    ("profesional mgmt transtion", {"SI03"}),
+    ("investor protectons comprehensive", {"IR01"}),
+]
+SETS = {"clean": QUERIES, "typos": TYPO_QUERIES}
+
+
+def recall(queries: list[tuple[str, set[str]]], mode: str, fuzzy: bool, k: int) -> float:
+    hits = 0
+    for q, expected in queries:
+        got = {c["clause_id"] for c in advisor._retrieve(q, k, mode=mode, fuzzy=fuzzy)}
+        hits += bool(got & expected)
+    return hits / len(queries)
+
+
+def latency_us(fn, repeat: int, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / (repeat * n) * 1e6
+
+
+def run(repeat: int) -> dict:
+    t0 = time.perf_counter()
+    advisor.semantic_index()
+    build_ms = (time.perf_counter() - t0) * 1e3
+    out = {"queries": len(QUERIES), "semantic_build_ms": round(build_ms, 2), "modes": {}}
+    expander = advisor._CORPUS.expander
+    for name, queries in SETS.items():
+        qs = [q for q, _ in queries]
+        for mode in advisor.MODES:
+            for fuzzy in (False, True):
+                expander.correct.cache_clear()
+                cold_us = latency_us(lambda: [expander.expand(q) for q in qs], 1, len(qs))
+                out["modes"][f"{name}/{mode}{'+fuzzy' if fuzzy else ''}"] = {
+                    "recall@1": round(recall(queries, mode, fuzzy, 1), 3),
+                    "recall@3": round(recall(queries, mode, fuzzy, 3), 3),
+                    "us_per_query": round(latency_us(
+                        lambda: [advisor._retrieve(q, mode=mode, fuzzy=fuzzy) for q in qs], repeat, len(qs)), 2),
+                    "us_per_query_batched": round(latency_us(
+                        lambda: advisor._retrieve_many(qs, mode=mode, fuzzy=fuzzy), repeat, len(qs)), 2),
+                    # query rewriting alone, before the correction cache is warm
+                    **({"us_expand_uncached": round(cold_us, 2)} if fuzzy else {}),
+                }
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="lexical vs semantic (± fuzzy) retrieval benchmark")
+    ap.add_argument("--repeat", type=int, default=200)
+    ap.add_argument("--json", help="also write results to this file")
+    args = ap.parse_args()
+    res = run(args.repeat)
+    print(f"{len(QUERIES)} queries · semantic index built in {res['semantic_build_ms']} ms")
+    print(f"{'set/mode':<24}{'R@1':>7}{'R@3':>7}{'µs/q':>10}{'µs/q batch':>12}{'µs expand cold':>16}")
+    for mode, r in res["modes"].items():
+        print(f"{mode:<24}{r['recall@1']:>7}{r['recall@3']:>7}{r['us_per_query']:>10}"
+              f"{r['us_per_query_batched']:>12}{r.get('us_expand_uncached', ''):>16}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(res, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Small caches shared by the advisor and the simulator.
+
+TTLCache is an in-process LRU with per-entry expiry and hit/miss counters.
+PersistentCache puts a TTLCache in front of an optional SQLite file so entries
+survive restarts and are visible to every uvicorn worker on the host (SQLite,
+not DuckDB, because DuckDB takes a single-writer file lock per process).
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Hashable
+
+
+class TTLCache:
+    """Thread-safe LRU + TTL cache. ttl <= 0 means entries never expire."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600.0):
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = float(ttl)
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires, value = item
+                if not expires or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires = time.monotonic() + self.ttl if self.ttl > 0 else 0.0
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data), "maxsize": self.maxsize, "ttl": self.ttl,
+            "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class PersistentCache:
+    """TTLCache in front of an optional SQLite table of JSON values (str keys)."""
+
+    _PRUNE_EVERY = 256  # writes between expiry / size sweeps of the backing table
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 86400.0,
+        path: str | Path | None = None,
+        table: str = "cache",
+        max_rows: int = 100_000,
+    ):
+        self.memory = TTLCache(maxsize, ttl)
+        self.path = Path(path) if path else None
+        self.table = table
+        self.max_rows = max_rows
+        self.disk_hits = 0
+        self._writes = 0
+        self._local = threading.local()
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db().execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value TEXT, created_at REAL)"
+            )
+
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Any:
+        value = self.memory.get(key)
+        if value is not None or not self.path:
+            return value
+        try:
+            row = self._db().execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", [key]
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if not row or (self.memory.ttl > 0 and row[1] + self.memory.ttl < time.time()):
+            return None
+        value = json.loads(row[0])
+        self.disk_hits += 1
+        self.memory.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self.memory.set(key, value)
+        if not self.path:
+            return
+        try:
+            db = self._db()
+            db.execute(
+                f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?)",
+                [key, json.dumps(value), time.time()],
+            )
+            self._writes += 1
+            if self._writes % self._PRUNE_EVERY == 0:
+                self._prune(db)
+        except sqlite3.Error:
+            pass  # the backing file is best-effort; memory still holds the entry
+
+    def delete(self, key: str) -> None:
+        self.memory.pop(key)
+        if self.path:
+            try:
+                self._db().execute(f"DELETE FROM {self.table} WHERE key = ?", [key])
+            except sqlite3.Error:
+                pass
+
+    def _prune(self, db: sqlite3.Connection) -> None:
+        if self.memory.ttl > 0:
+            db.execute(f"DELETE FROM {self.table} WHERE created_at < ?",
+                       [time.time() - self.memory.ttl])
+        db.execute(
+            f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} "
+            "ORDER BY created_at DESC LIMIT -1 OFFSET ?)", [self.max_rows],
+        )
+
+    def stats(self) -> dict[str, Any]:
+        return {**self.memory.stats(), "disk_hits": self.disk_hits,
+                "backing": str(self.path) if self.path else None}
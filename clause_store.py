@@ -0,0 +1,345 @@
+"""
+Memory-mapped columnar clause store (stdlib only).
+
+A list of clause dicts costs every worker its own copy of every long string; at
+100k clauses that is gigabytes per process. Here the library is one read-only
+file that all workers mmap, so the OS page cache holds a single copy:
+
+  codes    conflict_type / bias / clause_type as small ints + a value dictionary
+  numbers  risk_score_founder / risk_score_vc as packed uint8 (int32 if out of range)
+  text     clause_id / short_text / full_text / explanation as one UTF-8 blob
+           per field plus offsets, decoded only for rows that are returned
+  buckets  row ids grouped by (conflict_type, bias) with risk-score totals, so
+           ClauseIndex-style matching and alignment scores need no scan
+  by_id    row ids sorted by clause_id, for binary-search lookup
+  bm25     the advisor's BM25 postings (sorted terms, then per term the row ids
+           and saturated weights), so opening the store builds no index on the heap,
+           plus the label words its typo correction may target (fuzzy.target_terms)
+
+ClauseStore behaves as a read-only Sequence of clause dicts (store[i], iteration),
+each row materialized on access, so code written for the JSON list keeps working.
+
+    python clause_store.py data/clauses.json data/clauses.store
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import Any, Iterator
+
+from fuzzy import target_terms
+from retrieval import FIELDS, BM25Index
+
+MAGIC = b"CLSTORE1"
+CODED = ("conflict_type", "bias", "clause_type")
+NUMERIC = ("risk_score_founder", "risk_score_vc")
+TEXT = ("clause_id", "short_text", "full_text", "explanation")
+FIELD_ORDER = ("clause_id", "conflict_type", "bias", "clause_type", "short_text",
+               "full_text", "explanation", "risk_score_founder", "risk_score_vc")
+
+
+def _code_type(n: int) -> str:
+    return "B" if n <= 0xFF else "H" if n <= 0xFFFF else "I"
+
+
+def _source_info(path: Path) -> dict[str, Any]:
+    st = path.stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+            "sha1": hashlib.sha1(path.read_bytes()).hexdigest()}
+
+
+class StoredPostings(Mapping):
+    """One term's posting list read from the store: {row: saturated weight}."""
+
+    __slots__ = ("rows", "weights")
+
+    def __init__(self, rows: memoryview, weights: memoryview):
+        self.rows, self.weights = rows, weights
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.rows)
+
+    def __getitem__(self, row: int) -> float:
+        j = bisect_left(self.rows, row)  # rows are ascending
+        if j < len(self.rows) and self.rows[j] == row:
+            return self.weights[j]
+        raise KeyError(row)
+
+    def items(self) -> Any:
+        return zip(self.rows, self.weights)
+
+
+class StoredIndex(Mapping):
+    """term -> StoredPostings over the store's bm25 section (only the terms are decoded)."""
+
+    def __init__(self, store: "ClauseStore", spec: dict[str, Any], col: Any):
+        offsets, blob = col(spec["terms"]["offsets"]), spec["terms"]["blob"]
+        self._term = {str(store._buf[blob + offsets[i]:blob + offsets[i + 1]], "utf-8"): i
+                      for i in range(len(offsets) - 1)}
+        self._bounds = col(spec["postings"])
+        self._rows = col(spec["rows"])
+        self._weights = col(spec["weights"])
+        self.views = (offsets, self._bounds, self._rows, self._weights)
+
+    def __len__(self) -> int:
+        return len(self._term)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._term)
+
+    def __getitem__(self, term: str) -> StoredPostings:
+        i = self._term[term]
+        lo, hi = self._bounds[i], self._bounds[i + 1]
+        return StoredPostings(self._rows[lo:hi], self._weights[lo:hi])
+
+
+class ClauseStore(Sequence):
+    """Read-only view over a clause store file; rows are decoded on access."""
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._mm)
+        if bytes(buf[:8]) != MAGIC:
+            raise ValueError(f"{path}: not a clause store")
+        meta_offset = int.from_bytes(buf[8:16], "little")
+        meta_len = int.from_bytes(buf[16:24], "little")
+        self.meta: dict[str, Any] = json.loads(bytes(buf[meta_offset:meta_offset + meta_len]))
+        if self.meta["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path}: built on a {self.meta['byteorder']}-endian machine")
+        self._n: int = self.meta["n"]
+
+        def col(spec: dict[str, Any]) -> memoryview:
+            size = array(spec["type"]).itemsize
+            return buf[spec["offset"]:spec["offset"] + spec["count"] * size].cast(spec["type"])
+
+        self.dicts: dict[str, list[str]] = self.meta["dicts"]
+        self.codes = {f: col(self.meta["columns"][f]) for f in CODED}
+        self.numbers = {f: col(self.meta["columns"][f]) for f in NUMERIC}
+        self._offsets = {f: col(self.meta["text"][f]["offsets"]) for f in TEXT}
+        self._blobs = {f: self.meta["text"][f]["blob"] for f in TEXT}
+        self._buf = buf
+        self._by_id = col(self.meta["by_id"])
+        self._bucket_rows = col(self.meta["buckets"]["rows"])
+        self._code_of = {f: {v: i for i, v in enumerate(self.dicts[f])} for f in ("conflict_type", "bias")}
+        # (conflict code, bias code) -> (start, end, founder risk total, vc risk total)
+        self._buckets = {(c, b): (s, e, tf, tv) for c, b, s, e, tf, tv in self.meta["buckets"]["table"]}
+        # stores built before the bm25 section leave the index to the caller
+        self._postings = StoredIndex(self, self.meta["bm25"], col) if "bm25" in self.meta else None
+
+    # -- Sequence of clause dicts ------------------------------------------------
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, i: int | slice) -> Any:
+        if isinstance(i, slice):
+            return [self.row(j) for j in range(*i.indices(self._n))]
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("clause row out of range")
+        return self.row(i)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        for i in range(self._n):
+            yield self.row(i)
+
+    def text(self, field: str, i: int) -> str:
+        off, blob = self._offsets[field], self._blobs[field]
+        return str(self._buf[blob + off[i]:blob + off[i + 1]], "utf-8")
+
+    def value(self, field: str, i: int) -> Any:
+        if field in self.codes:
+            return self.dicts[field][self.codes[field][i]]
+        if field in self.numbers:
+            return self.numbers[field][i]
+        return self.text(field, i)
+
+    def row(self, i: int, fields: tuple[str, ...] = FIELD_ORDER) -> dict[str, Any]:
+        """Materialize one clause (only the requested fields are decoded)."""
+        return {f: self.value(f, i) for f in fields}
+
+    def rows(self, indices: Any, fields: tuple[str, ...] = FIELD_ORDER) -> list[dict[str, Any]]:
+        return [self.row(i, fields) for i in indices]
+
+    # -- lookups -------------------------------------------------------------------
+    def find(self, clause_id: str) -> int | None:
+        """Row of a clause_id (binary search over the by_id permutation)."""
+        lo, hi = 0, self._n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.text("clause_id", self._by_id[mid]) < clause_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._n and self.text("clause_id", self._by_id[lo]) == clause_id:
+            return self._by_id[lo]
+        return None
+
+    def _bucket(self, conflict_type: str, bias: str) -> tuple[int, int, int, int] | None:
+        c = self._code_of["conflict_type"].get(conflict_type)
+        b = self._code_of["bias"].get(bias)
+        return None if c is None or b is None else self._buckets.get((c, b))
+
+    def bucket_rows(self, conflict_type: str, bias: str) -> memoryview:
+        """Rows with this (conflict_type, bias), in corpus order."""
+        bucket = self._bucket(conflict_type, bias)
+        return self._bucket_rows[bucket[0]:bucket[1]] if bucket else self._bucket_rows[0:0]
+
+    def bucket_totals(self, conflict_type: str, bias: str) -> tuple[int, int, int]:
+        """(count, founder risk total, vc risk total) without touching the rows."""
+        bucket = self._bucket(conflict_type, bias)
+        return (bucket[1] - bucket[0], bucket[2], bucket[3]) if bucket else (0, 0, 0)
+
+    def bm25(self) -> BM25Index | None:
+        """The BM25 index stored at build time (rows = positions), or None if absent.
+
+        Posting lists stay in the mapped file; only the vocabulary and the idf
+        table are built on the heap. None too when retrieval.FIELDS changed since.
+        """
+        if self._postings is None or self.meta["bm25"]["stats"]["fields"] != FIELDS:
+            return None
+        return BM25Index.prebuilt(self._postings, self.meta["bm25"]["stats"])
+
+    def fuzzy_targets(self) -> set[str] | None:
+        """fuzzy.target_terms of the stored rows, or None for a store built without them."""
+        targets = self.meta.get("bm25", {}).get("fuzzy_targets")
+        return None if targets is None else set(targets)
+
+    def close(self) -> None:
+        stored = self._postings.views if self._postings is not None else ()
+        for view in (*self.codes.values(), *self.numbers.values(), *self._offsets.values(),
+                     *stored, self._by_id, self._bucket_rows, self._buf):
+            view.release()
+        try:
+            self._mm.close()
+        except BufferError:  # a caller still holds a bucket_rows() view; GC unmaps it later
+            pass
+
+    # -- build / open ------------------------------------------------------------------
+    @staticmethod
+    def build(clauses: list[dict[str, Any]], path: str | os.PathLike,
+              source: dict[str, Any] | None = None) -> Path:
+        """Write clauses to path (atomically); source = _source_info of the JSON it came from."""
+        n = len(clauses)
+        dicts = {f: sorted({c[f] for c in clauses}) for f in CODED}
+        meta: dict[str, Any] = {"n": n, "byteorder": sys.byteorder, "source": source or {},
+                                "dicts": dicts, "columns": {}, "text": {}}
+        path = Path(path)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + bytes(16))  # meta offset + length, filled in last
+
+            def put(data: bytes) -> int:
+                f.write(bytes(_align(f.tell()) - f.tell()))
+                offset = f.tell()
+                f.write(data)
+                return offset
+
+            def put_array(a: array) -> dict[str, Any]:
+                return {"type": a.typecode, "offset": put(a.tobytes()), "count": len(a)}
+
+            for field in CODED:
+                code = {v: i for i, v in enumerate(dicts[field])}
+                meta["columns"][field] = put_array(
+                    array(_code_type(len(dicts[field])), (code[c[field]] for c in clauses)))
+            for field in NUMERIC:
+                values = [int(c[field]) for c in clauses]
+                meta["columns"][field] = put_array(
+                    array("B" if all(0 <= v <= 0xFF for v in values) else "i", values))
+            for field in TEXT:
+                encoded = [str(c.get(field) or "").encode() for c in clauses]
+                offsets = array("Q", [0])
+                for e in encoded:
+                    offsets.append(offsets[-1] + len(e))
+                meta["text"][field] = {"offsets": put_array(offsets), "blob": put(b"".join(encoded))}
+            meta["by_id"] = put_array(array("I", sorted(range(n), key=lambda i: clauses[i]["clause_id"])))
+
+            code_of = {field: {v: i for i, v in enumerate(dicts[field])} for field in ("conflict_type", "bias")}
+            groups: dict[tuple[int, int], list[int]] = {}
+            for i, c in enumerate(clauses):
+                key = (code_of["conflict_type"][c["conflict_type"]], code_of["bias"][c["bias"]])
+                groups.setdefault(key, []).append(i)
+            rows, table = array("I"), []
+            for (conflict, bias), members in sorted(groups.items()):
+                start = len(rows)
+                rows.extend(members)
+                table.append([conflict, bias, start, len(rows),
+                              sum(int(clauses[i]["risk_score_founder"]) for i in members),
+                              sum(int(clauses[i]["risk_score_vc"]) for i in members)])
+            meta["buckets"] = {"rows": put_array(rows), "table": table}
+
+            index = BM25Index(clauses)
+            terms = sorted(index.postings)
+            term_offsets, bounds = array("Q", [0]), array("Q", [0])
+            post_rows, weights = array("I"), array("d")
+            for t in terms:
+                term_offsets.append(term_offsets[-1] + len(t.encode()))
+                plist = index.postings[t]
+                post_rows.extend(plist.keys())  # built in row order
+                weights.extend(plist.values())
+                bounds.append(len(post_rows))
+            meta["bm25"] = {
+                "stats": index.stats(),
+                "terms": {"offsets": put_array(term_offsets), "blob": put("".join(terms).encode())},
+                "postings": put_array(bounds), "rows": put_array(post_rows), "weights": put_array(weights),
+                "fuzzy_targets": sorted(target_terms(clauses)),
+            }
+
+            header = json.dumps(meta, separators=(",", ":")).encode()
+            meta_offset = put(header)
+            f.seek(len(MAGIC))
+            f.write(meta_offset.to_bytes(8, "little") + len(header).to_bytes(8, "little"))
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def open_if_fresh(cls, path: str | os.PathLike, source: str | os.PathLike | None = None
+                      ) -> "ClauseStore | None":
+        """Open path unless missing, unreadable, or built from another version of source.
+
+        Same size + mtime as recorded is trusted; otherwise the content hash decides
+        (a fresh checkout or copy changes mtimes, not content).
+        """
+        try:
+            store = cls(path)
+        except (OSError, ValueError, KeyError):
+            return None
+        src = Path(source) if source else None
+        if src is None or not src.exists():
+            return store
+        recorded, st = store.meta.get("source", {}), src.stat()
+        if (recorded.get("size"), recorded.get("mtime_ns")) == (st.st_size, st.st_mtime_ns):
+            return store
+        if recorded.get("sha1") == hashlib.sha1(src.read_bytes()).hexdigest():
+            return store
+        store.close()
+        return None
+
+
+def _align(n: int, to: int = 8) -> int:
+    return (n + to - 1) // to * to
+
+
+def build_from_json(json_path: str | os.PathLike, out: str | os.PathLike) -> Path:
+    src = Path(json_path)
+    return ClauseStore.build(json.loads(src.read_text()), out, _source_info(src))
+
+
+if __name__ == "__main__":
+    src = sys.argv[1] if len(sys.argv) > 1 else "data/clauses.json"
+    dst = sys.argv[2] if len(sys.argv) > 2 else "data/clauses.store"
+    out = build_from_json(src, dst)
+    store = ClauseStore(out)
+    print(f"{len(store)} clauses → {out} ({out.stat().st_size / 1024:.0f} KiB)")
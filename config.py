@@ -17,8 +17,47 @@ DEBUG = True
 
 # Database
 DUCKDB_PATH = "data/legal_simulator.duckdb"
+DUCKDB_POOL_SIZE = int(os.getenv("DUCKDB_POOL_SIZE", str(min(8, os.cpu_count() or 4))))
+
+# Simulation history is written behind the response, in batches
+SIMULATION_BATCH_SIZE = int(os.getenv("SIMULATION_BATCH_SIZE", "500"))
+SIMULATION_FLUSH_INTERVAL = float(os.getenv("SIMULATION_FLUSH_INTERVAL", "0.5"))  # seconds
+SIMULATION_QUEUE_SIZE = int(os.getenv("SIMULATION_QUEUE_SIZE", "100000"))
+
+# Precomputed simulations (python precompute.py)
+SNAPSHOT_PATH = "data/snapshot.json"
+BUNDLE_PATH = "data/corpus.bundle"  # pickled corpus + index for api/index.py cold starts
+
+# Memory-mapped clause library (python clause_store.py); used instead of
+# clauses.json when present and built from the current file
+CLAUSE_STORE_PATH = os.getenv("CLAUSE_STORE_PATH", "data/clauses.store")
+
+# Cache-Control max-age (seconds) for /episodes and /export; ETags make
+# revalidation after that a 304
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+
+# Hot reload: poll data/clauses.json + episodes.json this often (seconds, 0 = off)
+# and apply edits incrementally without a restart
+CORPUS_RELOAD_INTERVAL = float(os.getenv("CORPUS_RELOAD_INTERVAL", "5"))
+
+# Clause package optimizer (/packages): enumerate up to this many packages,
+# prune partial packages beyond it
+PACKAGE_ENUMERATE_LIMIT = int(os.getenv("PACKAGE_ENUMERATE_LIMIT", "10000"))
+
+# Monte Carlo negotiations (/simulate/monte-carlo): NumPy batches sized to the
+# memory budget; runs of MONTE_CARLO_PARALLEL_MIN+ samples use a process pool
+# when MONTE_CARLO_WORKERS > 1
+MONTE_CARLO_MAX_SAMPLES = int(os.getenv("MONTE_CARLO_MAX_SAMPLES", "5000000"))
+MONTE_CARLO_MEMORY_MB = float(os.getenv("MONTE_CARLO_MEMORY_MB", "64"))
+MONTE_CARLO_WORKERS = int(os.getenv("MONTE_CARLO_WORKERS", "0"))
+MONTE_CARLO_PARALLEL_MIN = int(os.getenv("MONTE_CARLO_PARALLEL_MIN", "1000000"))
 
 # Agent Config
 MAX_RETRIES = 3
 TEMPERATURE = 0.7
+NARRATIVE_MODEL = "claude-3-5-sonnet-20241022"
+NARRATIVE_TIMEOUT = float(os.getenv("NARRATIVE_TIMEOUT", "8"))    # per LLM call, seconds
+NARRATIVE_DEADLINE = float(os.getenv("NARRATIVE_DEADLINE", "12"))  # whole /simulate fan-out
+NARRATIVE_CACHE_SIZE = int(os.getenv("NARRATIVE_CACHE_SIZE", "512"))
+NARRATIVE_CACHE_TTL = float(os.getenv("NARRATIVE_CACHE_TTL", str(7 * 24 * 3600)))  # 0 = never expire
 
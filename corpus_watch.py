@@ -0,0 +1,166 @@
+"""
+Hot reload of the corpus files (data/clauses.json, data/episodes.json).
+
+CorpusWatcher polls each file's (size, mtime) and, only when that moved, its
+SHA-1; changed files are handed to a callback in one batch, so clauses and
+episodes edited together are applied together. A callback that raises (say a
+half-written file that doesn't parse) leaves the running version in place and
+is retried once the content changes again.
+
+diff_records tells the callback which clause_ids / episode_ids were added,
+changed or removed, so it can update indexes, DB rows and caches for those
+rows only and then swap the new version in with one reference assignment
+(requests already holding the old version finish on it).
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable, Mapping
+
+
+@dataclass
+class RecordDiff:
+    """Keys added / changed / removed between two versions of a record list."""
+
+    added: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    @property
+    def touched(self) -> set[str]:
+        return {*self.added, *self.changed, *self.removed}
+
+    def summary(self) -> dict[str, int]:
+        return {"added": len(self.added), "changed": len(self.changed), "removed": len(self.removed)}
+
+
+def diff_records(old: Iterable[Mapping[str, Any]], new: Iterable[Mapping[str, Any]],
+                 key: str) -> RecordDiff:
+    """Compare two record lists by `key` (added / changed keep the new file's order)."""
+    before = {r[key]: r for r in old}
+    diff = RecordDiff()
+    seen = set()
+    for r in new:
+        k = r[key]
+        seen.add(k)
+        if k not in before:
+            diff.added.append(k)
+        elif dict(before[k]) != dict(r):
+            diff.changed.append(k)
+    diff.removed = [k for k in before if k not in seen]
+    return diff
+
+
+class CorpusWatcher:
+    """Poll files and call on_change({name: new bytes}) when their content changes."""
+
+    def __init__(self, paths: Mapping[str, str | Path],
+                 on_change: Callable[[dict[str, bytes]], Any], interval: float = 5.0):
+        self.paths = {name: Path(p) for name, p in paths.items()}
+        self.on_change = on_change
+        self.interval = interval
+        self._stat: dict[str, tuple[int, int] | None] = {}
+        self._hash: dict[str, str | None] = {}
+        self._failed: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.polls = self.reloads = self.failures = 0
+        self.last_reload_ms = 0.0
+        self.last_error: str | None = None
+        for name, path in self.paths.items():
+            self._stat[name] = self._stat_of(path)
+            self._hash[name] = self._hash_of(path)
+
+    @staticmethod
+    def _stat_of(path: Path) -> tuple[int, int] | None:
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    @staticmethod
+    def _hash_of(path: Path, data: bytes | None = None) -> str | None:
+        try:
+            return hashlib.sha1(path.read_bytes() if data is None else data).hexdigest()
+        except OSError:
+            return None
+
+    def poll(self) -> dict[str, bytes]:
+        """Check once; apply and return the files whose content changed."""
+        with self._lock:
+            self.polls += 1
+            changed: dict[str, bytes] = {}
+            hashes: dict[str, str] = {}
+            for name, path in self.paths.items():
+                stat = self._stat_of(path)
+                if stat is None or stat == self._stat[name]:
+                    continue  # unchanged, or mid-replace: look again next poll
+                try:
+                    data = path.read_bytes()
+                except OSError:
+                    continue
+                digest = self._hash_of(path, data)
+                self._stat[name] = stat
+                if digest == self._hash[name] or digest == self._failed.get(name):
+                    continue  # touched, not edited / already known to be broken
+                changed[name], hashes[name] = data, digest
+            if not changed:
+                return {}
+
+            started = time.perf_counter()
+            try:
+                self.on_change(changed)
+            except Exception as exc:
+                self.failures += 1
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                self._failed.update(hashes)
+                print(f"⚠️  Corpus reload failed, keeping the running version: {self.last_error}")
+                return {}
+            self._hash.update(hashes)
+            for name in hashes:
+                self._failed.pop(name, None)
+            self.reloads += 1
+            self.last_error = None
+            self.last_reload_ms = round((time.perf_counter() - started) * 1e3, 2)
+            return changed
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:  # the watcher must outlive any single bad poll
+                traceback.print_exc()
+
+    def start(self) -> "CorpusWatcher":
+        if self.interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="corpus-watch", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "interval_s": self.interval,
+            "running": self._thread is not None,
+            "polls": self.polls,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_reload_ms": self.last_reload_ms,
+            "last_error": self.last_error,
+            "versions": {name: (h or "")[:12] for name, h in self._hash.items()},
+        }
@@ -0,0 +1,202 @@
+"""
+Typo- and abbreviation-tolerant query terms for the advisor's retrieval.
+
+BM25 only scores exact tokens, so "particpating", "anti dilutoin" or "liq pref"
+used to fall through to the fallback clause. QueryExpander rewrites each query
+token the index doesn't know before it is searched:
+
+1. SYNONYMS: term-sheet shorthand -> the words clauses actually use, and
+   ACRONYMS only when typed in capitals ("LP", not "lp"); an expansion whose
+   words the corpus doesn't have ("ROFR" without a refusal clause) is skipped;
+2. compounds: "antidilution" -> "anti dilution" when both halves are terms;
+3. spelling: the closest target term within MAX_EDITS (optimal string
+   alignment, so a swapped pair of letters is one edit). Targets are the
+   words of clause labels (TARGET_FIELDS) used by at most TARGET_MAX_DF of the
+   clauses, so ordinary words ("work", "along") aren't bent into prose terms.
+
+Step 3 never scans the vocabulary: a character-trigram inverted index over the
+targets proposes the few sharing the most trigrams with the typo, and only
+those get an edit distance. Known tokens pass through unchanged, and the
+advisor only rewrites queries whose as-typed search comes back weak.
+"""
+from __future__ import annotations
+
+import functools
+import heapq
+import re
+from collections import defaultdict
+from typing import Any, Iterable, Mapping
+
+from retrieval import tokenize
+
+# shorthand -> expansion; the original token is kept alongside the expansion
+SYNONYMS: dict[str, str] = {
+    "pref": "preference",
+    "prefs": "preference",
+    "liq": "liquidation",
+    "antidilutive": "anti dilution",
+    "dilutive": "dilution",
+    "wtd": "weighted",
+    "avg": "average",
+    "rofr": "right of first refusal",
+    "rofo": "right of first offer",
+    "mfn": "most favored nation",
+    "esop": "employee stock option pool",
+    "accel": "acceleration",
+    "mgmt": "management",
+    "exec": "executive",
+    "execs": "executive",
+    "comp": "compensation",
+    "gov": "governance",
+    "bod": "board of directors",
+    "ipo": "initial public offering",
+    "acq": "acquisition",
+    "conv": "convertible conversion",
+    "indemnity": "indemnification",
+    "kpi": "kpis",
+    "cofounder": "co founder",
+    "cofounders": "co founders",
+}
+
+# two-letter shorthand that is also an everyday token ("an ad", "ma"): only
+# expanded when the query has it in capitals
+ACRONYMS: dict[str, str] = {
+    "lp": "liquidation preference",
+    "ad": "anti dilution",
+    "wa": "weighted average",
+    "ic": "investment committee",
+    "ma": "merger acquisition",
+}
+
+# edits allowed by token length (shorter tokens are corrected too eagerly otherwise)
+MIN_FUZZY_LEN = 4
+MAX_EDITS = {4: 1, 5: 1}  # 6+ letters -> 2
+CANDIDATES = 16  # terms sharing the most trigrams that get an edit distance
+
+# spelling targets: label fields name what a clause is; full_text / explanation are prose
+TARGET_FIELDS = ("short_text", "clause_type", "conflict_type")
+TARGET_MAX_DF = 0.2  # share of clauses; common terms identify nothing anyway
+
+
+def target_terms(clauses: Iterable[Mapping[str, Any] | None]) -> set[str]:
+    """Words of the TARGET_FIELDS of every clause (None slots skipped)."""
+    return {t for c in clauses if c is not None
+            for f in TARGET_FIELDS for t in tokenize(str(c.get(f) or ""))}
+
+
+def _grams(term: str) -> set[str]:
+    padded = f"^{term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance, or limit + 1 once it must exceed limit.
+
+    Only the diagonal band |i - j| <= limit of the DP table is filled in.
+    """
+    n, m = len(a), len(b)
+    if abs(n - m) > limit:
+        return limit + 1
+    over = limit + 1
+    prev2: list[int] = []
+    prev = [j if j <= limit else over for j in range(m + 1)]
+    for i in range(1, n + 1):
+        cur = [over] * (m + 1)
+        if i <= limit:
+            cur[0] = i
+        lo, hi = max(1, i - limit), min(m, i + limit)
+        ai = a[i - 1]
+        for j in range(lo, hi + 1):
+            bj = b[j - 1]
+            d = prev[j - 1] + (ai != bj)
+            if prev[j] + 1 < d:
+                d = prev[j] + 1
+            if cur[j - 1] + 1 < d:
+                d = cur[j - 1] + 1
+            if i > 1 and j > 1 and ai == b[j - 2] and a[i - 2] == bj and prev2[j - 2] + 1 < d:
+                d = prev2[j - 2] + 1
+            cur[j] = d
+        if min(cur[max(0, i - limit):hi + 1]) > limit:
+            return over
+        prev2, prev = prev, cur
+    return min(prev[m], over)
+
+
+class QueryExpander:
+    """Trigram index over correction targets, for rewriting queries against a vocabulary.
+
+    vocab maps every index term to its df; targets (target_terms()) limits which
+    of them a misspelling may become, and n_docs sets the TARGET_MAX_DF cutoff.
+    """
+
+    def __init__(self, vocab: Mapping[str, int], targets: Iterable[str] | None = None,
+                 n_docs: int = 0, cache_size: int = 4096):
+        self.vocab = vocab  # term -> df (ties go to the more common term)
+        max_df = max(1, int(TARGET_MAX_DF * n_docs)) if n_docs else None
+        candidates = vocab.keys() if targets is None else set(targets) & vocab.keys()
+        self.terms = sorted(t for t in candidates if t.isalpha() and len(t) >= 3
+                            and (max_df is None or vocab[t] <= max_df))
+        # shorthand whose expansion this corpus can match
+        self.synonyms = {k: v for k, v in SYNONYMS.items() if self._known(v)}
+        self.acronyms = {k: v for k, v in ACRONYMS.items() if self._known(v)}
+        grams: dict[str, list[int]] = defaultdict(list)
+        for tid, term in enumerate(self.terms):
+            for g in _grams(term):
+                grams[g].append(tid)
+        self.grams = dict(grams)
+        self.correct = functools.lru_cache(maxsize=cache_size)(self._correct)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def _correct(self, token: str) -> str | None:
+        """Closest known term to an unknown token, or None."""
+        if len(token) < MIN_FUZZY_LEN or not token.isalpha():
+            return None
+        limit = MAX_EDITS.get(len(token), 2)
+        shared: dict[int, int] = defaultdict(int)
+        for g in _grams(token):
+            for tid in self.grams.get(g, ()):
+                shared[tid] += 1
+        candidates = heapq.nlargest(
+            CANDIDATES,
+            (tid for tid in shared if abs(len(self.terms[tid]) - len(token)) <= limit),
+            key=shared.__getitem__,
+        )
+        best: tuple[int, int, str] | None = None
+        for tid in candidates:
+            term = self.terms[tid]
+            bound = best[0] if best else limit  # only ties or better matter now
+            d = edit_distance(token, term, bound)
+            if d <= bound and (best is None or (d, -self.vocab[term], term) < best):
+                best = (d, -self.vocab[term], term)
+        return best[2] if best else None
+
+    def _known(self, phrase: str) -> bool:
+        return all(t in self.vocab for t in tokenize(phrase))
+
+    def _split(self, token: str) -> str | None:
+        for i in range(3, len(token) - 2):
+            if token[:i] in self.vocab and token[i:] in self.vocab:
+                return f"{token[:i]} {token[i:]}"
+        return None
+
+    def expand_terms(self, tokens: Iterable[str], capitals: frozenset[str] = frozenset()) -> list[str]:
+        """Rewrite tokens; `capitals` are the tokens the user typed in upper case."""
+        out: list[str] = []
+        for t in tokens:
+            expansion = self.synonyms.get(t) or (self.acronyms.get(t) if t in capitals else None)
+            if expansion:
+                out.append(t)
+                out.extend(tokenize(expansion))
+            elif t in self.vocab:
+                out.append(t)
+            else:
+                fixed = self._split(t) or self.correct(t)
+                out.extend(fixed.split() if fixed else [t])
+        return out
+
+    def expand(self, query: str) -> str:
+        """The query with shorthand expanded and unknown tokens corrected."""
+        capitals = frozenset(w.lower() for w in re.findall(r"[A-Za-z]+", query) if w.isupper())
+        return " ".join(self.expand_terms(tokenize(query), capitals))
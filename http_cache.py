@@ -0,0 +1,104 @@
+"""
+HTTP validators for read-only responses: ETag, Cache-Control and 304s.
+
+The episode list, exports and the advisor UI only change with the corpus (or
+a deploy), yet were rebuilt and re-serialized on every request. BodyCache keeps
+each body serialized once per corpus version together with its ETag; a request
+whose If-None-Match carries that ETag gets an empty 304, and the Cache-Control
+header lets browsers and the CDN in front skip the app entirely while fresh.
+
+ETags hash the body, not just the corpus version, so a reload that doesn't
+change a given export still revalidates it with a 304.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any, Hashable
+
+from starlette.responses import Response
+
+# always revalidate (cheap with an ETag); for responses carrying live counters
+REVALIDATE = "no-cache"
+
+
+def etag_of(body: bytes) -> str:
+    return f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 prescribes for it)."""
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or any(t.removeprefix("W/") == etag for t in tags)
+
+
+def render_json(payload: Any) -> bytes:
+    # byte-for-byte what FastAPI's JSONResponse would send
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+
+@dataclass(frozen=True)
+class CachedBody:
+    body: bytes
+    etag: str
+    media_type: str = "application/json"
+
+    @classmethod
+    def of(cls, body: bytes, media_type: str = "application/json") -> "CachedBody":
+        return cls(body, etag_of(body), media_type)
+
+    @classmethod
+    def json(cls, payload: Any) -> "CachedBody":
+        return cls.of(render_json(payload))
+
+    def response(self, if_none_match: str | None, cache_control: str) -> Response:
+        """200 with the stored bytes, or an empty 304 when the client has them."""
+        headers = {"ETag": self.etag, "Cache-Control": cache_control}
+        if etag_matches(if_none_match, self.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(self.body, media_type=self.media_type, headers=headers)
+
+
+class BodyCache:
+    """Serialized bodies by key, all dropped when the corpus version moves.
+
+    A body built from an older version (a reload landed mid-request) is
+    returned to its caller but not stored.
+    """
+
+    def __init__(self, version: str = "", maxsize: int = 4096):
+        self.version = version
+        self.maxsize = maxsize
+        self._bodies: dict[Hashable, CachedBody] = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def set_version(self, version: str) -> None:
+        with self._lock:
+            if version != self.version:
+                self.version = version
+                self._bodies.clear()
+
+    def get(self, key: Hashable) -> CachedBody | None:
+        body = self._bodies.get(key)
+        if body is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return body
+
+    def put(self, key: Hashable, payload: Any, version: str) -> CachedBody:
+        body = CachedBody.json(payload)
+        with self._lock:
+            if version == self.version and len(self._bodies) < self.maxsize:
+                self._bodies[key] = body
+        return body
+
+    def stats(self) -> dict[str, Any]:
+        return {"version": self.version[:12], "bodies": len(self._bodies),
+                "hits": self.hits, "misses": self.misses}
@@ -8,36 +8,160 @@ clause + Silicon Valley corpus. Runtime auth = Cloud Run service identity
 """
 from __future__ import annotations
 
+import json
+import os
+import threading
+from contextlib import closing
 from pathlib import Path
+from typing import Any, Iterator, Literal
 
-from fastapi import FastAPI, Query, HTTPException
+from fastapi import FastAPI, Header, Query, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
 
+import advisor
+import scheduler
+import timing
 from advisor import advise
+from corpus_watch import CorpusWatcher
+from http_cache import CachedBody
 
 BASE = Path(__file__).resolve().parent
 WEB = BASE / "web"
 
+MAX_BATCH_SEGMENTS = 200
+SUGGEST_MAX_AGE = int(os.environ.get("SUGGEST_MAX_AGE", "300"))  # seconds browsers/CDNs may reuse
+UI_MAX_AGE = int(os.environ.get("UI_MAX_AGE", "300"))
+# the semantic index is built on the first ?mode=semantic query; 1 builds it at startup instead
+SEMANTIC_WARM = os.environ.get("SEMANTIC_WARM", "0") == "1"
+
+# the UI only changes with a deploy: read once, served from memory with an ETag
+UI = CachedBody.of((WEB / "index.html").read_bytes(), "text/html") if (WEB / "index.html").exists() else None
+
+# edits to data/clauses.json / episodes.json are applied without a restart
+# (CORPUS_RELOAD_INTERVAL seconds between polls, 0 = off)
+WATCHER = CorpusWatcher(
+    {"clauses": advisor.DATA / "clauses.json", "episodes": advisor.DATA / "episodes.json"},
+    advisor.reload,
+    float(os.environ.get("CORPUS_RELOAD_INTERVAL", "5")),
+)
+
 app = FastAPI(title="VC Term-Sheet Advisor", version="1.0.0")
 app.add_middleware(
-    CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"]
+    CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+if timing.ENABLED:  # SERVER_TIMING=0 drops the middleware and every span
+    app.add_middleware(timing.ServerTimingMiddleware)
+
+
+@app.on_event("startup")
+def warm_generator():
+    # warm the shared Vertex client off the boot path; /healthz reports when it's up
+    threading.Thread(target=advisor.warm, name="vertex-warm", daemon=True).start()
+    if SEMANTIC_WARM:
+        threading.Thread(target=advisor.semantic_index, name="semantic-index", daemon=True).start()
+    threading.Thread(target=advisor.suggest_index, name="suggest-index", daemon=True).start()
+    WATCHER.start()
+
+
+@app.on_event("shutdown")
+def stop_watcher():
+    WATCHER.stop()
 
 
 @app.get("/")
-def home():
-    idx = WEB / "index.html"
-    if not idx.exists():
+def home(if_none_match: str | None = Header(None)):
+    if UI is None:
         raise HTTPException(404, "UI not built")
-    return FileResponse(idx)
+    return UI.response(if_none_match, f"public, max-age={UI_MAX_AGE}")
+
+
+MODE = Query("lexical", pattern="^(lexical|semantic)$", description="Retrieval mode")
 
 
 @app.get("/api/advise")
-def api_advise(q: str = Query(..., min_length=2, description="A term-sheet clause or term")):
-    return advise(q)
+def api_advise(q: str = Query(..., min_length=2, description="A term-sheet clause or term"),
+               mode: str = MODE):
+    return advise(q, mode)
+
+
+@app.get("/api/suggest")
+def api_suggest(response: Response,
+                q: str = Query(..., min_length=1, max_length=100, description="What has been typed so far"),
+                limit: int = Query(8, ge=1, le=25)):
+    # no retrieval, no generation: safe to fire on every keystroke
+    response.headers["Cache-Control"] = f"public, max-age={SUGGEST_MAX_AGE}"
+    return {"q": q, "suggestions": advisor.suggest(q, limit)}
+
+
+class ClosingStreamingResponse(StreamingResponse):
+    """StreamingResponse that closes its generator however the response ends.
+
+    Starlette leaves a sync generator suspended when the client disconnects;
+    advise_stream holds an LLM slot across its yields, so it must be closed
+    then, not whenever it is garbage-collected.
+    """
+
+    def __init__(self, events: Iterator[str], **kwargs: Any):
+        super().__init__(events, **kwargs)
+        self.events = events
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # safe here: a cancelled threadpool next() has returned before we get control
+            self.events.close()
+
+
+@app.get("/api/advise/stream")
+def api_advise_stream(q: str = Query(..., min_length=2, description="A term-sheet clause or term"),
+                      mode: str = MODE):
+    # retrieval lands as the first event; the grounded answer streams in after it
+    def events():
+        with closing(advisor.advise_stream(q, mode)) as stream:
+            for event, data in stream:
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    return ClosingStreamingResponse(
+        events(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+class BatchAdviseRequest(BaseModel):
+    document: str | None = None        # a whole pasted term sheet, segmented server-side
+    clauses: list[str] | None = None   # or clause texts already split by the caller
+    mode: Literal["lexical", "semantic"] = "lexical"
+
+
+@app.post("/api/advise/batch")
+def api_advise_batch(req: BatchAdviseRequest):
+    segments = [c.strip() for c in (req.clauses or []) if len(c.strip()) >= 2]
+    if req.document:
+        segments += advisor.segment(req.document)
+    if not segments:
+        raise HTTPException(422, "provide a document or a non-empty list of clauses")
+    if len(segments) > MAX_BATCH_SEGMENTS:
+        raise HTTPException(413, f"at most {MAX_BATCH_SEGMENTS} segments per batch")
+    return advisor.advise_batch(segments, req.mode)
 
 
 @app.get("/healthz")
 def healthz():
-    return {"ok": True}
+    return {
+        "ok": True,
+        "generation_ready": advisor.ready(),
+        "answer_cache": advisor.cache_stats(),
+        "single_flight": advisor.flight_stats(),
+        "llm_limits": scheduler.stats(),
+        "corpus": {**advisor.corpus_stats(), "reload": WATCHER.stats()},
+    }
+
+
+@app.get("/metrics")
+def metrics():
+    # per-process Prometheus histograms (stage_duration_seconds, http_request_duration_seconds)
+    return PlainTextResponse(timing.render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,96 @@
+"""
+Precompute every episode × scenario simulation into data/snapshot.json.
+
+The corpus is finite and /simulate + /export are deterministic apart from the
+narrative, so both app.py and api/index.py serve straight from this snapshot and
+only generate live on a miss (or when the corpus hash no longer matches).
+
+    python precompute.py                    # narratives via Claude if ANTHROPIC_API_KEY is set
+    python precompute.py --concurrency 8 --out data/snapshot.json
+    python precompute.py --bundle-only      # just rebuild data/corpus.bundle (no LLM)
+
+It also writes data/corpus.bundle: corpus, built ClauseIndex and snapshot pickled
+into one file, which api/index.py loads on cold start instead of the JSON files.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+
+import config
+from src.agents import ClauseMatchAgent, NarrativeAgent
+from src.corpus import (
+    SNAPSHOT_FORMAT, CorpusBundle, Snapshot, assemble_simulation, corpus_version,
+    render_export_markdown,
+)
+
+
+async def build_snapshot(data_dir: Path, concurrency: int = 4) -> dict:
+    episodes = json.loads((data_dir / "episodes.json").read_text())
+    clause_agent = ClauseMatchAgent(str(data_dir / "clauses.json"))
+    narrative_agent = NarrativeAgent()
+    gate = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(episode: dict) -> tuple[str, dict, str]:
+        clause_sets = clause_agent.match_clauses(episode)
+        async with gate:
+            narratives = await narrative_agent.summarize_scenarios(episode, clause_sets)
+        sim = assemble_simulation(episode, clause_sets, narratives, clause_agent.get_alignment_score)
+        md = render_export_markdown(episode, clause_sets, clause_agent.get_alignment_score)
+        return episode["episode_id"], sim, md
+
+    results = await asyncio.gather(*(one(e) for e in episodes))
+    return {
+        "meta": {
+            "format": SNAPSHOT_FORMAT,
+            "corpus_version": corpus_version(data_dir),
+            "narrative_model": config.NARRATIVE_MODEL if narrative_agent.async_client else "fallback",
+            "built_at": int(time.time()),
+        },
+        "simulations": {eid: sim for eid, sim, _ in results},
+        "exports": {eid: md for eid, _, md in results},
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--data-dir", default="data")
+    ap.add_argument("--out", default=config.SNAPSHOT_PATH)
+    ap.add_argument("--concurrency", type=int, default=4, help="episodes generated in parallel")
+    ap.add_argument("--bundle", default=config.BUNDLE_PATH, help="cold-start corpus bundle")
+    ap.add_argument("--bundle-only", action="store_true",
+                    help="skip generation; bundle the corpus with the existing --out snapshot")
+    args = ap.parse_args()
+
+    if args.bundle_only:
+        write_bundle(args.data_dir, args.bundle, Snapshot.load(args.out, args.data_dir))
+        return
+
+    t0 = time.perf_counter()
+    snap = asyncio.run(build_snapshot(Path(args.data_dir), args.concurrency))
+    out = Path(args.out)
+    tmp = out.with_suffix(out.suffix + ".tmp")
+    tmp.write_text(json.dumps(snap, separators=(",", ":"), ensure_ascii=False))
+    os.replace(tmp, out)  # readers never see a half-written file
+    print(
+        f"✅ {len(snap['simulations'])} episodes × 3 scenarios → {out} "
+        f"({out.stat().st_size / 1024:.0f} KiB, corpus {snap['meta']['corpus_version']}, "
+        f"{time.perf_counter() - t0:.1f}s)"
+    )
+    write_bundle(args.data_dir, args.bundle, Snapshot(snap))
+
+
+def write_bundle(data_dir: str, path: str, snapshot: Snapshot) -> None:
+    out = CorpusBundle.build(data_dir, snapshot).write(path)
+    print(
+        f"✅ corpus bundle ({len(snapshot)} precomputed episodes) → {out} "
+        f"({out.stat().st_size / 1024:.0f} KiB)"
+    )
+
+
+if __name__ == "__main__":
+    main()
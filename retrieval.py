@@ -0,0 +1,217 @@
+"""
+Field-weighted BM25 over the clause library, built once at import.
+
+The advisor used to re-tokenize every clause on every request and fully sort the
+corpus to take k=3. Here each clause is tokenized once into an inverted index whose
+postings carry the saturated BM25F term frequency of (term, clause), so a query
+only touches the posting lists of its own terms (times the term's idf) and picks
+the top-k with a heap.
+
+Keeping idf out of the postings lets updated() apply a corpus edit by
+re-tokenizing only the added / changed / removed clauses: a changed document
+count just recomputes the idf table. Field length averages stay at their
+build-time values until they drift past REBUILD_DRIFT, when needs_rebuild()
+asks for a full build.
+"""
+from __future__ import annotations
+
+import copy
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Any, Iterable, Mapping
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+# Per-field boost: the short label and clause type say what a clause *is*, the long
+# legal text mostly repeats common words.
+FIELDS: dict[str, float] = {
+    "short_text": 2.0,
+    "clause_type": 2.0,
+    "conflict_type": 1.5,
+    "full_text": 1.0,
+    "explanation": 1.0,
+}
+
+
+# updated() keeps build-time field length averages until one drifts this far
+REBUILD_DRIFT = 0.1
+
+
+def tokenize(s: str) -> list[str]:
+    return TOKEN.findall((s or "").lower())
+
+
+class BM25Index:
+    """Inverted index with BM25F scoring (per-field length normalization + boosts).
+
+    Documents are addressed by their position in `docs`; a None entry is an
+    empty slot (a removed document whose position is kept so others don't move).
+    """
+
+    def __init__(
+        self,
+        docs: Iterable[Mapping[str, Any] | None],
+        fields: Mapping[str, float] = FIELDS,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self.fields = dict(fields)
+        self.k1, self.b = k1, b
+        self.postings: dict[str, dict[int, float]] = {}  # term -> {doc: saturated pseudo tf}
+        self.idf: dict[str, float] = {}
+        self._build(list(docs))
+
+    @classmethod
+    def prebuilt(cls, postings: Mapping[str, Mapping[int, float]], stats: Mapping[str, Any]) -> "BM25Index":
+        """An index over postings saved with stats() (ClauseStore keeps them on disk)."""
+        index = cls.__new__(cls)
+        index.fields = dict(stats["fields"])
+        index.k1, index.b = stats["k1"], stats["b"]
+        index.n_docs = stats["n_docs"]
+        index.total_len = dict(stats["total_len"])
+        index.avg_len = dict(stats["avg_len"])
+        index.postings = postings  # read-only here too; updated() copies what it touches
+        index.idf = {t: index._idf(len(p)) for t, p in postings.items()}
+        return index
+
+    def stats(self) -> dict[str, Any]:
+        """Everything but the postings, as JSON (see prebuilt())."""
+        return {"fields": self.fields, "k1": self.k1, "b": self.b, "n_docs": self.n_docs,
+                "total_len": self.total_len, "avg_len": self.avg_len}
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    def _field_counts(self, doc: Mapping[str, Any]) -> dict[str, Counter]:
+        return {f: Counter(tokenize(str(doc.get(f, "") or ""))) for f in self.fields}
+
+    def _saturated(self, per_field: dict[str, Counter]) -> dict[str, float]:
+        # pseudo term frequency: boosted, length-normalized tf summed over fields
+        acc: dict[str, float] = defaultdict(float)
+        for f, counts in per_field.items():
+            flen = sum(counts.values())
+            norm = 1.0 - self.b + self.b * flen / self.avg_len[f]
+            w = self.fields[f]
+            for t, tf in counts.items():
+                acc[t] += w * tf / norm
+        return {t: ptf / (self.k1 + ptf) for t, ptf in acc.items()}
+
+    def _idf(self, df: int) -> float:
+        return math.log(1.0 + (self.n_docs - df + 0.5) / (df + 0.5))
+
+    def _build(self, docs: list[Mapping[str, Any] | None]) -> None:
+        counts = [self._field_counts(d) if d is not None else None for d in docs]
+        self.n_docs = sum(c is not None for c in counts)
+        self.total_len = dict.fromkeys(self.fields, 0)
+        for per_field in filter(None, counts):
+            for f, c in per_field.items():
+                self.total_len[f] += sum(c.values())
+        self.avg_len = self._avg_len()
+
+        postings: dict[str, dict[int, float]] = defaultdict(dict)
+        for i, per_field in enumerate(counts):
+            if per_field is not None:
+                for t, s in self._saturated(per_field).items():
+                    postings[t][i] = s
+        self.postings = dict(postings)
+        self.idf = {t: self._idf(len(p)) for t, p in self.postings.items()}
+
+    def _avg_len(self) -> dict[str, float]:
+        return {f: (self.total_len[f] / self.n_docs if self.n_docs else 0.0) or 1.0 for f in self.fields}
+
+    def updated(self, removed: Mapping[int, Mapping[str, Any]],
+                added: Mapping[int, Mapping[str, Any]]) -> "BM25Index":
+        """
+        A new index with `removed` ({position: old doc}) taken out and `added`
+        ({position: new doc}) put in; a changed doc appears in both at its position.
+        Only those docs are tokenized, and this index is left untouched
+        (copy-on-write posting lists), so in-flight searches keep a consistent view.
+        """
+        new = copy.copy(self)
+        new.postings = dict(self.postings)
+        new.total_len = dict(self.total_len)
+        copied: set[str] = set()
+
+        def plist(t: str) -> dict[int, float]:
+            if t not in copied:
+                new.postings[t] = dict(new.postings.get(t, ()))
+                copied.add(t)
+            return new.postings[t]
+
+        for i, doc in removed.items():
+            per_field = self._field_counts(doc)
+            for f, c in per_field.items():
+                new.total_len[f] -= sum(c.values())
+            for t in set().union(*per_field.values()):
+                plist(t).pop(i, None)
+            new.n_docs -= 1
+        for i, doc in added.items():
+            per_field = self._field_counts(doc)
+            for f, c in per_field.items():
+                new.total_len[f] += sum(c.values())
+            for t, s in new._saturated(per_field).items():
+                plist(t)[i] = s
+            new.n_docs += 1
+
+        for t in copied:
+            if not new.postings[t]:
+                del new.postings[t]
+        if new.n_docs != self.n_docs:
+            new.idf = {t: new._idf(len(p)) for t, p in new.postings.items()}
+        else:
+            new.idf = dict(self.idf)
+            for t in copied:
+                if t in new.postings:
+                    new.idf[t] = new._idf(len(new.postings[t]))
+                else:
+                    new.idf.pop(t, None)
+        return new
+
+    def needs_rebuild(self) -> bool:
+        """True once a field's average length is REBUILD_DRIFT away from the build-time one."""
+        current = self._avg_len()
+        return any(abs(current[f] - self.avg_len[f]) > REBUILD_DRIFT * self.avg_len[f] for f in self.fields)
+
+    def scores(self, terms: Iterable[str]) -> dict[int, float]:
+        """Accumulate BM25 scores for every doc that contains at least one term."""
+        acc: dict[int, float] = defaultdict(float)
+        for t in set(terms):
+            plist = self.postings.get(t)
+            if plist:
+                w = self.idf[t]
+                for i, s in plist.items():
+                    acc[i] += w * s
+        return acc
+
+    def search(self, query: str, k: int = 3) -> list[tuple[float, int]]:
+        """Top-k (score, doc_index) pairs, best first; ties keep corpus order."""
+        return self._top(self.scores(tokenize(query)), k)
+
+    def search_many(self, queries: Iterable[str], k: int = 3) -> list[list[tuple[float, int]]]:
+        """search() for a batch: identical term sets are scored once, and each
+        posting list is fetched once for every query that uses the term."""
+        term_sets = [frozenset(tokenize(q)) for q in queries]
+        distinct = list(dict.fromkeys(term_sets))
+        users: dict[str, list[int]] = defaultdict(list)
+        for qi, terms in enumerate(distinct):
+            for t in terms:
+                users[t].append(qi)
+        accs: list[dict[int, float]] = [defaultdict(float) for _ in distinct]
+        for t, qis in users.items():
+            plist = self.postings.get(t)
+            if not plist:
+                continue
+            w = self.idf[t]
+            for qi in qis:
+                acc = accs[qi]
+                for i, s in plist.items():
+                    acc[i] += w * s
+        tops = {terms: self._top(acc, k) for terms, acc in zip(distinct, accs)}
+        return [tops[terms] for terms in term_sets]
+
+    @staticmethod
+    def _top(acc: Mapping[int, float], k: int) -> list[tuple[float, int]]:
+        top = heapq.nlargest(k, acc.items(), key=lambda kv: (kv[1], -kv[0]))
+        return [(s, i) for i, s in top]
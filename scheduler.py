@@ -0,0 +1,187 @@
+"""
+Per-provider LLM concurrency limits with a bounded wait queue and deadlines.
+
+Every model call takes a slot from its provider's limiter first. When all slots
+are busy the caller queues (FIFO, threads and coroutines in the same queue); if
+the queue is already full, or no slot frees up before the caller's deadline, the
+call is shed with Overloaded and the caller serves its degraded answer right away
+(advisor's "grounded generation unavailable", NarrativeAgent._fallback_summary).
+
+    LLM_MAX_IN_FLIGHT_<PROVIDER>   slots per provider     (default 8)
+    LLM_MAX_QUEUE_<PROVIDER>       queued callers allowed (default 32)
+    LLM_QUEUE_DEADLINE_<PROVIDER>  max seconds in queue   (default 5)
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Iterator
+
+
+class Overloaded(RuntimeError):
+    """The provider's queue was full or the deadline passed before a slot freed up."""
+
+
+class _Waiter:
+    __slots__ = ("event", "loop", "future", "granted")
+
+    def __init__(self, event: threading.Event | None = None,
+                 loop: asyncio.AbstractEventLoop | None = None,
+                 future: asyncio.Future | None = None):
+        self.event, self.loop, self.future = event, loop, future
+        self.granted = False
+
+    def wake(self) -> None:
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class Limiter:
+    """Counting semaphore with a bounded FIFO queue shared by threads and coroutines."""
+
+    def __init__(self, name: str, max_in_flight: int = 8, max_queue: int = 32,
+                 deadline: float = 5.0):
+        self.name = name
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.deadline = deadline
+        self.in_flight = 0
+        self._waiters: deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+        self.admitted = self.shed_queue_full = self.shed_deadline = 0
+        self.queued = 0
+        self._wait_total = self._wait_max = 0.0
+
+    # -- bookkeeping (call with _lock held) ---------------------------------
+    def _admit_now(self) -> bool:
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self.shed_queue_full += 1
+            raise Overloaded(f"{self.name}: queue full ({self.max_queue} waiting)")
+        return False
+
+    def _record_wait(self, started: float) -> None:
+        waited = time.monotonic() - started
+        self.admitted += 1
+        self.queued += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+
+    def release(self) -> None:
+        with self._lock:
+            if self._waiters:
+                w = self._waiters.popleft()  # hand the slot straight over
+                w.granted = True
+                w.wake()
+            else:
+                self.in_flight -= 1
+
+    # -- threads -------------------------------------------------------------
+    def acquire(self, deadline: float | None = None) -> None:
+        with self._lock:
+            if self._admit_now():
+                return
+            w = _Waiter(event=threading.Event())
+            self._waiters.append(w)
+        started = time.monotonic()
+        w.event.wait(self.deadline if deadline is None else deadline)
+        with self._lock:
+            if w.granted:
+                self._record_wait(started)
+                return
+            self._waiters.remove(w)
+            self.shed_deadline += 1
+        raise Overloaded(f"{self.name}: no slot within deadline")
+
+    @contextmanager
+    def slot(self, deadline: float | None = None) -> Iterator[None]:
+        self.acquire(deadline)
+        try:
+            yield
+        finally:
+            self.release()
+
+    # -- coroutines ------------------------------------------------------------
+    async def aacquire(self, deadline: float | None = None) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._admit_now():
+                return
+            w = _Waiter(loop=loop, future=loop.create_future())
+            self._waiters.append(w)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(w.future),
+                                   self.deadline if deadline is None else deadline)
+        except BaseException as exc:  # timeout or caller cancelled
+            with self._lock:
+                granted = w.granted
+                if not granted:
+                    self._waiters.remove(w)
+                    if isinstance(exc, asyncio.TimeoutError):
+                        self.shed_deadline += 1
+            if granted:
+                self.release()  # the slot arrived as we gave up: pass it on
+            if isinstance(exc, asyncio.TimeoutError):
+                raise Overloaded(f"{self.name}: no slot within deadline") from None
+            raise
+        with self._lock:
+            self._record_wait(started)
+
+    @asynccontextmanager
+    async def aslot(self, deadline: float | None = None) -> AsyncIterator[None]:
+        await self.aacquire(deadline)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": self.in_flight, "max_in_flight": self.max_in_flight,
+                "waiting": len(self._waiters), "max_queue": self.max_queue,
+                "admitted": self.admitted, "shed_queue_full": self.shed_queue_full,
+                "shed_deadline": self.shed_deadline,
+                "queue_wait_avg_ms": round(self._wait_total / self.queued * 1e3, 3) if self.queued else 0.0,
+                "queue_wait_max_ms": round(self._wait_max * 1e3, 3),
+            }
+
+
+_limiters: dict[str, Limiter] = {}
+_registry_lock = threading.Lock()
+
+
+def limiter(provider: str) -> Limiter:
+    """Process-wide limiter for a provider ("vertex", "anthropic", ...)."""
+    lim = _limiters.get(provider)
+    if lim is None:
+        with _registry_lock:
+            lim = _limiters.get(provider)
+            if lim is None:
+                env = provider.upper()
+                lim = _limiters[provider] = Limiter(
+                    provider,
+                    max_in_flight=int(os.environ.get(f"LLM_MAX_IN_FLIGHT_{env}", "8")),
+                    max_queue=int(os.environ.get(f"LLM_MAX_QUEUE_{env}", "32")),
+                    deadline=float(os.environ.get(f"LLM_QUEUE_DEADLINE_{env}", "5")),
+                )
+    return lim
+
+
+def stats() -> dict[str, dict[str, Any]]:
+    return {name: lim.stats() for name, lim in sorted(_limiters.items())}
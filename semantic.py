@@ -0,0 +1,100 @@
+"""
+Offline "semantic" retrieval: hashed character n-gram TF-IDF in a dense NumPy matrix.
+
+Exact-token BM25 misses near-forms ("drag along" vs "drag-along", "pref" vs
+"preference"). Character n-grams inside word boundaries catch those without any
+model download: every clause becomes one L2-normalized row, a query is one
+matrix-vector product plus argpartition, and a batch of queries is a single
+matrix-matrix product.
+"""
+from __future__ import annotations
+
+import re
+import zlib
+from typing import Any, Iterable, Mapping
+
+import numpy as np
+
+from retrieval import FIELDS
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def _grams(text: str, ngrams: tuple[int, ...]) -> list[str]:
+    out: list[str] = []
+    for word in _NON_ALNUM.sub(" ", (text or "").lower()).split():
+        w = f" {word} "  # boundary marks so prefixes/suffixes get their own grams
+        for n in ngrams:
+            out.extend(w[i:i + n] for i in range(max(1, len(w) - n + 1)))
+    return out
+
+
+class HashedNgramIndex:
+    """Dense (n_docs × n_features) float32 matrix of L2-normalized TF-IDF rows.
+
+    n_features bounds memory at n_docs × n_features × 4 bytes (4096 → 16 KiB/clause).
+    """
+
+    def __init__(
+        self,
+        docs: Iterable[Mapping[str, Any]],
+        fields: Mapping[str, float] = FIELDS,
+        n_features: int = 4096,
+        ngrams: tuple[int, ...] = (3, 4, 5),
+    ):
+        self.fields = dict(fields)
+        self.n_features = n_features
+        self.ngrams = ngrams
+        docs = list(docs)
+        tf = np.zeros((len(docs), n_features), dtype=np.float32)
+        for i, d in enumerate(docs):
+            for f, w in self.fields.items():
+                cols = self._hash(_grams(str(d.get(f, "") or ""), ngrams))
+                np.add.at(tf[i], cols, w)
+        np.log1p(tf, out=tf)  # sublinear tf
+        df = np.count_nonzero(tf, axis=0)
+        self.idf = (np.log((1 + len(docs)) / (1 + df)) + 1.0).astype(np.float32)
+        tf *= self.idf
+        self.matrix = self._normalize(tf)
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def _hash(self, grams: list[str]) -> np.ndarray:
+        # crc32, not hash(): stable across processes and PYTHONHASHSEED
+        return np.fromiter((zlib.crc32(g.encode()) % self.n_features for g in grams),
+                           dtype=np.int64, count=len(grams))
+
+    @staticmethod
+    def _normalize(m: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(m, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return m / norms
+
+    def vectorize(self, queries: list[str]) -> np.ndarray:
+        q = np.zeros((len(queries), self.n_features), dtype=np.float32)
+        for i, text in enumerate(queries):
+            np.add.at(q[i], self._hash(_grams(text, self.ngrams)), 1.0)
+        np.log1p(q, out=q)
+        return self._normalize(q * self.idf)
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int, min_score: float) -> list[tuple[float, int]]:
+        k = min(k, scores.shape[0])
+        if k <= 0:
+            return []
+        idx = np.argpartition(-scores, k - 1)[:k]
+        idx = idx[np.lexsort((idx, -scores[idx]))]  # best first, ties by corpus order
+        return [(float(scores[i]), int(i)) for i in idx if scores[i] > min_score]
+
+    def search(self, query: str, k: int = 3, min_score: float = 0.05) -> list[tuple[float, int]]:
+        """Top-k (cosine, doc_index) pairs above min_score, best first."""
+        return self._top(self.matrix @ self.vectorize([query])[0], k, min_score)
+
+    def search_many(self, queries: list[str], k: int = 3,
+                    min_score: float = 0.05) -> list[list[tuple[float, int]]]:
+        """search() for a batch with one (n_docs × n_queries) matrix product."""
+        if not queries:
+            return []
+        scores = self.matrix @ self.vectorize(queries).T
+        return [self._top(scores[:, j], k, min_score) for j in range(scores.shape[1])]
@@ -0,0 +1,93 @@
+"""
+Request coalescing ("single-flight") for expensive generations.
+
+Concurrent callers asking for the same key share one in-flight call instead of
+each starting their own: the first caller runs it, the rest wait for its result.
+SingleFlight is for threads (sync FastAPI handlers), AsyncSingleFlight for
+coroutines. Nothing is cached once the call finishes — that's cache.py's job.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class _Counters:
+    def __init__(self) -> None:
+        self.calls = 0       # calls that actually ran
+        self.coalesced = 0   # callers that waited on someone else's call
+
+    def stats(self, in_flight: int) -> dict[str, int]:
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": in_flight}
+
+
+class SingleFlight(_Counters):
+    def __init__(self) -> None:
+        super().__init__()
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> tuple[Any, bool]:
+        """Run fn once per key at a time; returns (result, shared)."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> dict[str, int]:  # type: ignore[override]
+        return super().stats(len(self._calls))
+
+
+class AsyncSingleFlight(_Counters):
+    def __init__(self) -> None:
+        super().__init__()
+        self._tasks: dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        """Await fn() once per key at a time; returns (result, shared).
+
+        The shared call runs as its own task and every caller awaits it through
+        shield(), so one caller timing out or being cancelled doesn't cancel it
+        for the others.
+        """
+        task = self._tasks.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            task = self._tasks[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _t, k=key: self._tasks.pop(k, None))
+            self.calls += 1
+        return await asyncio.shield(task), shared
+
+    def stats(self) -> dict[str, int]:  # type: ignore[override]
+        return super().stats(len(self._tasks))
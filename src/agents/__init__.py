@@ -1,6 +1,10 @@
 """Agents for Pied Piper Legal Simulator"""
 from .clause_match_agent import ClauseMatchAgent
 from .narrative_agent import NarrativeAgent
+from .narrative_cache import NarrativeCache
+from .negotiation_simulator import NegotiationSimulator
+from .package_optimizer import PackageOptimizer
 
-__all__ = ["ClauseMatchAgent", "NarrativeAgent"]
+__all__ = ["ClauseMatchAgent", "NarrativeAgent", "NarrativeCache", "NegotiationSimulator",
+           "PackageOptimizer"]
 
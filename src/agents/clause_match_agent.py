@@ -1,21 +1,68 @@
 """ClauseMatchAgent: Matches conflicts to clauses with bias filtering"""
 import json
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional
 from pathlib import Path
 
+import config
+import timing
+from clause_store import ClauseStore
+from src.corpus.clause_index import ClauseIndex, StoreClauseIndex
+from .package_optimizer import PackageOptimizer
+
 
 class ClauseMatchAgent:
     """Matches episode conflicts to relevant clauses by bias type"""
     
-    def __init__(self, clauses_path: str = "data/clauses.json"):
+    def __init__(
+        self,
+        clauses_path: str = "data/clauses.json",
+        store_path: Optional[str] = config.CLAUSE_STORE_PATH
+    ):
+        """
+        Args:
+            clauses_path: Clause library JSON
+            store_path: Memory-mapped clause store; used instead of the JSON
+                (shared by all workers, rows decoded only when matched) if it
+                exists and was built from clauses_path
+        """
         self.clauses_path = Path(clauses_path)
-        self.clauses = self._load_clauses()
+        self.store = ClauseStore.open_if_fresh(store_path, clauses_path) if store_path else None
+        if self.store is not None:
+            self.clauses = self.store
+            self.index = StoreClauseIndex(self.store)
+        else:
+            self.clauses = self._load_clauses()
+            self.index = ClauseIndex(self.clauses)
+        self.optimizer = PackageOptimizer()
     
     def _load_clauses(self) -> List[Dict]:
         """Load clause library from JSON"""
         with open(self.clauses_path, 'r') as f:
             return json.load(f)
     
+    def reload(self, clauses: List[Dict], conflict_types: Iterable[str]) -> None:
+        """
+        Swap in a new version of the clause library (hot reload)
+        
+        Only the buckets of conflict_types are rebuilt. The index is replaced
+        with a single assignment, so a request that already matched against the
+        old index finishes on it.
+        
+        Args:
+            clauses: New clause list (parsed clauses.json)
+            conflict_types: Conflict types of every added, changed or removed clause
+        """
+        if isinstance(self.index, ClauseIndex):
+            index = self.index.updated(clauses, conflict_types)
+        else:
+            # the memory-mapped store no longer matches the JSON; serve the list
+            # until `python clause_store.py` rebuilds it and the app restarts
+            index = ClauseIndex(clauses)
+        self.index = index
+        self.clauses = clauses
+        self.store = None
+    
+    @timing.timed("match_clauses")
     def match_clauses(self, episode: Dict) -> Dict[str, List[Dict]]:
         """
         Return 3 clause sets for an episode: VC win, Founder win, Win-Win
@@ -26,29 +73,16 @@ class ClauseMatchAgent:
         Returns:
             Dict with keys: vc_win, founder_win, winwin
         """
-        conflict_type = episode.get("conflict_type")
-        
-        # Filter clauses by conflict type
-        relevant_clauses = [
-            c for c in self.clauses 
-            if c["conflict_type"] == conflict_type
-        ]
-        
-        # Separate by bias
-        vc_clauses = [c for c in relevant_clauses if c["bias"] == "VC_bias"]
-        founder_clauses = [c for c in relevant_clauses if c["bias"] == "Founder_bias"]
-        neutral_clauses = [c for c in relevant_clauses if c["bias"] == "Neutral"]
-        
-        return {
-            "vc_win": vc_clauses,
-            "founder_win": founder_clauses,
-            "winwin": neutral_clauses
-        }
+        return self.index.match(episode.get("conflict_type"))
     
+    @timing.timed("alignment_score")
     def get_alignment_score(self, clauses: List[Dict], perspective: str) -> int:
         """
         Calculate alignment score (0-100) for a set of clauses
         
+        Clause sets returned by match_clauses hit precomputed scores; any
+        other list is scored on the fly.
+        
         Args:
             clauses: List of clause dicts
             perspective: "vc" or "founder"
@@ -56,21 +90,22 @@ class ClauseMatchAgent:
         Returns:
             Alignment score 0-100
         """
-        if not clauses:
-            return 50
+        return self.index.alignment_score(clauses, perspective)
+    
+    @timing.timed("optimize_packages")
+    def optimize_packages(self, episode: Dict, top: int = 5) -> Dict:
+        """
+        Mixed clause packages for an episode: one clause per clause_type of its
+        conflict type, across all three biases
         
-        if perspective == "vc":
-            # Lower founder risk = higher VC alignment
-            avg_risk = sum(c["risk_score_founder"] for c in clauses) / len(clauses)
-            return int(avg_risk)
-        elif perspective == "founder":
-            # Lower VC risk = higher founder alignment
-            avg_risk = sum(c["risk_score_vc"] for c in clauses) / len(clauses)
-            return int(avg_risk)
-        else:
-            # Neutral: balance both scores
-            avg_founder_risk = sum(c["risk_score_founder"] for c in clauses) / len(clauses)
-            avg_vc_risk = sum(c["risk_score_vc"] for c in clauses) / len(clauses)
-            balance = 100 - abs(avg_founder_risk - avg_vc_risk)
-            return int(balance)
-
+        Args:
+            episode: Episode data with conflict_type
+            top: How many of the most balanced packages to return
+            
+        Returns:
+            PackageOptimizer.optimize result: Pareto frontier of VC vs founder
+            alignment plus the best balance packages
+        """
+        clause_sets = self.match_clauses(episode)
+        candidates = [c for scenario in clause_sets.values() for c in scenario]
+        return self.optimizer.optimize(candidates, top)
@@ -1,19 +1,33 @@
 """NarrativeAgent: Generates trade-off summaries for each scenario"""
-from typing import Dict, List
+import asyncio
+from typing import Dict, List, Optional
 import anthropic
 import config
+import scheduler
+import timing
+from singleflight import AsyncSingleFlight, SingleFlight
+from .narrative_cache import NarrativeCache
 
 
 class NarrativeAgent:
     """Generates natural language summaries of clause trade-offs"""
     
-    def __init__(self):
+    def __init__(self, cache: Optional[NarrativeCache] = None):
+        self.cache = cache
+        
+        # Identical in-flight requests share one LLM call
+        self._flight = SingleFlight()
+        self._async_flight = AsyncSingleFlight()
+        
         # Only initialize if API key is available
         if config.ANTHROPIC_API_KEY:
             self.client = anthropic.Anthropic(api_key=config.ANTHROPIC_API_KEY)
+            self.async_client = anthropic.AsyncAnthropic(api_key=config.ANTHROPIC_API_KEY)
         else:
             self.client = None
+            self.async_client = None
     
+    @timing.timed("narrative")
     def summarize_scenario(
         self, 
         episode: Dict, 
@@ -31,6 +45,156 @@ class NarrativeAgent:
         Returns:
             Natural language summary of trade-offs
         """
+        prompt = self._build_prompt(episode, clauses, scenario_type)
+        
+        # Use fallback if no API key configured
+        if not self.client:
+            return self._fallback_summary(clauses, scenario_type)
+        
+        cache_key, cached = self._cache_lookup(episode, clauses, scenario_type)
+        if cached is not None:
+            return cached
+        
+        def generate() -> str:
+            # Overloaded (queue full / deadline) falls through to the fallback below
+            with timing.span("narrative.llm"), scheduler.limiter("anthropic").slot():
+                message = self.client.messages.create(
+                    model=config.NARRATIVE_MODEL,
+                    max_tokens=300,
+                    temperature=config.TEMPERATURE,
+                    messages=[{"role": "user", "content": prompt}]
+                )
+            return self._cache_store(cache_key, message.content[0].text, episode, clauses)
+        
+        try:
+            narrative, _ = self._flight.do(cache_key, generate)
+            return narrative
+        except Exception as e:
+            # Fallback if API fails
+            return self._fallback_summary(clauses, scenario_type)
+    
+    @timing.timed("narrative")
+    async def asummarize_scenario(
+        self,
+        episode: Dict,
+        clauses: List[Dict],
+        scenario_type: str,
+        timeout: float = config.NARRATIVE_TIMEOUT
+    ) -> str:
+        """
+        Non-blocking summarize_scenario using the async Anthropic client
+        
+        Falls back to _fallback_summary on missing key, API error or timeout.
+        """
+        if not self.async_client:
+            return self._fallback_summary(clauses, scenario_type)
+        
+        cache_key, cached = await self._acache_lookup(episode, clauses, scenario_type)
+        if cached is not None:
+            return cached
+        
+        prompt = self._build_prompt(episode, clauses, scenario_type)
+        
+        async def generate() -> str:
+            # Overloaded (queue full / deadline) falls through to the fallback below
+            with timing.span("narrative.llm"):
+                async with scheduler.limiter("anthropic").aslot():
+                    message = await asyncio.wait_for(
+                        self.async_client.messages.create(
+                            model=config.NARRATIVE_MODEL,
+                            max_tokens=300,
+                            temperature=config.TEMPERATURE,
+                            messages=[{"role": "user", "content": prompt}]
+                        ),
+                        timeout=timeout
+                    )
+            return await self._acache_store(cache_key, message.content[0].text, episode, clauses)
+        
+        try:
+            narrative, _ = await self._async_flight.do(cache_key, generate)
+            return narrative
+        except Exception:
+            return self._fallback_summary(clauses, scenario_type)
+    
+    async def summarize_scenarios(
+        self,
+        episode: Dict,
+        clause_sets: Dict[str, List[Dict]],
+        deadline: Optional[float] = config.NARRATIVE_DEADLINE
+    ) -> Dict[str, str]:
+        """
+        Generate narratives for all non-empty scenarios concurrently
+        
+        Args:
+            episode: Episode data
+            clause_sets: Output of ClauseMatchAgent.match_clauses
+            deadline: Seconds for the whole fan-out; scenarios still running
+                after it get _fallback_summary
+            
+        Returns:
+            Dict of scenario_type -> narrative (empty scenarios are skipped)
+        """
+        tasks = {
+            scenario_type: asyncio.ensure_future(
+                self.asummarize_scenario(episode, clauses, scenario_type)
+            )
+            for scenario_type, clauses in clause_sets.items()
+            if clauses
+        }
+        if not tasks:
+            return {}
+        
+        done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+        for task in pending:
+            task.cancel()
+        
+        return {
+            scenario_type: (
+                task.result() if task in done
+                else self._fallback_summary(clause_sets[scenario_type], scenario_type)
+            )
+            for scenario_type, task in tasks.items()
+        }
+    
+    def _cache_lookup(self, episode: Dict, clauses: List[Dict], scenario_type: str):
+        """Return (cache_key, cached narrative or None); the key also drives coalescing"""
+        cache_key = NarrativeCache.key(episode, clauses, scenario_type)
+        if self.cache is None:
+            return cache_key, None
+        return cache_key, self.cache.get(cache_key)
+    
+    def _cache_store(self, cache_key: str, narrative: str, episode: Dict, clauses: List[Dict]) -> str:
+        """Remember an LLM narrative (fallbacks are never cached)"""
+        if self.cache is not None:
+            self.cache.set(
+                cache_key, narrative, episode.get("episode_id"), [c["clause_id"] for c in clauses]
+            )
+        return narrative
+    
+    async def _acache_lookup(self, episode: Dict, clauses: List[Dict], scenario_type: str):
+        """_cache_lookup without blocking the event loop on DuckDB"""
+        cache_key = NarrativeCache.key(episode, clauses, scenario_type)
+        if self.cache is None:
+            return cache_key, None
+        return cache_key, await self.cache.aget(cache_key)
+    
+    async def _acache_store(self, cache_key: str, narrative: str, episode: Dict, clauses: List[Dict]) -> str:
+        """_cache_store without blocking the event loop on DuckDB"""
+        if self.cache is not None:
+            await self.cache.aset(
+                cache_key, narrative, episode.get("episode_id"), [c["clause_id"] for c in clauses]
+            )
+        return narrative
+    
+    def flight_stats(self) -> Dict:
+        """Coalescing counters (sync and async paths)"""
+        return {
+            "sync": self._flight.stats(),
+            "async": self._async_flight.stats()
+        }
+    
+    def _build_prompt(self, episode: Dict, clauses: List[Dict], scenario_type: str) -> str:
+        """Build the Claude prompt for one scenario"""
         # Build context for Claude
         episode_context = f"""
 Episode: {episode['episode_id']} - {episode['title']}
@@ -65,22 +229,7 @@ Write a concise 2-3 sentence summary explaining:
 3. The key trade-off or risk in this scenario
 
 Keep it conversational and reference the show's context. Use "you" for Richard's perspective."""
-
-        # Use fallback if no API key configured
-        if not self.client:
-            return self._fallback_summary(clauses, scenario_type)
-        
-        try:
-            message = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=300,
-                temperature=config.TEMPERATURE,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            return message.content[0].text
-        except Exception as e:
-            # Fallback if API fails
-            return self._fallback_summary(clauses, scenario_type)
+        return prompt
     
     def _fallback_summary(self, clauses: List[Dict], scenario_type: str) -> str:
         """Generate simple summary without AI if API unavailable"""
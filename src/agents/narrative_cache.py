@@ -0,0 +1,158 @@
+"""NarrativeCache: Memoizes generated narratives across requests and restarts"""
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import config
+from cache import TTLCache
+
+
+class NarrativeCache:
+    """In-memory LRU in front of the DuckDB narrative_cache table"""
+
+    def __init__(
+        self,
+        db=None,
+        clauses_path: str = "data/clauses.json",
+        maxsize: int = config.NARRATIVE_CACHE_SIZE,
+        ttl: float = config.NARRATIVE_CACHE_TTL
+    ):
+        self.db = db
+        self.ttl = ttl
+        self.memory = TTLCache(maxsize, ttl)
+        self.db_hits = 0
+        self.clauses_version = self.file_version(clauses_path)
+
+        # Rows generated from an older clauses.json can never be hit again
+        if self.db is not None:
+            self.db.invalidate_narratives(keep_version=self.clauses_version)
+
+    @staticmethod
+    def file_version(path: str) -> str:
+        """Content hash of a corpus file ("" if missing)"""
+        try:
+            return NarrativeCache.content_version(Path(path).read_bytes())
+        except OSError:
+            return ""
+
+    @staticmethod
+    def content_version(data: bytes) -> str:
+        """file_version of already-read file contents"""
+        return hashlib.sha1(data).hexdigest()[:16]
+
+    @staticmethod
+    def key(episode: Dict, clauses: List[Dict], scenario_type: str) -> str:
+        """
+        Content hash of everything that determines the prompt and its sampling
+
+        Args:
+            episode: Episode row
+            clauses: Clause set for the scenario
+            scenario_type: "vc_win", "founder_win", or "winwin"
+
+        Returns:
+            Hex digest usable as a cache key
+        """
+        payload = json.dumps(
+            [episode, clauses, scenario_type, config.NARRATIVE_MODEL, config.TEMPERATURE],
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up memory first, then DuckDB (promoting DB hits to memory)"""
+        narrative = self.memory.get(key)
+        if narrative is not None or self.db is None:
+            return narrative
+
+        try:
+            narrative = self.db.get_cached_narrative(key, max_age=self.ttl)
+        except Exception:
+            return None
+        if narrative is not None:
+            self.db_hits += 1
+            self.memory.set(key, narrative)
+        return narrative
+
+    def set(
+        self,
+        key: str,
+        narrative: str,
+        episode_id: Optional[str] = None,
+        clause_ids: Optional[List[str]] = None
+    ):
+        """Store a freshly generated narrative (tagged with what it was generated from)"""
+        self.memory.set(key, narrative)
+        if self.db is not None:
+            try:
+                self.db.save_cached_narrative(
+                    key, narrative, self.clauses_version, episode_id, clause_ids
+                )
+            except Exception:
+                pass
+
+    async def aget(self, key: str) -> Optional[str]:
+        """get for the event loop: a memory miss reads DuckDB on the DB thread pool"""
+        narrative = self.memory.get(key)
+        if narrative is not None or self.db is None:
+            return narrative
+
+        try:
+            narrative = await self.db.aget_cached_narrative(key, self.ttl)
+        except Exception:
+            return None
+        if narrative is not None:
+            self.db_hits += 1
+            self.memory.set(key, narrative)
+        return narrative
+
+    async def aset(
+        self,
+        key: str,
+        narrative: str,
+        episode_id: Optional[str] = None,
+        clause_ids: Optional[List[str]] = None
+    ):
+        """set for the event loop: the DuckDB write runs on the DB thread pool"""
+        self.memory.set(key, narrative)
+        if self.db is not None:
+            try:
+                await self.db.asave_cached_narrative(
+                    key, narrative, self.clauses_version, episode_id, clause_ids
+                )
+            except Exception:
+                pass
+
+    def on_corpus_change(self, clauses_version: str, episode_ids, clause_ids) -> int:
+        """
+        Hot reload: drop stored narratives of the touched episodes / clauses
+
+        Keys hash the full prompt inputs, so in-memory entries for edited content
+        can no longer be hit and simply age out; only the DuckDB rows need
+        deleting. The remaining rows move to the new version so the next
+        startup keeps them.
+
+        Returns:
+            Number of DuckDB rows deleted
+        """
+        self.clauses_version = clauses_version
+        if self.db is None:
+            return 0
+        return self.db.invalidate_narratives_for(
+            sorted(episode_ids), sorted(clause_ids), keep_version=clauses_version
+        )
+
+    def invalidate(self):
+        """Drop every cached narrative (memory and DuckDB)"""
+        self.memory.clear()
+        if self.db is not None:
+            self.db.invalidate_narratives()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for monitoring"""
+        return {
+            **self.memory.stats(),
+            "db_hits": self.db_hits,
+            "clauses_version": self.clauses_version
+        }
@@ -0,0 +1,310 @@
+"""NegotiationSimulator: Monte Carlo negotiation outcomes over clause risk scores"""
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import config
+import timing
+from cache import TTLCache
+
+# VC ownership moves by this much per accepted clause, scaled by its risk gap
+DILUTION_STEP = 0.05
+BASE_VC_OWNERSHIP = 0.25
+
+# clause_type keyword -> economics: liquidation clauses set the preference
+# multiple, anti-dilution clauses move ownership twice as hard
+LIQUIDATION_KEYWORD = "liquidation"
+ANTI_DILUTION_KEYWORD = "anti-dilution"
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Payoffs are histogrammed on log-spaced bins ($M) instead of kept per sample,
+# so memory is independent of the sample count (~0.25% percentile error)
+PAYOFF_EDGES = np.geomspace(1e-3, 1e5, 4001)
+
+# Approximate bytes per sampled negotiation and clause (uniforms, acceptance
+# probabilities, mask, its float copy, preference product) plus per-negotiation vectors
+_BYTES_PER_CELL = 4 * 8 + 1
+_BYTES_PER_ROW = 24 * 8
+
+
+def clause_arrays(clauses: List[Dict]) -> Dict[str, np.ndarray]:
+    """
+    Per-clause model inputs
+
+    Args:
+        clauses: Candidate clauses for one conflict type
+
+    Returns:
+        Dict of float arrays: founder_risk / vc_risk (0-1), preference (the
+        liquidation multiple a clause imposes, 0 if none), shift (VC ownership
+        change when accepted)
+    """
+    founder_risk = np.array([c["risk_score_founder"] for c in clauses], dtype=np.float64) / 100
+    vc_risk = np.array([c["risk_score_vc"] for c in clauses], dtype=np.float64) / 100
+    kinds = [c.get("clause_type", "").lower() for c in clauses]
+    liquidation = np.array([LIQUIDATION_KEYWORD in k for k in kinds])
+    weight = np.array([2.0 if ANTI_DILUTION_KEYWORD in k else 1.0 for k in kinds])
+    return {
+        "founder_risk": founder_risk,
+        "vc_risk": vc_risk,
+        "preference": np.where(liquidation, 1 + founder_risk, 0.0),
+        "shift": (founder_risk - vc_risk) * DILUTION_STEP * weight
+    }
+
+
+def empty_totals(n_clauses: int) -> Dict[str, np.ndarray]:
+    """Accumulator for simulate_batches (every field is summed when merging)"""
+    return {
+        "samples": np.zeros(1, dtype=np.int64),
+        "wins": np.zeros(3, dtype=np.int64),                # vc, founder, draw
+        "alignment": np.zeros((3, 101), dtype=np.int64),    # vc, founder, balance
+        "accepted": np.zeros(n_clauses, dtype=np.int64),
+        "payoff_hist": np.zeros((3, len(PAYOFF_EDGES) + 1), dtype=np.int64),  # founder, vc, exit
+        "payoff_sum": np.zeros(3, dtype=np.float64)
+    }
+
+
+def merge_totals(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    return {k: sum(p[k] for p in parts) for k in parts[0]}
+
+
+def simulate_batches(
+    arrays: Dict[str, np.ndarray],
+    params: Dict,
+    batches: List[Tuple[np.random.SeedSequence, int]]
+) -> Dict[str, np.ndarray]:
+    """
+    Run (seed, size) batches and return their summed totals (process-pool entry)
+
+    Each negotiation draws the VC's leverage L ~ Beta around params["vc_leverage"];
+    a side rejects a clause with probability risk-to-that-side × its own
+    leverage, so a clause lands with (1 - founder_risk·(1-L)) · (1 - vc_risk·L).
+    Accepted clauses are scored like get_alignment_score, and an exit drawn
+    from a lognormal is split by VC ownership (moved by each accepted clause)
+    and the highest accepted liquidation preference.
+    """
+    totals = empty_totals(len(arrays["founder_risk"]))
+    founder_risk, vc_risk = arrays["founder_risk"], arrays["vc_risk"]
+    scored = np.stack([founder_risk, vc_risk, np.ones_like(founder_risk)], axis=1) * [100, 100, 1]
+    concentration = params["leverage_concentration"]
+    alpha = params["vc_leverage"] * concentration
+    beta = (1 - params["vc_leverage"]) * concentration
+
+    for seed, size in batches:
+        rng = np.random.default_rng(seed)
+        leverage = rng.beta(alpha, beta, size)[:, None]
+        p_accept = (1 - founder_risk * (1 - leverage)) * (1 - vc_risk * leverage)
+        accepted = rng.random((size, len(founder_risk))) < p_accept
+        del p_accept
+
+        # founder risk total, vc risk total, clause count per negotiation
+        founder_total, vc_total, count = (accepted.astype(np.float64) @ scored).T
+        has_terms = count > 0
+        safe = np.where(has_terms, count, 1)
+        vc_align = np.where(has_terms, np.floor(founder_total / safe), 50).astype(np.int64)
+        founder_align = np.where(has_terms, np.floor(vc_total / safe), 50).astype(np.int64)
+        balance = np.where(
+            has_terms, np.floor(100 - np.abs(founder_total - vc_total) / safe), 50
+        ).astype(np.int64)
+
+        totals["samples"][0] += size
+        totals["wins"] += [
+            np.count_nonzero(vc_align > founder_align),
+            np.count_nonzero(vc_align < founder_align),
+            np.count_nonzero(vc_align == founder_align)
+        ]
+        for row, values in enumerate((vc_align, founder_align, balance)):
+            totals["alignment"][row] += np.bincount(values, minlength=101)
+        totals["accepted"] += accepted.sum(axis=0)
+
+        exit_value = params["exit_median_musd"] * np.exp(params["exit_sigma"] * rng.standard_normal(size))
+        ownership = np.clip(BASE_VC_OWNERSHIP + accepted @ arrays["shift"], 0, 1)
+        multiple = np.maximum(1.0, (accepted * arrays["preference"]).max(axis=1, initial=0))
+        vc_payoff = np.minimum(exit_value, np.maximum(params["invested_musd"] * multiple,
+                                                      ownership * exit_value))
+        for row, values in enumerate((exit_value - vc_payoff, vc_payoff, exit_value)):
+            totals["payoff_hist"][row] += np.bincount(
+                np.searchsorted(PAYOFF_EDGES, values), minlength=len(PAYOFF_EDGES) + 1
+            )
+            totals["payoff_sum"][row] += values.sum()
+    return totals
+
+
+def _histogram_percentiles(counts: np.ndarray, values: np.ndarray) -> Dict[str, float]:
+    cumulative = np.cumsum(counts)
+    ranks = [math.ceil(q / 100 * cumulative[-1]) for q in PERCENTILES]
+    return {
+        f"p{q}": round(float(values[np.searchsorted(cumulative, max(r, 1))]), 2)
+        for q, r in zip(PERCENTILES, ranks)
+    }
+
+
+class NegotiationSimulator:
+    """
+    Seeded, vectorized Monte Carlo over an episode's candidate clauses
+
+    Samples run in NumPy batches sized to memory_mb; runs of at least
+    parallel_min samples are split across a process pool when workers > 1.
+    Batches get their own seeds from SeedSequence(seed), so a result depends
+    only on (clauses, parameters, seed, memory budget), never on the number of
+    workers. Results are deterministic and therefore memoized.
+    """
+
+    def __init__(
+        self,
+        memory_mb: float = config.MONTE_CARLO_MEMORY_MB,
+        workers: int = config.MONTE_CARLO_WORKERS,
+        parallel_min: int = config.MONTE_CARLO_PARALLEL_MIN,
+        cache_size: int = 128
+    ):
+        self.memory_bytes = int(memory_mb * 2**20)
+        self.workers = workers
+        self.parallel_min = parallel_min
+        self.cache = TTLCache(cache_size, ttl=0)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def batch_size(self, n_clauses: int) -> int:
+        """Negotiations per batch within the memory budget"""
+        per_row = n_clauses * _BYTES_PER_CELL + _BYTES_PER_ROW
+        return int(min(1 << 20, max(1024, self.memory_bytes // per_row)))
+
+    def _executor(self) -> ProcessPoolExecutor:
+        # spawn: forking a process that runs DuckDB and writer threads is unsafe
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def close(self, wait: bool = True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+    def _run_parallel(self, arrays: Dict, params: Dict, batches: List, workers: int) -> Dict:
+        chunks = [batches[i::workers] for i in range(workers)]
+        futures = [self._executor().submit(simulate_batches, arrays, params, chunk)
+                   for chunk in chunks]
+        return merge_totals([f.result() for f in futures])
+
+    @timing.timed("monte_carlo")
+    def simulate(
+        self,
+        clauses: List[Dict],
+        samples: int = 100_000,
+        seed: int = 0,
+        vc_leverage: float = 0.5,
+        leverage_concentration: float = 4.0,
+        exit_median_musd: float = 50.0,
+        exit_sigma: float = 1.0,
+        invested_musd: float = 10.0
+    ) -> Dict:
+        """
+        Sample negotiations and summarize the outcome distributions
+
+        Args:
+            clauses: Candidate clauses (every bias) for one conflict type
+            samples: Number of negotiations
+            seed: Seed for reproducibility
+            vc_leverage: Mean VC bargaining power in (0, 1); founders have the rest
+            leverage_concentration: Beta concentration (higher = less uncertain)
+            exit_median_musd: Median exit value ($M, lognormal)
+            exit_sigma: Lognormal sigma of the exit value
+            invested_musd: VC investment the liquidation preference multiplies
+
+        Returns:
+            Dict with win_probability, expected_alignment, alignment_percentiles,
+            payoff_musd (founder / vc / exit: mean + percentiles),
+            clause_acceptance and run metadata
+        """
+        params = {
+            "vc_leverage": vc_leverage,
+            "leverage_concentration": leverage_concentration,
+            "exit_median_musd": exit_median_musd,
+            "exit_sigma": exit_sigma,
+            "invested_musd": invested_musd
+        }
+        # every model input, not just clause_ids: a hot-reloaded clause must miss
+        key = (tuple((c["clause_id"], c["clause_type"], c["bias"], c["risk_score_founder"],
+                      c["risk_score_vc"]) for c in clauses),
+               samples, seed, self.memory_bytes, tuple(sorted(params.items())))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        started = time.perf_counter()
+        arrays = clause_arrays(clauses)
+        size = self.batch_size(len(clauses))
+        sizes = [size] * (samples // size) + ([samples % size] if samples % size else [])
+        batches = list(zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes))
+
+        workers = max(1, min(self.workers, len(batches))) if samples >= self.parallel_min else 1
+        totals = None
+        if workers > 1:
+            try:
+                totals = self._run_parallel(arrays, params, batches, workers)
+            except BrokenProcessPool as e:
+                # a dead worker breaks the pool for good: drop it (the next
+                # parallel run starts a fresh one) and finish in-process
+                print(f"⚠️  Monte Carlo pool failed, running in-process: {e}")
+                self.close(wait=False)
+                workers = 1
+        if totals is None:
+            totals = simulate_batches(arrays, params, batches)
+
+        result = self._summarize(clauses, totals)
+        result.update({
+            "samples": samples,
+            "seed": seed,
+            "parameters": params,
+            "batches": len(batches),
+            "batch_size": size,
+            "workers": workers,
+            "seconds": round(time.perf_counter() - started, 4)
+        })
+        self.cache.set(key, result)
+        return result
+
+    @staticmethod
+    def _summarize(clauses: List[Dict], totals: Dict[str, np.ndarray]) -> Dict:
+        n = int(totals["samples"][0])
+        scores = np.arange(101)
+        # geometric bin midpoints; underflow reports 0, overflow the top edge
+        mids = np.concatenate((
+            [0.0], np.sqrt(PAYOFF_EDGES[:-1] * PAYOFF_EDGES[1:]), PAYOFF_EDGES[-1:]
+        ))
+        return {
+            "win_probability": {
+                side: round(int(count) / n, 4)
+                for side, count in zip(("vc", "founder", "draw"), totals["wins"])
+            },
+            "expected_alignment": {
+                side: round(float(hist @ scores) / n, 2)
+                for side, hist in zip(("vc", "founder", "balance"), totals["alignment"])
+            },
+            "alignment_percentiles": {
+                side: _histogram_percentiles(hist, scores)
+                for side, hist in zip(("vc", "founder", "balance"), totals["alignment"])
+            },
+            "payoff_musd": {
+                side: {"mean": round(float(total) / n, 2), **_histogram_percentiles(hist, mids)}
+                for side, hist, total in zip(
+                    ("founder", "vc", "exit"), totals["payoff_hist"], totals["payoff_sum"]
+                )
+            },
+            "clause_acceptance": [
+                {
+                    "clause_id": c["clause_id"],
+                    "clause_type": c["clause_type"],
+                    "bias": c["bias"],
+                    "probability": round(int(accepted) / n, 4)
+                }
+                for c, accepted in zip(clauses, totals["accepted"])
+            ]
+        }
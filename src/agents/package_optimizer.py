@@ -0,0 +1,183 @@
+"""PackageOptimizer: Pareto frontier of mixed clause packages for a conflict type"""
+import math
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+import config
+from src.corpus.clause_index import scores_from_totals
+
+
+def pareto_mask(founder_totals: np.ndarray, vc_totals: np.ndarray) -> np.ndarray:
+    """
+    Non-dominated points when maximizing both totals (one per distinct point)
+
+    Args:
+        founder_totals: Summed risk_score_founder per package (= VC alignment)
+        vc_totals: Summed risk_score_vc per package (= founder alignment)
+
+    Returns:
+        Boolean mask over the packages
+    """
+    # Best founder total first, ties by best vc total; a point survives only if
+    # its vc total beats every point ahead of it
+    order = np.lexsort((-vc_totals, -founder_totals))
+    vc_sorted = vc_totals[order]
+    best_before = np.maximum.accumulate(np.concatenate(([np.iinfo(np.int64).min], vc_sorted[:-1])))
+    mask = np.zeros(len(order), dtype=bool)
+    mask[order[vc_sorted > best_before]] = True
+    return mask
+
+
+def best_per_difference(
+    founder_totals: np.ndarray,
+    vc_totals: np.ndarray
+) -> np.ndarray:
+    """
+    For every distinct founder-vc total difference, the package with the highest
+    combined total (balance only depends on the difference)
+
+    Returns:
+        Indices of the kept packages
+    """
+    diff = founder_totals - vc_totals
+    order = np.lexsort((-(founder_totals + vc_totals), diff))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = diff[order][1:] != diff[order][:-1]
+    return order[first]
+
+
+class PackageOptimizer:
+    """
+    Packages take one clause per clause_type of a conflict type; a package's
+    alignment is get_alignment_score over its clauses. Small spaces are
+    enumerated outright with broadcast sums; past max_enumerate the product is
+    never materialized and the search grows packages one clause_type at a time,
+    dropping dominated partial packages after each step:
+
+    - frontier: a partial package dominated on both risk totals can't complete
+      into a frontier package (the same remaining picks complete the dominator)
+    - balance: partials with the same founder-vc difference can only complete
+      to the same balance, so only the one with the highest total is kept
+
+    Each clause_type's own candidates are pruned by the same rule first. Risk
+    scores are integers in 0-100, so both sets stay bounded by 201 × number of
+    clause_types however many clauses there are.
+    """
+
+    def __init__(self, max_enumerate: int = config.PACKAGE_ENUMERATE_LIMIT):
+        self.max_enumerate = max_enumerate
+
+    @staticmethod
+    def group(clauses: List[Dict]) -> Tuple[List[str], List[List[Dict]]]:
+        """Candidate clauses per clause_type, types in first-seen order"""
+        groups: Dict[str, List[Dict]] = {}
+        for c in clauses:
+            groups.setdefault(c["clause_type"], []).append(c)
+        return list(groups), list(groups.values())
+
+    def optimize(self, clauses: List[Dict], top: int = 5) -> Dict:
+        """
+        Pareto frontier and most balanced packages
+
+        Args:
+            clauses: Every clause matched for one conflict type
+            top: How many balanced packages to return
+
+        Returns:
+            Dict with keys: clause_types, packages_total, method, evaluated,
+            frontier and balanced (lists of {"clauses", "alignment"}, the
+            frontier ordered from best VC to best founder alignment)
+        """
+        types, groups = self.group(clauses)
+        total = math.prod(len(g) for g in groups) if groups else 0
+        result = {
+            "clause_types": types,
+            "packages_total": total,
+            "method": "enumerate" if total <= self.max_enumerate else "pruned_search",
+            "evaluated": 0,
+            "frontier": [],
+            "balanced": []
+        }
+        if not groups:
+            return result
+
+        founder = [np.array([c["risk_score_founder"] for c in g], dtype=np.int64) for g in groups]
+        vc = [np.array([c["risk_score_vc"] for c in g], dtype=np.int64) for g in groups]
+        if total <= self.max_enumerate:
+            picks, f_tot, v_tot = self._enumerate(founder, vc)
+            result["evaluated"] = total
+            frontier = np.flatnonzero(pareto_mask(f_tot, v_tot))
+            balanced = best_per_difference(f_tot, v_tot)
+            frontier_set = (picks[frontier], f_tot[frontier], v_tot[frontier])
+            balanced_set = (picks[balanced], f_tot[balanced], v_tot[balanced])
+        else:
+            frontier_set, n_frontier = self._search(founder, vc, pareto_mask)
+            balanced_set, n_balanced = self._search(founder, vc, best_per_difference)
+            result["evaluated"] = n_frontier + n_balanced
+
+        n_types = len(groups)
+        picks, f_tot, v_tot = frontier_set
+        order = np.lexsort((v_tot, -f_tot))
+        result["frontier"] = [
+            self._package(groups, picks[i], f_tot[i], v_tot[i], n_types) for i in order
+        ]
+        picks, f_tot, v_tot = balanced_set
+        order = np.lexsort((-(f_tot + v_tot), np.abs(f_tot - v_tot)))[:top]
+        result["balanced"] = [
+            self._package(groups, picks[i], f_tot[i], v_tot[i], n_types) for i in order
+        ]
+        return result
+
+    @staticmethod
+    def _enumerate(
+        founder: List[np.ndarray],
+        vc: List[np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Every package: (picks [packages × types], founder totals, vc totals)"""
+        shape = tuple(len(f) for f in founder)
+        f_tot = np.zeros(shape, dtype=np.int64)
+        v_tot = np.zeros(shape, dtype=np.int64)
+        for axis, (f, v) in enumerate(zip(founder, vc)):
+            view = [1] * len(shape)
+            view[axis] = -1
+            f_tot = f_tot + f.reshape(view)
+            v_tot = v_tot + v.reshape(view)
+        picks = np.stack(np.unravel_index(np.arange(f_tot.size), shape), axis=1)
+        return picks, f_tot.ravel(), v_tot.ravel()
+
+    @staticmethod
+    def _search(founder: List[np.ndarray], vc: List[np.ndarray], keep) -> Tuple[Tuple, int]:
+        """
+        Extend partial packages one clause_type at a time, keeping keep(f, v)
+        (a mask or indices) among each type's clauses and among the extended
+        partials
+
+        Returns:
+            ((picks, founder totals, vc totals), partial packages evaluated)
+        """
+        picks = np.zeros((1, 0), dtype=np.int64)
+        f_tot = np.zeros(1, dtype=np.int64)
+        v_tot = np.zeros(1, dtype=np.int64)
+        evaluated = 0
+        for f, v in zip(founder, vc):
+            options = np.arange(len(f))[keep(f, v)]
+            f, v = f[options], v[options]
+            n, k = len(f_tot), len(f)
+            f_tot = (f_tot[:, None] + f[None, :]).ravel()
+            v_tot = (v_tot[:, None] + v[None, :]).ravel()
+            picks = np.concatenate(
+                (np.repeat(picks, k, axis=0), np.tile(options, n)[:, None]), axis=1
+            )
+            evaluated += len(f_tot)
+            kept = keep(f_tot, v_tot)
+            picks, f_tot, v_tot = picks[kept], f_tot[kept], v_tot[kept]
+        return (picks, f_tot, v_tot), evaluated
+
+    @staticmethod
+    def _package(groups: List[List[Dict]], picks: np.ndarray, founder_total: int,
+                 vc_total: int, n_types: int) -> Dict:
+        return {
+            "clauses": [groups[t][int(i)] for t, i in enumerate(picks)],
+            "alignment": scores_from_totals(n_types, int(founder_total), int(vc_total))
+        }
@@ -0,0 +1,12 @@
+"""Corpus helpers shared by app.py, api/index.py and the precompute CLI (stdlib only)"""
+from .bundle import BUNDLE_FORMAT, CorpusBundle
+from .clause_index import SCENARIO_BIAS, ClauseIndex, StoreClauseIndex, alignment_scores
+from .export import EMPTY_SCENARIO, render_export_markdown
+from .simulation import NO_CLAUSES, assemble_simulation
+from .snapshot import SNAPSHOT_FORMAT, Snapshot, corpus_version
+
+__all__ = [
+    "BUNDLE_FORMAT", "EMPTY_SCENARIO", "NO_CLAUSES", "SCENARIO_BIAS", "SNAPSHOT_FORMAT",
+    "ClauseIndex", "CorpusBundle", "Snapshot", "StoreClauseIndex", "alignment_scores",
+    "assemble_simulation", "corpus_version", "render_export_markdown",
+]
@@ -0,0 +1,105 @@
+"""Prebuilt binary corpus bundle for cold starts (written by precompute.py)"""
+import json
+import pickle
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .clause_index import ClauseIndex
+from .snapshot import Snapshot, corpus_version
+
+# Bump when the bundle layout changes; older files are ignored, not misread
+BUNDLE_FORMAT = 1
+
+
+class CorpusBundle:
+    """
+    Episodes, clauses, the built ClauseIndex (buckets, per-conflict matches,
+    alignment scores) and the snapshot payload, pickled into one file
+    
+    Loading is a single read + unpickle instead of parsing both JSON files and
+    rebuilding the index. The file is a build artifact from this repo (pickle
+    must never be loaded from an untrusted source).
+    """
+    
+    def __init__(
+        self,
+        episodes: List[Dict],
+        clauses: List[Dict],
+        index: Optional[ClauseIndex] = None,
+        snapshot: Optional[Dict] = None,
+        meta: Optional[Dict] = None
+    ):
+        self.meta = meta or {}
+        self.episodes = episodes
+        self.clauses = clauses
+        self.index = index or ClauseIndex(clauses)
+        self.snapshot_payload = snapshot
+        self.episodes_by_id = {e["episode_id"]: e for e in episodes}
+    
+    @classmethod
+    def build(cls, data_dir, snapshot: Optional[Snapshot] = None) -> "CorpusBundle":
+        """Parse the corpus JSON files and build every derived structure"""
+        data_dir = Path(data_dir)
+        episodes = json.loads((data_dir / "episodes.json").read_text())
+        clauses = json.loads((data_dir / "clauses.json").read_text())
+        payload = None
+        if snapshot is not None and len(snapshot):
+            payload = {
+                "meta": snapshot.meta,
+                "simulations": snapshot.simulations,
+                "exports": snapshot.exports
+            }
+        meta = {
+            "format": BUNDLE_FORMAT,
+            "corpus_version": corpus_version(data_dir),
+            "built_at": int(time.time())
+        }
+        return cls(episodes, clauses, snapshot=payload, meta=meta)
+    
+    def write(self, path) -> Path:
+        """Atomically write the bundle (readers never see a half-written file)"""
+        path = Path(path)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_bytes(pickle.dumps({
+            "meta": self.meta,
+            "episodes": self.episodes,
+            "clauses": self.clauses,
+            "index": self.index,
+            "snapshot": self.snapshot_payload
+        }, protocol=pickle.HIGHEST_PROTOCOL))
+        tmp.replace(path)
+        return path
+    
+    @classmethod
+    def load(cls, path, data_dir) -> Optional["CorpusBundle"]:
+        """
+        Load a bundle, discarding it unless it matches the current corpus
+        
+        Args:
+            path: Bundle file
+            data_dir: Directory holding episodes.json / clauses.json
+        
+        Returns:
+            CorpusBundle, or None when missing, unreadable or stale
+        """
+        try:
+            payload = pickle.loads(Path(path).read_bytes())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️  Ignoring unreadable corpus bundle {path}: {e}")
+            return None
+        
+        meta = payload.get("meta", {})
+        if meta.get("format") != BUNDLE_FORMAT or meta.get("corpus_version") != corpus_version(data_dir):
+            print(f"⚠️  Ignoring stale corpus bundle {path}")
+            return None
+        return cls(
+            payload["episodes"], payload["clauses"], payload["index"],
+            snapshot=payload.get("snapshot"), meta=meta
+        )
+    
+    def snapshot(self) -> Snapshot:
+        """Snapshot bundled at build time (empty if there was none)"""
+        return Snapshot(self.snapshot_payload)
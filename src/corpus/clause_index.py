@@ -0,0 +1,187 @@
+"""Clauses bucketed by (conflict_type, bias) with precomputed alignment scores"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from cache import TTLCache
+
+# Scenario -> clause bias that wins it
+SCENARIO_BIAS = {
+    "vc_win": "VC_bias",
+    "founder_win": "Founder_bias",
+    "winwin": "Neutral"
+}
+
+NEUTRAL_SCORES = {"vc": 50, "founder": 50, "balance": 50}
+
+
+def alignment_scores(clauses: List[Dict]) -> Dict[str, int]:
+    """
+    VC / founder / balance alignment (0-100) for a clause set
+    
+    Same math as ClauseMatchAgent.get_alignment_score: VC alignment is the mean
+    founder risk, founder alignment the mean VC risk, balance 100 minus their gap.
+    """
+    if not clauses:
+        return dict(NEUTRAL_SCORES)
+    
+    return scores_from_totals(
+        len(clauses),
+        sum(c["risk_score_founder"] for c in clauses),
+        sum(c["risk_score_vc"] for c in clauses)
+    )
+
+
+def scores_from_totals(count: int, founder_risk_total: int, vc_risk_total: int) -> Dict[str, int]:
+    """alignment_scores from a clause count and risk-score sums (e.g. a ClauseStore bucket)"""
+    if not count:
+        return dict(NEUTRAL_SCORES)
+    
+    avg_founder_risk = founder_risk_total / count
+    avg_vc_risk = vc_risk_total / count
+    return {
+        "vc": int(avg_founder_risk),
+        "founder": int(avg_vc_risk),
+        "balance": int(100 - abs(avg_founder_risk - avg_vc_risk))
+    }
+
+
+def bucket_key(clauses: List[Dict]) -> Optional[Tuple[str, str]]:
+    """(conflict_type, bias) of the bucket a clause list would be, None if empty"""
+    if not clauses:
+        return None
+    return clauses[0]["conflict_type"], clauses[0]["bias"]
+
+
+class ClauseIndex:
+    """Built once per clause library; match + score become dict lookups"""
+    
+    def __init__(self, clauses: List[Dict]):
+        self.clauses = clauses
+        self.buckets: Dict[Tuple[str, str], List[Dict]] = defaultdict(list)
+        for c in clauses:
+            self.buckets[(c["conflict_type"], c["bias"])].append(c)
+        self.buckets = dict(self.buckets)
+        
+        # Scores per bucket, so get_alignment_score(match_clauses(...)[s], p)
+        # needs no re-summing
+        self.scores = {key: alignment_scores(bucket) for key, bucket in self.buckets.items()}
+        
+        self._empty: List[Dict] = []
+        self._matches: Dict[str, Dict[str, List[Dict]]] = {}
+        for conflict_type in {c["conflict_type"] for c in clauses}:
+            self._matches[conflict_type] = self._scenario_sets(conflict_type)
+    
+    def _scenario_sets(self, conflict_type: str) -> Dict[str, List[Dict]]:
+        return {
+            scenario: self.buckets.get((conflict_type, bias), self._empty)
+            for scenario, bias in SCENARIO_BIAS.items()
+        }
+    
+    def updated(self, clauses: List[Dict], conflict_types: Iterable[str]) -> "ClauseIndex":
+        """
+        Index over a new version of the library that rebuilds only the buckets of
+        conflict_types (every type an added, changed or removed clause had, before
+        or after); the other buckets, their scores and matches are reused as is.
+        This index is not modified, so readers holding it stay consistent.
+        
+        Args:
+            clauses: The new clause list
+            conflict_types: Conflict types whose clauses changed
+            
+        Returns:
+            New ClauseIndex
+        """
+        affected = set(conflict_types)
+        new = ClauseIndex.__new__(ClauseIndex)
+        new.clauses = clauses
+        new.buckets = {key: b for key, b in self.buckets.items() if key[0] not in affected}
+        rebuilt: Dict[Tuple[str, str], List[Dict]] = defaultdict(list)
+        for c in clauses:
+            if c["conflict_type"] in affected:
+                rebuilt[(c["conflict_type"], c["bias"])].append(c)
+        new.buckets.update(rebuilt)
+        new.scores = {
+            key: self.scores[key] if key not in rebuilt else alignment_scores(bucket)
+            for key, bucket in new.buckets.items()
+        }
+        new._empty = self._empty
+        new._matches = {
+            conflict_type: matches for conflict_type, matches in self._matches.items()
+            if conflict_type not in affected
+        }
+        for conflict_type in {key[0] for key in rebuilt}:
+            new._matches[conflict_type] = new._scenario_sets(conflict_type)
+        return new
+    
+    def match(self, conflict_type: str) -> Dict[str, List[Dict]]:
+        """
+        Clause sets per scenario for a conflict type
+        
+        The lists are shared with the index and must not be mutated.
+        """
+        matches = self._matches.get(conflict_type)
+        if matches is None:
+            return {scenario: [] for scenario in SCENARIO_BIAS}
+        return dict(matches)
+    
+    def scores_for(self, clauses: List[Dict]) -> Dict[str, int]:
+        """
+        Precomputed scores when clauses is this index's (conflict_type, bias)
+        bucket itself; computed for any other list (a copy, slice or a bucket of
+        an older index version)
+        """
+        key = bucket_key(clauses)
+        if key is not None and self.buckets.get(key) is clauses:
+            return self.scores[key]
+        return alignment_scores(clauses)
+    
+    def alignment_score(self, clauses: List[Dict], perspective: str) -> int:
+        """Score for one perspective: "vc", "founder", anything else = balance"""
+        scores = self.scores_for(clauses)
+        return scores.get(perspective, scores["balance"])
+
+
+class StoreClauseIndex:
+    """
+    ClauseIndex over a memory-mapped ClauseStore (clause_store.py)
+    
+    Buckets and their risk totals come from the store, so nothing is loaded up
+    front; only the buckets a request matches are materialized into dicts, and
+    the most recent max_cached conflict types are kept (a locked LRU: matches
+    come from the event loop and from threadpool workers at once).
+    """
+    
+    def __init__(self, store, max_cached: int = 256):
+        self.clauses = store
+        self.max_cached = max_cached
+        self._matches = TTLCache(max_cached, ttl=0)
+    
+    def match(self, conflict_type: str) -> Dict[str, List[Dict]]:
+        """Clause sets per scenario for a conflict type (shared lists, do not mutate)"""
+        matches = self._matches.get(conflict_type)
+        if matches is not None:
+            return dict(matches)
+        
+        # two threads missing together both build it; the last one stays cached
+        matches = {
+            scenario: self.clauses.rows(self.clauses.bucket_rows(conflict_type, bias))
+            for scenario, bias in SCENARIO_BIAS.items()
+        }
+        self._matches.set(conflict_type, matches)
+        return dict(matches)
+    
+    def scores_for(self, clauses: List[Dict]) -> Dict[str, int]:
+        """
+        Scores from the store's risk totals when clauses is a cached matched
+        bucket itself; computed for any other list
+        """
+        key = bucket_key(clauses)
+        matches = self._matches.get(key[0]) if key is not None else None
+        if matches is not None and any(bucket is clauses for bucket in matches.values()):
+            return scores_from_totals(*self.clauses.bucket_totals(*key))
+        return alignment_scores(clauses)
+    
+    def alignment_score(self, clauses: List[Dict], perspective: str) -> int:
+        """Score for one perspective: "vc", "founder", anything else = balance"""
+        scores = self.scores_for(clauses)
+        return scores.get(perspective, scores["balance"])
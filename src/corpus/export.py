@@ -0,0 +1,65 @@
+"""Markdown export of a 3-scenario simulation"""
+from typing import Callable, Dict, List
+
+SCENARIO_NAMES = {
+    "vc_win": "💰 VC WIN",
+    "founder_win": "💡 FOUNDER WIN",
+    "winwin": "🤝 WIN-WIN"
+}
+
+# Body of a scenario with no matching clauses (app.py / precompute.py exports)
+EMPTY_SCENARIO = "*No clauses available*\n\n"
+
+
+def render_export_markdown(
+    episode: Dict,
+    clause_sets: Dict[str, List[Dict]],
+    get_alignment_score: Callable[[List[Dict], str], int],
+    empty_scenario: str = EMPTY_SCENARIO
+) -> str:
+    """
+    Render the portfolio/resume markdown for an episode
+    
+    Args:
+        episode: Episode data
+        clause_sets: Output of ClauseMatchAgent.match_clauses
+        get_alignment_score: ClauseMatchAgent.get_alignment_score
+        empty_scenario: Written under a scenario without clauses (the Vercel
+            export has always left it out, so it passes "")
+        
+    Returns:
+        Markdown document
+    """
+    markdown = f"""# Pied Piper Legal Simulator
+
+## Episode: {episode['title']} ({episode['episode_id']})
+
+**Conflict:** {episode['conflict_type']}  
+**Scene:** {episode['scene']}  
+**Legal Stakes:** {episode['legal_stakes']}
+
+---
+
+"""
+    
+    for scenario_type, clauses in clause_sets.items():
+        markdown += f"### {SCENARIO_NAMES.get(scenario_type)}\n\n"
+        
+        if clauses:
+            for clause in clauses:
+                markdown += f"- **{clause['clause_type']}:** {clause['short_text']}\n"
+                markdown += f"  - {clause['explanation']}\n"
+                markdown += f"  - Risk (Founder): {clause['risk_score_founder']}% | Risk (VC): {clause['risk_score_vc']}%\n\n"
+            
+            # Add alignment scores
+            vc_score = get_alignment_score(clauses, "vc")
+            founder_score = get_alignment_score(clauses, "founder")
+            balance_score = get_alignment_score(clauses, "neutral")
+            
+            markdown += f"**Alignment:** VC: {vc_score}% | Founder: {founder_score}% | Balance: {balance_score}%\n\n"
+        else:
+            markdown += empty_scenario
+        
+        markdown += "---\n\n"
+    
+    return markdown
@@ -0,0 +1,55 @@
+"""Assembly of the /simulate response body"""
+from typing import Callable, Dict, List
+
+NO_CLAUSES = "No clauses available for this scenario."
+
+
+def assemble_simulation(
+    episode: Dict,
+    clause_sets: Dict[str, List[Dict]],
+    narratives: Dict[str, str],
+    get_alignment_score: Callable[[List[Dict], str], int],
+    empty_narrative: str = NO_CLAUSES
+) -> Dict:
+    """
+    Combine matched clauses, narratives and alignment scores
+    
+    Args:
+        episode: Episode data
+        clause_sets: Output of ClauseMatchAgent.match_clauses
+        narratives: scenario_type -> narrative for every non-empty scenario
+        get_alignment_score: ClauseMatchAgent.get_alignment_score
+        empty_narrative: Narrative shown for scenarios without clauses
+        
+    Returns:
+        Dict with keys: episode, scenarios, alignment_scores
+    """
+    scenarios = {}
+    alignment_scores = {}
+    
+    for scenario_type, clauses in clause_sets.items():
+        if not clauses:
+            scenarios[scenario_type] = {
+                "clauses": [],
+                "narrative": empty_narrative,
+                "clause_details": []
+            }
+            alignment_scores[scenario_type] = {"vc": 50, "founder": 50, "balance": 50}
+            continue
+        
+        scenarios[scenario_type] = {
+            "clauses": clauses,  # Return full clause objects, not just short_text
+            "narrative": narratives[scenario_type],
+            "clause_details": clauses
+        }
+        alignment_scores[scenario_type] = {
+            "vc": get_alignment_score(clauses, "vc"),
+            "founder": get_alignment_score(clauses, "founder"),
+            "balance": get_alignment_score(clauses, "neutral")
+        }
+    
+    return {
+        "episode": episode,
+        "scenarios": scenarios,
+        "alignment_scores": alignment_scores
+    }
@@ -0,0 +1,84 @@
+"""Precomputed simulation snapshot (written by precompute.py)"""
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Optional
+
+# Bump when the snapshot layout changes; older files are ignored, not misread
+SNAPSHOT_FORMAT = 1
+
+CORPUS_FILES = ("episodes.json", "clauses.json")
+
+
+def corpus_version(data_dir) -> str:
+    """Content hash of the corpus files in data_dir"""
+    digest = hashlib.sha1()
+    for name in CORPUS_FILES:
+        try:
+            digest.update((Path(data_dir) / name).read_bytes())
+        except OSError:
+            pass
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+class Snapshot:
+    """Read-only view over a snapshot file; empty if missing or stale"""
+    
+    def __init__(self, payload: Optional[Dict] = None):
+        payload = payload or {}
+        self.meta = payload.get("meta", {})
+        self.simulations: Dict[str, Dict] = payload.get("simulations", {})
+        self.exports: Dict[str, str] = payload.get("exports", {})
+    
+    @classmethod
+    def load(cls, path, data_dir) -> "Snapshot":
+        """
+        Load a snapshot, discarding it unless it matches the current corpus
+        
+        Args:
+            path: Snapshot JSON file
+            data_dir: Directory holding episodes.json / clauses.json
+            
+        Returns:
+            Snapshot (empty when missing, unreadable, or built from another corpus)
+        """
+        try:
+            with open(path, 'r') as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        
+        meta = payload.get("meta", {})
+        if meta.get("format") != SNAPSHOT_FORMAT or meta.get("corpus_version") != corpus_version(data_dir):
+            print(f"⚠️  Ignoring stale snapshot {path}")
+            return cls()
+        return cls(payload)
+    
+    @property
+    def has_llm_narratives(self) -> bool:
+        """False when precompute ran without an LLM (narratives are fallbacks)"""
+        return self.meta.get("narrative_model", "fallback") != "fallback"
+    
+    def __len__(self) -> int:
+        return len(self.simulations)
+    
+    def simulation(self, episode_id: str) -> Optional[Dict]:
+        """Precomputed /simulate body for an episode, or None on a miss"""
+        return self.simulations.get(episode_id)
+    
+    def export(self, episode_id: str) -> Optional[str]:
+        """Precomputed /export markdown for an episode, or None on a miss"""
+        return self.exports.get(episode_id)
+    
+    def without(self, episode_ids) -> "Snapshot":
+        """
+        Copy minus the given episodes (their clauses or episode row changed in a
+        hot reload; the next request for them is generated live)
+        """
+        drop = set(episode_ids)
+        return Snapshot({
+            "meta": self.meta,
+            "simulations": {k: v for k, v in self.simulations.items() if k not in drop},
+            "exports": {k: v for k, v in self.exports.items() if k not in drop}
+        })
@@ -1,5 +1,6 @@
 """Database management"""
 from .db_manager import DBManager
+from .write_behind import SimulationWriter
 
-__all__ = ["DBManager"]
+__all__ = ["DBManager", "SimulationWriter"]
 
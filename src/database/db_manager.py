@@ -1,19 +1,65 @@
 """Database manager for DuckDB and Supabase"""
+import asyncio
+import contextvars
 import duckdb
+import hashlib
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 import config
+import timing
 
 
 class DBManager:
     """Manages local DuckDB and optional Supabase sync"""
     
-    def __init__(self, db_path: str = config.DUCKDB_PATH):
+    def __init__(
+        self,
+        db_path: str = config.DUCKDB_PATH,
+        pool_size: int = config.DUCKDB_POOL_SIZE,
+        read_only: bool = False
+    ):
+        """
+        Args:
+            db_path: DuckDB file
+            pool_size: Worker threads (each with its own cursor) for the async reads
+            read_only: Open the file read-only, for processes that only serve reads
+                (DuckDB allows a single read-write process per file)
+        """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self.conn = duckdb.connect(str(self.db_path))
-        self._init_schema()
+        self.read_only = read_only
+        self.conn = duckdb.connect(str(self.db_path), read_only=read_only)
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, pool_size), thread_name_prefix="duckdb"
+        )
+        if not read_only:
+            self._init_schema()
+    
+    def _cursor(self) -> duckdb.DuckDBPyConnection:
+        """
+        Cursor owned by the calling thread
+        
+        A DuckDB connection must not be used from several threads at once (and
+        .description belongs to whichever query ran last), so every thread gets
+        its own cursor over the shared database instance.
+        """
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self.conn.cursor()
+            self._local.cursor = cursor
+        return cursor
+    
+    async def _run(self, fn, *args):
+        """Run a blocking DB method on the pool so the event loop stays free"""
+        loop = asyncio.get_running_loop()
+        # run_in_executor doesn't carry contextvars; the copy keeps timing spans on the request
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(self._pool, ctx.run, fn, *args)
     
     def _init_schema(self):
         """Create tables if they don't exist"""
@@ -61,39 +107,177 @@ class DBManager:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
+        
+        # Content hash of the last JSON file bulk-loaded into each corpus table
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS corpus_meta (
+                table_name VARCHAR PRIMARY KEY,
+                content_hash VARCHAR,
+                row_count INTEGER,
+                loaded_at DOUBLE
+            )
+        """)
+        
+        # Narrative cache (LLM output keyed on a content hash of the prompt inputs)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS narrative_cache (
+                cache_key VARCHAR PRIMARY KEY,
+                narrative TEXT,
+                clauses_version VARCHAR,
+                created_at DOUBLE
+            )
+        """)
+        # Which episode / clauses a narrative was generated from, so a corpus
+        # reload can drop just the affected rows (space-separated clause_ids)
+        self.conn.execute("ALTER TABLE narrative_cache ADD COLUMN IF NOT EXISTS episode_id VARCHAR")
+        self.conn.execute("ALTER TABLE narrative_cache ADD COLUMN IF NOT EXISTS clause_ids VARCHAR")
+    
+    # Column name -> DuckDB type, in table order (drives read_json and the merge)
+    EPISODE_COLUMNS = {
+        "episode_id": "VARCHAR", "title": "VARCHAR", "conflict_type": "VARCHAR",
+        "scene": "VARCHAR", "founder_action": "VARCHAR", "vc_action": "VARCHAR",
+        "result": "VARCHAR", "legal_stakes": "VARCHAR"
+    }
+    CLAUSE_COLUMNS = {
+        "clause_id": "VARCHAR", "conflict_type": "VARCHAR", "bias": "VARCHAR",
+        "clause_type": "VARCHAR", "short_text": "VARCHAR", "full_text": "VARCHAR",
+        "explanation": "VARCHAR", "risk_score_founder": "INTEGER", "risk_score_vc": "INTEGER"
+    }
     
-    def load_episodes(self, json_path: str):
+    def load_episodes(self, json_path: str) -> dict:
         """Load episodes from JSON into DuckDB"""
-        with open(json_path, 'r') as f:
-            episodes = json.load(f)
-        
-        for ep in episodes:
-            self.conn.execute("""
-                INSERT OR REPLACE INTO episodes VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, [
-                ep['episode_id'], ep['title'], ep['conflict_type'],
-                ep['scene'], ep['founder_action'], ep['vc_action'],
-                ep['result'], ep['legal_stakes']
-            ])
-    
-    def load_clauses(self, json_path: str):
+        return self._bulk_load("episodes", self.EPISODE_COLUMNS, json_path)
+    
+    def load_clauses(self, json_path: str) -> dict:
         """Load clauses from JSON into DuckDB"""
-        with open(json_path, 'r') as f:
-            clauses = json.load(f)
-        
-        for clause in clauses:
-            self.conn.execute("""
-                INSERT OR REPLACE INTO clauses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, [
-                clause['clause_id'], clause['conflict_type'], clause['bias'],
-                clause['clause_type'], clause['short_text'], clause['full_text'],
-                clause['explanation'], clause['risk_score_founder'], 
-                clause['risk_score_vc']
-            ])
+        return self._bulk_load("clauses", self.CLAUSE_COLUMNS, json_path)
+    
+    @timing.timed("db.bulk_load")
+    def _bulk_load(self, table: str, columns: dict, json_path: str) -> dict:
+        """
+        Bulk-load a JSON array file into a table, skipping unchanged files
+        
+        DuckDB parses the file itself (read_json) into a staging table that is
+        merged with a single INSERT OR REPLACE, instead of one INSERT per row.
+        
+        Args:
+            table: Target table (episodes or clauses)
+            columns: Column name -> type, in table order
+            json_path: JSON array of row objects
+            
+        Returns:
+            Dict with rows, seconds, rows_per_sec and skipped
+        """
+        started = time.perf_counter()
+        with open(json_path, 'rb') as f:
+            content_hash = hashlib.sha1(f.read()).hexdigest()
+        
+        cursor = self._cursor()
+        meta = cursor.execute(
+            "SELECT content_hash, row_count FROM corpus_meta WHERE table_name = ?", [table]
+        ).fetchone()
+        if meta and meta[0] == content_hash:
+            row_count = cursor.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+            if row_count >= meta[1]:
+                return {"rows": 0, "seconds": 0.0, "rows_per_sec": 0, "skipped": True}
+        
+        col_list = ", ".join(columns)
+        col_types = ", ".join(f"{name}: '{kind}'" for name, kind in columns.items())
+        # Inlined literal: a prepared read_json(?) is replanned slowly by DuckDB
+        source = "'" + str(json_path).replace("'", "''") + "'"
+        staging = f"{table}_staging"
+        cursor.execute("BEGIN TRANSACTION")
+        try:
+            cursor.execute(f"""
+                CREATE OR REPLACE TEMP TABLE {staging} AS
+                SELECT {col_list}
+                FROM read_json({source}, format = 'array', columns = {{{col_types}}})
+            """)
+            rows = cursor.execute(f"SELECT count(*) FROM {staging}").fetchone()[0]
+            cursor.execute(f"INSERT OR REPLACE INTO {table} SELECT {col_list} FROM {staging}")
+            cursor.execute(f"DROP TABLE {staging}")
+            cursor.execute("""
+                INSERT OR REPLACE INTO corpus_meta VALUES (?, ?, ?, ?)
+            """, [table, content_hash, rows, time.time()])
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        
+        seconds = time.perf_counter() - started
+        return {
+            "rows": rows,
+            "seconds": round(seconds, 4),
+            "rows_per_sec": int(rows / seconds) if seconds > 0 else rows,
+            "skipped": False
+        }
+    
+    def upsert_episodes(self, rows: list, removed_ids: list, content_hash: str) -> dict:
+        """Apply an episodes.json diff: changed/added rows and removed episode_ids"""
+        return self._upsert("episodes", self.EPISODE_COLUMNS, "episode_id", rows, removed_ids, content_hash)
     
+    def upsert_clauses(self, rows: list, removed_ids: list, content_hash: str) -> dict:
+        """Apply a clauses.json diff: changed/added rows and removed clause_ids"""
+        return self._upsert("clauses", self.CLAUSE_COLUMNS, "clause_id", rows, removed_ids, content_hash)
+    
+    @timing.timed("db.upsert")
+    def _upsert(
+        self,
+        table: str,
+        columns: dict,
+        key: str,
+        rows: list,
+        removed: list,
+        content_hash: str
+    ) -> dict:
+        """
+        Write only the rows a corpus reload touched, in one transaction
+        
+        corpus_meta gets the new file hash, so the next startup's _bulk_load
+        sees the file as already loaded.
+        
+        Args:
+            table: Target table (episodes or clauses)
+            columns: Column name -> type, in table order
+            key: Primary key column
+            rows: Added or changed row dicts
+            removed: Keys of removed rows
+            content_hash: SHA-1 of the new JSON file
+            
+        Returns:
+            Dict with upserted, deleted and seconds
+        """
+        started = time.perf_counter()
+        cursor = self._cursor()
+        cursor.execute("BEGIN TRANSACTION")
+        try:
+            if removed:
+                placeholders = ", ".join("?" for _ in removed)
+                cursor.execute(f"DELETE FROM {table} WHERE {key} IN ({placeholders})", list(removed))
+            if rows:
+                cursor.executemany(
+                    f"INSERT OR REPLACE INTO {table} VALUES ({', '.join('?' for _ in columns)})",
+                    [[row.get(col) for col in columns] for row in rows]
+                )
+            row_count = cursor.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+            cursor.execute("""
+                INSERT OR REPLACE INTO corpus_meta VALUES (?, ?, ?, ?)
+            """, [table, content_hash, row_count, time.time()])
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        return {
+            "upserted": len(rows),
+            "deleted": len(removed),
+            "seconds": round(time.perf_counter() - started, 4)
+        }
+    
+    @timing.timed("db.get_episode")
     def get_episode(self, episode_id: str) -> Optional[dict]:
         """Fetch episode by ID"""
-        result = self.conn.execute(
+        cursor = self._cursor()
+        result = cursor.execute(
             "SELECT * FROM episodes WHERE episode_id = ?", 
             [episode_id]
         ).fetchone()
@@ -101,15 +285,26 @@ class DBManager:
         if not result:
             return None
         
-        cols = [desc[0] for desc in self.conn.description]
+        cols = [desc[0] for desc in cursor.description]
         return dict(zip(cols, result))
     
+    @timing.timed("db.get_all_episodes")
     def get_all_episodes(self) -> list[dict]:
         """Fetch all episodes"""
-        results = self.conn.execute("SELECT * FROM episodes").fetchall()
-        cols = [desc[0] for desc in self.conn.description]
+        cursor = self._cursor()
+        results = cursor.execute("SELECT * FROM episodes").fetchall()
+        cols = [desc[0] for desc in cursor.description]
         return [dict(zip(cols, row)) for row in results]
     
+    async def aget_episode(self, episode_id: str) -> Optional[dict]:
+        """get_episode on the DB thread pool"""
+        return await self._run(self.get_episode, episode_id)
+    
+    async def aget_all_episodes(self) -> list[dict]:
+        """get_all_episodes on the DB thread pool"""
+        return await self._run(self.get_all_episodes)
+    
+    @timing.timed("db.save_simulation")
     def save_simulation(
         self, 
         episode_id: str, 
@@ -119,7 +314,7 @@ class DBManager:
         alignment_scores: dict
     ):
         """Save simulation result for resume/portfolio use"""
-        self.conn.execute("""
+        self._cursor().execute("""
             INSERT INTO simulations (
                 episode_id, scenario_type, clauses_json, 
                 narrative, alignment_scores_json
@@ -129,7 +324,138 @@ class DBManager:
             narrative, json.dumps(alignment_scores)
         ])
     
+    @timing.timed("db.save_simulations")
+    def save_simulations(self, records: list):
+        """
+        Bulk-insert simulation results in one statement
+        
+        Args:
+            records: (episode_id, scenario_type, clauses, narrative, alignment_scores)
+                tuples, as passed to save_simulation
+        """
+        if not records:
+            return
+        rows = [
+            (episode_id, scenario_type, json.dumps(clauses), narrative, json.dumps(scores))
+            for episode_id, scenario_type, clauses, narrative, scores in records
+        ]
+        cursor = self._cursor()
+        try:
+            import pandas as pd
+        except ImportError:
+            cursor.executemany("""
+                INSERT INTO simulations (
+                    episode_id, scenario_type, clauses_json,
+                    narrative, alignment_scores_json
+                ) VALUES (?, ?, ?, ?, ?)
+            """, rows)
+            return
+        
+        # A registered DataFrame is scanned natively (~100x faster than executemany)
+        batch = pd.DataFrame(rows, columns=[
+            "episode_id", "scenario_type", "clauses_json",
+            "narrative", "alignment_scores_json"
+        ])
+        cursor.register("simulations_batch", batch)
+        try:
+            cursor.execute("""
+                INSERT INTO simulations (
+                    episode_id, scenario_type, clauses_json,
+                    narrative, alignment_scores_json
+                ) SELECT * FROM simulations_batch
+            """)
+        finally:
+            cursor.unregister("simulations_batch")
+    
+    @timing.timed("db.get_cached_narrative")
+    def get_cached_narrative(self, cache_key: str, max_age: float = 0) -> Optional[str]:
+        """Fetch a cached narrative; max_age in seconds (0 = no expiry)"""
+        min_created = time.time() - max_age if max_age > 0 else 0
+        result = self._cursor().execute(
+            "SELECT narrative FROM narrative_cache WHERE cache_key = ? AND created_at >= ?",
+            [cache_key, min_created]
+        ).fetchone()
+        return result[0] if result else None
+    
+    @timing.timed("db.save_cached_narrative")
+    def save_cached_narrative(
+        self,
+        cache_key: str,
+        narrative: str,
+        clauses_version: str,
+        episode_id: Optional[str] = None,
+        clause_ids: Optional[list] = None
+    ):
+        """Store a generated narrative in the cache table"""
+        self._cursor().execute("""
+            INSERT OR REPLACE INTO narrative_cache
+                (cache_key, narrative, clauses_version, created_at, episode_id, clause_ids)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [
+            cache_key, narrative, clauses_version, time.time(),
+            episode_id, " ".join(clause_ids) if clause_ids else None
+        ])
+    
+    async def aget_cached_narrative(self, cache_key: str, max_age: float = 0) -> Optional[str]:
+        """get_cached_narrative on the DB thread pool"""
+        return await self._run(self.get_cached_narrative, cache_key, max_age)
+    
+    async def asave_cached_narrative(
+        self,
+        cache_key: str,
+        narrative: str,
+        clauses_version: str,
+        episode_id: Optional[str] = None,
+        clause_ids: Optional[list] = None
+    ):
+        """save_cached_narrative on the DB thread pool"""
+        await self._run(
+            self.save_cached_narrative, cache_key, narrative, clauses_version, episode_id, clause_ids
+        )
+    
+    @timing.timed("db.invalidate_narratives")
+    def invalidate_narratives(self, keep_version: Optional[str] = None) -> int:
+        """Drop cached narratives built from any other clauses.json version"""
+        if keep_version is None:
+            result = self._cursor().execute("DELETE FROM narrative_cache").fetchone()
+        else:
+            result = self._cursor().execute(
+                "DELETE FROM narrative_cache WHERE clauses_version <> ?", [keep_version]
+            ).fetchone()
+        return result[0] if result else 0
+    
+    @timing.timed("db.invalidate_narratives")
+    def invalidate_narratives_for(
+        self,
+        episode_ids: list,
+        clause_ids: list,
+        keep_version: str
+    ) -> int:
+        """
+        Drop cached narratives generated from any of these episodes or clauses
+        (and untagged rows from before tagging), then move the rest to keep_version
+        
+        Returns:
+            Number of rows deleted
+        """
+        cursor = self._cursor()
+        cursor.execute("BEGIN TRANSACTION")
+        try:
+            result = cursor.execute("""
+                DELETE FROM narrative_cache
+                WHERE clause_ids IS NULL
+                   OR list_contains(?, episode_id)
+                   OR list_has_any(string_split(clause_ids, ' '), ?)
+            """, [list(episode_ids), list(clause_ids)]).fetchone()
+            cursor.execute("UPDATE narrative_cache SET clauses_version = ?", [keep_version])
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        return result[0] if result else 0
+    
     def close(self):
         """Close database connection"""
+        self._pool.shutdown(wait=True)
         self.conn.close()
 
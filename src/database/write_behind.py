@@ -0,0 +1,147 @@
+"""Write-behind queue for simulation history"""
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+import config
+
+
+class SimulationWriter:
+    """
+    Accepts simulation records without blocking and flushes them to the
+    simulations table in batches from a background thread
+    """
+    
+    def __init__(
+        self,
+        db,
+        batch_size: int = config.SIMULATION_BATCH_SIZE,
+        flush_interval: float = config.SIMULATION_FLUSH_INTERVAL,
+        max_queue: int = config.SIMULATION_QUEUE_SIZE
+    ):
+        """
+        Args:
+            db: DBManager (uses save_simulations)
+            batch_size: Flush as soon as this many records are waiting
+            flush_interval: ...or when the oldest waiting record is this old (seconds)
+            max_queue: Records beyond this are dropped (and counted) instead of blocking
+        """
+        self.db = db
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+        self._thread = threading.Thread(
+            target=self._loop, name="simulation-writer", daemon=True
+        )
+        self._thread.start()
+    
+    def submit(
+        self,
+        episode_id: str,
+        scenario_type: str,
+        clauses: list,
+        narrative: str,
+        alignment_scores: dict
+    ) -> bool:
+        """Queue one record (same arguments as DBManager.save_simulation)"""
+        try:
+            self._queue.put_nowait(
+                (episode_id, scenario_type, clauses, narrative, alignment_scores)
+            )
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+    
+    def _take_batch(self, timeout: Optional[float]) -> List[tuple]:
+        """Block for the first record, then gather more until size or age limit"""
+        try:
+            batch = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stop.is_set():
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        # Anything already waiting goes too (no extra waiting)
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    def _flush(self, batch: List[tuple]):
+        started = time.perf_counter()
+        try:
+            self.db.save_simulations(batch)
+        except Exception as e:
+            print(f"⚠️  Warning: dropped {len(batch)} simulation records - {e}")
+            with self._lock:
+                self.failed += len(batch)
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.written += len(batch)
+            self.batches += 1
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self._total_flush_ms += elapsed_ms
+    
+    def _loop(self):
+        while not self._stop.is_set():
+            batch = self._take_batch(timeout=0.5)
+            if batch:
+                self._flush(batch)
+        # Drain whatever is left after close()
+        while True:
+            batch = self._take_batch(timeout=0)
+            if not batch:
+                break
+            self._flush(batch)
+    
+    def close(self, timeout: Optional[float] = 10.0) -> bool:
+        """
+        Stop accepting work, flush everything queued, join the thread
+        
+        Returns:
+            False if the thread is still flushing after `timeout`; the database
+            must stay open under it (its remaining records are lost at exit)
+        """
+        self._stop.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(f"⚠️  Warning: simulation writer still flushing after {timeout}s - "
+                  f"{self._queue.qsize()} queued simulation records not written yet")
+            return False
+        return True
+    
+    def stats(self) -> Dict:
+        """Queue depth and flush latency for monitoring"""
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "batches": self.batches,
+                "last_flush_ms": round(self.last_flush_ms, 3),
+                "max_flush_ms": round(self.max_flush_ms, 3),
+                "avg_flush_ms": round(self._total_flush_ms / self.batches, 3) if self.batches else 0.0
+            }
@@ -0,0 +1,58 @@
+"""The pruned search must find the same packages as full enumeration."""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.agents.package_optimizer import PackageOptimizer, best_per_difference, pareto_mask
+
+CLAUSES = json.loads((Path(__file__).parent.parent / "data" / "clauses.json").read_text())
+
+
+def random_scores(seed: int, types: int, per_type: int) -> tuple[list, list]:
+    rng = np.random.default_rng(seed)
+    founder = [rng.integers(0, 101, per_type) for _ in range(types)]
+    vc = [rng.integers(0, 101, per_type) for _ in range(types)]
+    return founder, vc
+
+
+def points(f_tot: np.ndarray, v_tot: np.ndarray) -> set:
+    return set(zip(f_tot.tolist(), v_tot.tolist()))
+
+
+@pytest.mark.parametrize("seed,types,per_type", [(0, 3, 4), (1, 4, 6), (2, 5, 7), (3, 6, 5)])
+def test_search_frontier_matches_enumeration(seed, types, per_type):
+    founder, vc = random_scores(seed, types, per_type)
+    picks, f_tot, v_tot = PackageOptimizer._enumerate(founder, vc)
+    frontier = pareto_mask(f_tot, v_tot)
+
+    (s_picks, s_f, s_v), _ = PackageOptimizer._search(founder, vc, pareto_mask)
+    assert points(s_f, s_v) == points(f_tot[frontier], v_tot[frontier])
+    assert len(s_f) == frontier.sum()  # one package per frontier point
+    # the picks really add up to the totals reported for them
+    for row, f, v in zip(s_picks, s_f, s_v):
+        assert sum(founder[t][i] for t, i in enumerate(row)) == f
+        assert sum(vc[t][i] for t, i in enumerate(row)) == v
+
+
+@pytest.mark.parametrize("seed,types,per_type", [(0, 3, 4), (1, 4, 6), (2, 5, 7)])
+def test_search_balanced_matches_enumeration(seed, types, per_type):
+    founder, vc = random_scores(seed, types, per_type)
+    _, f_tot, v_tot = PackageOptimizer._enumerate(founder, vc)
+    kept = best_per_difference(f_tot, v_tot)
+
+    (_, s_f, s_v), _ = PackageOptimizer._search(founder, vc, best_per_difference)
+    assert points(s_f, s_v) == points(f_tot[kept], v_tot[kept])
+
+
+@pytest.mark.parametrize("conflict_type", sorted({c["conflict_type"] for c in CLAUSES}))
+def test_optimize_methods_agree_on_corpus(conflict_type):
+    clauses = [c for c in CLAUSES if c["conflict_type"] == conflict_type]
+    enumerated = PackageOptimizer(max_enumerate=10**9).optimize(clauses)
+    searched = PackageOptimizer(max_enumerate=0).optimize(clauses)
+    assert enumerated["method"] == "enumerate" and searched["method"] == "pruned_search"
+    for key in ("frontier", "balanced"):
+        assert [p["alignment"] for p in searched[key]] == [p["alignment"] for p in enumerated[key]]
@@ -0,0 +1,87 @@
+"""BM25Index.updated() must rank exactly like a fresh build of the edited corpus."""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from clause_store import ClauseStore
+from retrieval import BM25Index, tokenize
+
+CLAUSES = json.loads((Path(__file__).parent.parent / "data" / "clauses.json").read_text())
+QUERIES = [c["short_text"] for c in CLAUSES] + [
+    "liquidation preference", "board seats ceo removal", "full ratchet anti dilution",
+    "vesting acceleration", "ip assignment", "drag along", "ratchet board",
+]
+
+
+def swapped(text: str, old: str, new: str) -> str:
+    # whole-token replacement, so every field keeps its token count
+    return " ".join(new if t == old else t for t in tokenize(text))
+
+
+def assert_same_ranking(updated: BM25Index, fresh: BM25Index) -> None:
+    assert len(updated) == len(fresh)
+    assert updated.avg_len == fresh.avg_len
+    for q in QUERIES:
+        got, want = updated.search(q, k=10), fresh.search(q, k=10)
+        assert [i for _, i in got] == [i for _, i in want], q
+        assert [s for s, _ in got] == pytest.approx([s for s, _ in want]), q
+
+
+def test_change_matches_fresh_build():
+    index = BM25Index(CLAUSES)
+    docs = list(CLAUSES)
+    changed = {}
+    for i in (0, 7, 30):
+        doc = dict(docs[i], short_text=swapped(docs[i]["short_text"], "board", "ratchet"),
+                   explanation=swapped(docs[i]["explanation"], "the", "vesting"))
+        changed[i] = doc
+    updated = index.updated({i: docs[i] for i in changed}, changed)
+    for i, doc in changed.items():
+        docs[i] = doc
+    assert_same_ranking(updated, BM25Index(docs))
+
+
+def test_remove_and_add_match_fresh_build():
+    index = BM25Index(CLAUSES)
+    docs: list = list(CLAUSES)
+    # a removed clause keeps its (empty) slot; the same text comes back at the end
+    # under another id, so document count and field lengths stay put
+    removed = {3: docs[3], 12: docs[12]}
+    added = {len(docs): dict(docs[3], clause_id="ZZ01"), len(docs) + 1: dict(docs[12], clause_id="ZZ02")}
+    updated = index.updated(removed, added)
+    for i in removed:
+        docs[i] = None
+    docs += added.values()
+    assert_same_ranking(updated, BM25Index(docs))
+    assert not updated.needs_rebuild()
+
+
+def test_stored_postings_match_fresh_build(tmp_path):
+    store = ClauseStore(ClauseStore.build(CLAUSES, tmp_path / "clauses.store"))
+    try:
+        stored = store.bm25()
+        assert_same_ranking(stored, BM25Index(CLAUSES))
+        doc = dict(CLAUSES[2], short_text=swapped(CLAUSES[2]["short_text"], "board", "ratchet"))
+        docs = list(CLAUSES)
+        docs[2] = doc
+        assert_same_ranking(stored.updated({2: CLAUSES[2]}, {2: doc}), BM25Index(docs))
+    finally:
+        store.close()
+
+
+def test_update_leaves_original_untouched():
+    index = BM25Index(CLAUSES)
+    before = {q: index.search(q, k=10) for q in QUERIES}
+    index.updated({0: CLAUSES[0]}, {0: dict(CLAUSES[0], short_text="ratchet ratchet")})
+    assert {q: index.search(q, k=10) for q in QUERIES} == before
+
+
+def test_length_drift_asks_for_rebuild():
+    index = BM25Index(CLAUSES)
+    long = " ".join(["preference"] * 200)
+    updated = index.updated({}, {len(CLAUSES) + i: dict(CLAUSES[i], full_text=long) for i in range(20)})
+    assert updated.needs_rebuild()
+    assert not index.needs_rebuild()
@@ -0,0 +1,146 @@
+"""Limiter: bounded queue, deadlines, and slots released by abandoned streams."""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from scheduler import Limiter, Overloaded
+
+
+def wait_for(condition, timeout: float = 2.0) -> None:
+    stop = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < stop, "timed out"
+        time.sleep(0.005)
+
+
+def test_acquire_sheds_when_queue_full():
+    lim = Limiter("t", max_in_flight=1, max_queue=1, deadline=5.0)
+    lim.acquire()
+    waiter = threading.Thread(target=lambda: (lim.acquire(), lim.release()))
+    waiter.start()
+    wait_for(lambda: lim.stats()["waiting"] == 1)
+
+    with pytest.raises(Overloaded, match="queue full"):
+        lim.acquire()
+    assert lim.shed_queue_full == 1
+
+    lim.release()  # handed straight to the queued thread
+    waiter.join(2.0)
+    assert not waiter.is_alive()
+    assert lim.stats()["in_flight"] == 0 and lim.queued == 1
+
+
+def test_acquire_sheds_past_deadline():
+    lim = Limiter("t", max_in_flight=1, max_queue=4, deadline=5.0)
+    lim.acquire()
+    started = time.monotonic()
+    with pytest.raises(Overloaded, match="deadline"):
+        lim.acquire(deadline=0.05)
+    assert time.monotonic() - started < 1.0
+    assert lim.shed_deadline == 1 and lim.stats()["waiting"] == 0
+    lim.release()
+    assert lim.stats()["in_flight"] == 0
+
+
+def test_aacquire_sheds_when_queue_full_and_past_deadline():
+    lim = Limiter("t", max_in_flight=1, max_queue=1, deadline=5.0)
+
+    async def main():
+        await lim.aacquire()
+        queued = asyncio.create_task(lim.aacquire(deadline=0.05))
+        await asyncio.sleep(0.01)
+        with pytest.raises(Overloaded, match="queue full"):
+            await lim.aacquire()
+        with pytest.raises(Overloaded, match="deadline"):
+            await queued
+        lim.release()
+
+    asyncio.run(main())
+    assert lim.shed_queue_full == 1 and lim.shed_deadline == 1
+    assert lim.stats()["in_flight"] == 0 and lim.stats()["waiting"] == 0
+
+
+def test_aacquire_cancelled_leaves_queue():
+    lim = Limiter("t", max_in_flight=1, max_queue=1, deadline=5.0)
+
+    async def main():
+        await lim.aacquire()
+        queued = asyncio.create_task(lim.aacquire())
+        await asyncio.sleep(0.01)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        assert lim.stats()["waiting"] == 0
+        lim.release()
+
+    asyncio.run(main())
+    assert lim.stats()["in_flight"] == 0
+
+
+def test_closing_a_generator_frees_its_slot():
+    # advise_stream holds its slot across yields; a client that disconnects
+    # mid-stream closes the generator instead of exhausting it
+    lim = Limiter("t", max_in_flight=1, max_queue=0)
+
+    def stream():
+        with lim.slot():
+            yield "first"
+            yield "second"
+
+    events = stream()
+    assert next(events) == "first"
+    with pytest.raises(Overloaded):
+        lim.acquire()
+    events.close()
+    assert lim.stats()["in_flight"] == 0
+    with lim.slot():
+        pass
+
+
+def test_closing_an_async_generator_frees_its_slot():
+    lim = Limiter("t", max_in_flight=1, max_queue=0)
+
+    async def stream():
+        async with lim.aslot():
+            yield "first"
+            yield "second"
+
+    async def main():
+        events = stream()
+        assert await events.__anext__() == "first"
+        assert lim.stats()["in_flight"] == 1
+        await events.aclose()
+
+    asyncio.run(main())
+    assert lim.stats()["in_flight"] == 0
+
+
+def test_sse_response_closes_stream_when_client_goes_away():
+    from starlette.requests import ClientDisconnect
+
+    from main import ClosingStreamingResponse
+
+    lim = Limiter("t", max_in_flight=1, max_queue=0)
+
+    def events():
+        with lim.slot():
+            while True:
+                yield "event: token\ndata: {}\n\n"
+
+    async def receive():
+        await asyncio.Event().wait()  # the client never sends anything
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            raise OSError("client disconnected")
+
+    scope = {"type": "http", "asgi": {"spec_version": "2.4"}, "method": "GET", "headers": []}
+    stream = events()  # kept referenced: only the response may close it
+    response = ClosingStreamingResponse(stream, media_type="text/event-stream")
+    with pytest.raises(ClientDisconnect):
+        asyncio.run(response(scope, receive, send))
+    assert lim.stats()["in_flight"] == 0
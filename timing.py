@@ -0,0 +1,168 @@
+"""
+Per-request stage timing: Server-Timing headers + Prometheus histograms.
+
+    with timing.span("retrieve"):           # a block
+        ...
+    @timing.timed("db.get_episode")          # a function (sync or async)
+    def get_episode(...): ...
+
+Spans use the monotonic perf_counter, land in the current request's list (a
+contextvar set by ServerTimingMiddleware, visible from threadpool work) and in a
+per-process histogram rendered by render_prometheus() for /metrics.
+
+SERVER_TIMING=0 turns it all off at import: span() hands back one shared no-op
+context manager, timed() returns the function untouched and the apps skip the
+middleware, so the disabled cost is a single attribute lookup per span.
+"""
+from __future__ import annotations
+
+import bisect
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Iterator
+
+ENABLED = os.environ.get("SERVER_TIMING", "1") != "0"
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_request_spans: contextvars.ContextVar[list[tuple[str, float]] | None] = contextvars.ContextVar(
+    "request_spans", default=None
+)
+_NOOP = nullcontext()
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a label tuple."""
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...]):
+        self.name, self.help, self.labels = name, help_text, labels
+        self._series: dict[tuple[str, ...], list[float]] = {}  # counts per bucket + [sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        i = bisect.bisect_left(BUCKETS, value)
+        with self._lock:
+            s = self._series.get(label_values)
+            if s is None:
+                s = self._series[label_values] = [0.0] * (len(BUCKETS) + 2)
+            if i < len(BUCKETS):
+                s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    def render(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for values, s in sorted(series.items()):
+            base = ",".join(f'{k}="{v}"' for k, v in zip(self.labels, values))
+            sep = "," if base else ""
+            cumulative = 0.0
+            for le, n in zip(BUCKETS, s):
+                cumulative += n
+                out.append(f'{self.name}_bucket{{{base}{sep}le="{le}"}} {int(cumulative)}')
+            out.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {int(s[-1])}')
+            out.append(f"{self.name}_sum{{{base}}} {s[-2]:.6f}")
+            out.append(f"{self.name}_count{{{base}}} {int(s[-1])}")
+        return out
+
+
+STAGES = Histogram("stage_duration_seconds", "Time spent per request stage.", ("stage",))
+REQUESTS = Histogram(
+    "http_request_duration_seconds", "Time to response headers per route.", ("method", "route")
+)
+
+
+def record(name: str, seconds: float) -> None:
+    STAGES.observe(seconds, name)
+    spans = _request_spans.get()
+    if spans is not None:
+        spans.append((name, seconds))
+
+
+@contextmanager
+def _span(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+def span(name: str):
+    return _span(name) if ENABLED else _NOOP
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    def wrap(fn: Callable) -> Callable:
+        if not ENABLED:
+            return fn
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def run_async(*args: Any, **kwargs: Any) -> Any:
+                with _span(name):
+                    return await fn(*args, **kwargs)
+            return run_async
+
+        @functools.wraps(fn)
+        def run(*args: Any, **kwargs: Any) -> Any:
+            with _span(name):
+                return fn(*args, **kwargs)
+        return run
+    return wrap
+
+
+def server_timing(spans: list[tuple[str, float]], total: float) -> str:
+    """Header value; repeated stages (e.g. 3 concurrent narratives) are summed."""
+    merged: dict[str, list[float]] = {}
+    for name, seconds in spans:
+        m = merged.setdefault(name, [0.0, 0])
+        m[0] += seconds
+        m[1] += 1
+    parts = [
+        f'{name};dur={s * 1e3:.2f}' + (f';desc="x{int(n)}"' if n > 1 else "")
+        for name, (s, n) in merged.items()
+    ]
+    parts.append(f"total;dur={total * 1e3:.2f}")
+    return ", ".join(parts)
+
+
+class ServerTimingMiddleware:
+    """Pure ASGI (streaming-safe): adds Server-Timing with the spans recorded
+    before the response headers go out, and observes the route latency."""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        spans: list[tuple[str, float]] = []
+        token = _request_spans.set(spans)
+        started = time.perf_counter()
+
+        async def send_with_timing(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - started
+                route = (getattr(scope.get("route"), "path", None)
+                         or getattr(scope.get("endpoint"), "__name__", None) or "unmatched")
+                REQUESTS.observe(total, scope.get("method", ""), route)
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(spans, total).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_spans.reset(token)
+
+
+def render_prometheus() -> str:
+    return "\n".join(STAGES.render() + REQUESTS.render()) + "\n"